@@ -1,33 +1,19 @@
 import streamlit as st
 import pandas as pd
 import data_processor
-import graphic_renderer
+import heatmap
+import startup
+import telemetry
+from cache import estimate_size, caches_do_processo, memoria_caches, LIMITE_TOTAL_BYTES
 import os
+import time
 
-# --- DEBUG DE DEPLOY RADICAL ---
-import os
-from pathlib import Path
-import streamlit as st
-
-def deploy_check():
-    print(f"=== CONFERÊNCIA DE ASSETS (BASE64) ===")
-    try:
-        from image_data import IMAGES
-        count = len(IMAGES)
-        print(f"SUCESSO: Banco de imagens carregado com {count} chaves.")
-        if count == 0:
-            print("AVISO: O banco de imagens IMAGES está VAZIO!")
-        else:
-            # Lista as primeiras 5 chaves para confirmar o padrão
-            sample = list(IMAGES.keys())[:5]
-            print(f"Amostra de chaves: {sample}")
-    except ImportError:
-        print("ERRO CRÍTICO: Arquivo 'image_data.py' não encontrado no servidor!")
-    except Exception as e:
-        print(f"ERRO AO CARREGAR IMAGENS: {e}")
+# O graphic_renderer (matplotlib, fonte, escudos) NÃO é importado aqui: a tela de PIN e as
+# tabelas abrem sem ele. Depois do login ele é carregado em segundo plano (startup.aquecer_renderer)
+# e obtido com startup.renderer() só quando uma arte for gerada.
 
-deploy_check()
-# --- FIM DEBUG ---
+# Cada rerun é uma execução nova para o painel de desempenho
+telemetry.iniciar_execucao()
 
 # --- SISTEMA DE AUTENTICAÇÃO (PIN) ---
 def check_password():
@@ -63,6 +49,45 @@ def check_password():
 if not check_password():
     st.stop()
 
+def painel_arte(arte, pedidos, acompanhando, rodada_selecionada):
+    """Mostra a arte da sessão a partir dos pedidos ao serviço de renderização (Futures com os bytes do PNG)."""
+    graphic_renderer = startup.renderer()
+    servico = startup.servico_render()
+    preview, final = pedidos['preview'], pedidos.get('final')
+    if not preview.done():
+        st.info(f"⏳ Arte na fila de renderização ({servico.stats()['pendentes']} pendente(s))...")
+    elif preview.exception() is not None:
+        st.error(f"❌ Erro ao gerar arte final: {type(preview.exception()).__name__} - {preview.exception()}")
+        st.session_state["arte"] = None # Não repete o pedido com erro a cada rerun
+    else:
+        st.success("Arte gerada!")
+        stats_img = graphic_renderer.image_cache_stats()
+        stats_artes = graphic_renderer.render_cache_stats()
+        stats_fila = servico.stats()
+        st.caption(f"Cache de imagens: {stats_img['items']} imagens | {stats_img['hits']} hits / {stats_img['misses']} misses"
+                   f"  •  Cache de artes: {stats_artes['memoria']['hits']} hits em memória / {stats_artes['disco']['hits']} em disco"
+                   f"  •  Fila: {stats_fila['processos']} processos | {stats_fila['coalescidos']} pedidos repetidos aproveitados")
+        st.image(preview.result(), width='stretch')
+
+        if final is not None and final.done() and final.exception() is not None:
+            st.error(f"❌ Erro ao gerar arte final: {type(final.exception()).__name__} - {final.exception()}")
+            arte['alta'] = False
+            final = None # Permite tentar de novo
+        if final is None:
+            if st.button(f"PREPARAR PNG EM ALTA ({graphic_renderer.OUTPUT_DPI} DPI)"):
+                arte['alta'] = True
+                st.rerun() # Refaz a página para pedir e acompanhar a arte em alta
+        elif not final.done():
+            st.info("⏳ Gerando PNG em alta resolução...")
+        else:
+            st.download_button("⬇️ BAIXAR PNG", final.result(), f"Analise_R{rodada_selecionada}.png", "image/png")
+
+    if acompanhando and all(f.done() for f in pedidos.values()):
+        st.rerun() # Tudo pronto: sai do acompanhamento periódico
+
+# Já autenticado: prepara o renderizador em paralelo enquanto o usuário escolhe a planilha
+startup.aquecer_renderer()
+
 # Configuração da Página - Modo Wide para caber as tabelas
 st.set_page_config(page_title="Análise xG/xGA Brasileirão", layout="wide")
 
@@ -92,18 +117,62 @@ st.markdown("""
 st.sidebar.header("📂 Arquivo e Filtros")
 
 # Upload de Arquivo
-uploaded_file = st.sidebar.file_uploader("Carregar Planilha (CSV ou Excel)", type=['csv', 'xlsx'])
+uploaded_file = st.sidebar.file_uploader("Carregar Planilha (CSV, Excel ou Parquet)", type=['csv', 'xlsx', 'parquet'])
 
 # Se não tiver upload, mostra aviso
 if uploaded_file is not None:
-    # 1. Carregar Dados
-    df = data_processor.load_and_clean_data(uploaded_file)
+    # 1. Carregar Dados (cache por conteúdo, compartilhado entre reruns e sessões)
+    # Se esta sessão já tinha carregado uma versão anterior, a nova é ingerida de forma incremental.
+    chave_anterior = st.session_state.get("chave_planilha")
+    anterior = data_processor.CACHE_PLANILHAS.peek(chave_anterior) if chave_anterior else None
+    compacto = st.sidebar.checkbox("Modo compacto (menos memória)", value=False,
+                                   help="Times como categorias, gols Int8, xG float32 e datas como número de dias.")
+    dados = data_processor.carregar_planilha_cache(uploaded_file, anterior=anterior, compacto=compacto)
     
-    if isinstance(df, str): # Erro retornado como string
-        st.error(df)
+    if isinstance(dados, str): # Erro retornado como string
+        st.error(dados)
     else:
+        df = dados['df']
+        st.session_state["chave_planilha"] = dados['chave']
         st.sidebar.success(f"Dados carregados: {len(df)} jogos encontrados.")
         
+        # O relatório é desta sessão (da versão que ela tinha para a nova): fica no session_state
+        if dados.get('relatorio') is not None:
+            st.session_state["relatorio_planilha"] = (dados['chave'], dados['relatorio'])
+        chave_relatorio, relatorio = st.session_state.get("relatorio_planilha", (None, None))
+        if relatorio is not None and chave_relatorio == dados['chave']:
+            with st.sidebar.expander("🔄 Mudanças desde a versão anterior"):
+                st.write(f"Jogos novos: **{len(relatorio['inseridos'])}** | Alterados: **{len(relatorio['alterados'])}** | Removidos: **{len(relatorio['removidos'])}**")
+                st.write(f"Confrontos recalculados: **{relatorio['confrontos_recalculados']}**")
+                if relatorio['times_afetados']:
+                    st.caption("Times afetados: " + ", ".join(relatorio['times_afetados']))
+                if len(relatorio['alterados']):
+                    st.dataframe(relatorio['alterados'][['Rodada', 'Data', 'Mandante', 'Placar', 'Visitante']], hide_index=True)
+        
+        # Datasets Parquet e pastas Excel com várias abas trazem várias ligas/temporadas: analisa uma por vez
+        if data_processor.varios_recortes(df):
+            liga = st.sidebar.selectbox("Liga", sorted(df['Liga'].unique().tolist()))
+            temporadas = sorted(df.loc[df['Liga'] == liga, 'Temporada'].unique().tolist())
+            temporada = st.sidebar.selectbox("Temporada", temporadas, index=len(temporadas) - 1)
+            dados = data_processor.carregar_recorte(dados, liga, temporada)
+            df = dados['df']
+        stats_cache = data_processor.CACHE_PLANILHAS.stats()
+        st.sidebar.caption(f"Cache de planilhas: {stats_cache['items']} arquivo(s) | {stats_cache['hits']} hits / {stats_cache['misses']} misses")
+        if startup.renderer_pronto():
+            st.sidebar.caption(f"Renderizador pronto em {startup.TEMPOS['renderer pronto']:.1f}s "
+                               f"(import: {startup.TEMPOS.get('import graphic_renderer', 0):.1f}s)")
+        with st.sidebar.expander("💾 Uso de memória"):
+            memoria = data_processor.relatorio_memoria(df)
+            st.write(f"Partidas: **{memoria.loc['TOTAL', 'Bytes'] / 1024 ** 2:.2f} MB** | "
+                     f"Cubo: **{estimate_size(dados['cubo']) / 1024 ** 2:.2f} MB** | "
+                     f"Cache total: **{stats_cache['bytes'] / 1024 ** 2:.1f} MB**")
+            st.dataframe(memoria, use_container_width=True)
+            # Recursos compartilhados por todas as sessões do processo (a sessão só guarda as escolhas do usuário)
+            st.caption(f"Caches do processo: **{memoria_caches() / 1024 ** 2:.1f} MB**"
+                       + (f" de {LIMITE_TOTAL_BYTES / 1024 ** 2:.0f} MB" if LIMITE_TOTAL_BYTES else ""))
+            st.dataframe(pd.DataFrame(caches_do_processo())[['name', 'items', 'bytes', 'max_bytes', 'hits', 'misses', 'evictions', 'rejected']],
+                         hide_index=True, use_container_width=True)
+        
         # 2. Filtros
         st.sidebar.divider()
         st.sidebar.subheader("⚙️ Parâmetros da Análise")
@@ -115,98 +184,99 @@ if uploaded_file is not None:
         idx_padrao = len(rodadas_disponiveis) - 1 if rodadas_disponiveis else 0
         rodada_selecionada = st.sidebar.selectbox("Rodada Alvo", rodadas_disponiveis, index=idx_padrao)
         
-        n_jogos = st.sidebar.number_input("Recorte (N Jogos)", min_value=1, max_value=20, value=3)
+        n_jogos = st.sidebar.number_input("Recorte (N Jogos)", min_value=1, max_value=data_processor.CUBO_N_MAX, value=3)
         
         tipo_filtro = st.sidebar.radio("Tipo de Filtro", ["POR_MANDO", "TODOS"], index=0, help="POR_MANDO: Mandante vê jogos em casa, Visitante vê jogos fora.\nTODOS: Considera todos os jogos recentes.")
         
+        usar_pillow = st.sidebar.checkbox("Renderização rápida (Pillow)", value=True,
+                                          help="Desenha a arte direto em pixels reaproveitando a parte fixa. Desmarque para usar o matplotlib.")
+        
         # 3. Processamento Principal
-        confrontos = data_processor.get_confrontos_rodada(df, rodada_selecionada)
+        # Cubo (rodada x time x N x filtro) pré-calculado uma vez por arquivo (vem do cache):
+        # trocar rodada, N ou filtro na sidebar vira apenas uma consulta.
+        df_view_mand, df_view_vis = data_processor.consultar_cubo(dados['cubo'], rodada_selecionada, n_jogos, tipo_filtro)
         
-        if not confrontos:
+        if df_view_mand.empty:
             st.warning(f"Sem jogos encontrados para a Rodada {rodada_selecionada}.")
         else:
             st.subheader(f"📊 Análise - Rodada {rodada_selecionada}")
             st.info(f"Filtro Aplicado: Últimos **{n_jogos}** jogos ({'Considerando Mando' if tipo_filtro == 'POR_MANDO' else 'Geral'})")
             
-            # Listas para montar os DataFrames finais
-            dados_tabela_mandante = []
-            dados_tabela_visitante = []
-            
-            progress_bar = st.progress(0)
-            
-            for i, confronto in enumerate(confrontos):
-                mandante = confronto['Mandante']
-                visitante = confronto['Visitante']
-                data_jogo = confronto['Data_Jogo']
-                
-                # CÁLCULOS
-                # Para Tabela Superior (Mandante)
-                stats_mandante_ataque, _ = data_processor.calcular_metricas(df, mandante, data_jogo, n_jogos, tipo_filtro, is_mandante_na_analise=True)
-                stats_visitante_defesa, _ = data_processor.calcular_metricas(df, visitante, data_jogo, n_jogos, tipo_filtro, is_mandante_na_analise=False)
-                
-                row_mand = {
-                    "MANDANTE": mandante,
-                    "GP": stats_mandante_ataque['GP'],
-                    "SG ced": stats_mandante_ataque['SG_Ced'],
-                    "xG casa": float(stats_mandante_ataque['xG']), # Mantendo float para o renderer
-                    "xGA fora": float(stats_visitante_defesa['xGA']), # Mantendo float para o renderer
-                    "SG conq": stats_visitante_defesa['SG_Conq'],
-                    "GS": stats_visitante_defesa['GS'],
-                    "VISITANTE": visitante
-                }
-                dados_tabela_mandante.append(row_mand)
-                
-                # Para Tabela Inferior (Visitante)
-                stats_visitante_ataque, _ = data_processor.calcular_metricas(df, visitante, data_jogo, n_jogos, tipo_filtro, is_mandante_na_analise=False)
-                stats_mandante_defesa, _ = data_processor.calcular_metricas(df, mandante, data_jogo, n_jogos, tipo_filtro, is_mandante_na_analise=True)
-                
-                row_vis = {
-                    "VISITANTE": visitante,
-                    "GP": stats_visitante_ataque['GP'],
-                    "SG ced": stats_visitante_ataque['SG_Ced'],
-                    "xG fora": float(stats_visitante_ataque['xG']), # Mantendo float para o renderer
-                    "xGA casa": float(stats_mandante_defesa['xGA']), # Mantendo float para o renderer
-                    "SG conq": stats_mandante_defesa['SG_Conq'],
-                    "GS": stats_mandante_defesa['GS'],
-                    "MANDANTE": mandante
-                }
-                dados_tabela_visitante.append(row_vis)
-                
-                progress_bar.progress((i + 1) / len(confrontos))
-            
             # --- RENDERIZAÇÃO ---
-            df_view_mand = pd.DataFrame(dados_tabela_mandante)
-            df_view_vis = pd.DataFrame(dados_tabela_visitante)
-            
             st.subheader(f"🏠 Análise Mandantes")
-            st.dataframe(df_view_mand, hide_index=True, use_container_width=True)
+            st.dataframe(heatmap.style_table(df_view_mand, True), hide_index=True, use_container_width=True)
             
             st.subheader(f"✈️ Análise Visitantes")
-            st.dataframe(df_view_vis, hide_index=True, use_container_width=True)
+            st.dataframe(heatmap.style_table(df_view_vis, False), hide_index=True, use_container_width=True)
 
             # --- ARTE FINAL ---
             st.markdown("---")
+            backend = "pillow" if usar_pillow else "matplotlib"
+            # A sessão guarda só o pedido (parâmetros da arte); os PNGs ficam nos caches de artes do processo.
+            # Mudou algum parâmetro, descarta o pedido.
+            chave_arte = (dados['chave'], rodada_selecionada, n_jogos, tipo_filtro, backend)
+            arte = st.session_state.get("arte")
+            if arte is not None and arte['chave'] != chave_arte:
+                arte = st.session_state["arte"] = None
+
             if st.button("GERAR ARTE FINAL"):
-                with st.spinner("Gerando PNG..."):
-                    try:
-                        # DEBUG: Mostrar tipos e formas antes da chamada
-                        print(f"DEBUG: df_view_mand shape: {df_view_mand.shape}")
-                        print(f"DEBUG: df_view_vis shape: {df_view_vis.shape}")
-                        
-                        output_path = graphic_renderer.generate_infographic(df_view_mand, df_view_vis, rodada_selecionada, n_jogos, tipo_filtro)
-                        
-                        if output_path:
-                            st.success("Arte gerada!")
-                            st.image(output_path, width='stretch')
-                            with open(output_path, "rb") as file:
-                                st.download_button("⬇️ BAIXAR PNG", file, f"Analise_R{rodada_selecionada}.png", "image/png")
-                    except NameError as e:
-                        st.error(f"❌ ERRO DE NOME (NameError): {e}")
-                        st.info("Verifique se todas as variáveis estão definidas. Veja os logs para detalhes.")
-                        print(f"ERROR: NameError in app.py: {e}")
-                    except Exception as e:
-                        st.error(f"❌ Erro ao gerar arte final: {type(e).__name__} - {e}")
-                        import traceback
-                        st.code(traceback.format_exc())
+                arte = st.session_state["arte"] = {'chave': chave_arte, 'alta': False}
+
+            if arte is not None:
+                try:
+                    graphic_renderer = startup.renderer()
+                    servico = startup.servico_render()
+                    # Cada rerun pede a arte de novo ao serviço: pronta, volta do cache; em andamento, aproveita
+                    # o mesmo pedido. Pré-visualização em baixa resolução; a de 400 DPI só se for baixada.
+                    pedidos = {'preview': servico.submit(df_view_mand, df_view_vis, rodada_selecionada, n_jogos, tipo_filtro,
+                                                         dpi=graphic_renderer.PREVIEW_DPI, backend=backend)}
+                    if arte['alta']:
+                        pedidos['final'] = servico.submit(df_view_mand, df_view_vis, rodada_selecionada, n_jogos, tipo_filtro,
+                                                          dpi=graphic_renderer.OUTPUT_DPI, backend=backend)
+                except Exception as e:
+                    st.error(f"❌ Erro ao gerar arte final: {type(e).__name__} - {e}")
+                    telemetry.erro("arte_falhou", erro=f"{type(e).__name__}: {e}")
+                else:
+                    # Enquanto houver pedido na fila, só este fragmento se repete (a página não é refeita)
+                    pendente = not all(f.done() for f in pedidos.values())
+                    st.fragment(run_every=0.5 if pendente else None)(painel_arte)(arte, pedidos, pendente, rodada_selecionada)
+
+        # --- GERAÇÃO EM LOTE ---
+        with st.expander("📦 Geração em lote (ZIP)"):
+            st.caption("Gera uma arte para cada combinação de rodada, N e filtro, em paralelo.")
+            lote_rodadas = st.multiselect("Rodadas", rodadas_disponiveis, default=[rodada_selecionada])
+            lote_ns = st.multiselect("Recortes (N)", list(range(1, data_processor.CUBO_N_MAX + 1)), default=[n_jogos])
+            lote_filtros = st.multiselect("Filtros", ["POR_MANDO", "TODOS"], default=["POR_MANDO", "TODOS"])
+            jobs = [(r, n, f) for r in lote_rodadas for n in lote_ns for f in lote_filtros]
+
+            if st.button(f"GERAR LOTE ({len(jobs)} artes)", disabled=not jobs):
+                barra = st.progress(0.0, text="Gerando artes...")
+
+                def _progresso(resultado, concluidas, total):
+                    status = "erro" if resultado['erro'] else f"{resultado['segundos']:.1f}s"
+                    barra.progress(concluidas / total, text=f"{concluidas}/{total} - {resultado['arquivo']} ({status})")
+
+                inicio = time.perf_counter()
+                graphic_renderer = startup.renderer()
+                zip_bytes, resultados = graphic_renderer.generate_batch(
+                    jobs, lambda r, n, f: data_processor.consultar_cubo(dados['cubo'], r, n, f),
+                    backend="pillow" if usar_pillow else "matplotlib", on_progress=_progresso)
+                st.success(f"{sum(1 for r in resultados if not r['erro'])} artes geradas em {time.perf_counter() - inicio:.1f}s.")
+                st.dataframe(pd.DataFrame(resultados), hide_index=True, use_container_width=True)
+                st.download_button("⬇️ BAIXAR ZIP", zip_bytes, f"Artes_{os.path.splitext(dados['nome'])[0]}.zip", "application/zip")
 else:
     st.info("Aguardando upload do CSV...")
+
+# --- PAINEL DE DESEMPENHO (última execução) ---
+if st.sidebar.checkbox("⏱️ Painel de desempenho", value=False, help="Tempo de cada etapa neste rerun e contadores do processo."):
+    with st.sidebar.expander("⏱️ Última execução", expanded=True):
+        etapas = telemetry.execucao_atual()
+        if etapas:
+            st.dataframe(pd.DataFrame(etapas).round(2), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Nenhuma etapa medida neste rerun (tudo veio do cache).")
+        resumo = telemetry.resumo()
+        if resumo['contadores']:
+            st.caption(" | ".join(f"{nome}: {valor}" for nome, valor in resumo['contadores'].items()))
+        if startup.TEMPOS:
+            st.caption(" | ".join(f"{nome}: {segundos:.2f}s" for nome, segundos in startup.TEMPOS.items()))
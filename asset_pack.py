@@ -0,0 +1,123 @@
+import io
+import os
+import json
+import mmap
+import struct
+import hashlib
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+import telemetry
+
+# Formato do pacote de imagens (um único arquivo binário):
+#   MAGIC (8 bytes) | tamanho do cabeçalho (uint32, little-endian) | cabeçalho JSON | dados
+# O cabeçalho traz a versão (hash do conteúdo) e o índice chave -> [offset, tamanho],
+# com offsets relativos ao início da área de dados. Cada item é o PNG original, sem base64.
+MAGIC = b"TCCPACK\x01"
+_TAMANHO = struct.Struct("<I")
+
+ASSET_PACK_PATH = Path(__file__).resolve().parent / "assets" / "assets.pack"
+
+def write_pack(items, destino):
+    """
+    Grava o pacote a partir de um dict chave -> bytes (PNG). Retorna a versão do pacote.
+
+    A escrita vai para um arquivo temporário e só então substitui o pacote antigo,
+    para que processos lendo o arquivo atual (via mmap) não vejam um pacote pela metade.
+    """
+    indice, offset, versao = {}, 0, hashlib.sha256()
+    for key in sorted(items):
+        dados = bytes(items[key])
+        indice[key] = [offset, len(dados)]
+        offset += len(dados)
+        versao.update(key.encode("utf-8") + b"\0" + hashlib.sha256(dados).digest())
+
+    versao = versao.hexdigest()[:16]
+    cabecalho = json.dumps({"versao": versao, "itens": indice}, ensure_ascii=False).encode("utf-8")
+
+    destino = Path(destino)
+    temporario = destino.with_name(destino.name + ".tmp")
+    with open(temporario, "wb") as f:
+        f.write(MAGIC + _TAMANHO.pack(len(cabecalho)) + cabecalho)
+        for key in sorted(items):
+            f.write(items[key])
+    os.replace(temporario, destino)
+    return versao
+
+class AssetPack(Mapping):
+    """
+    Leitura do pacote de imagens com a mesma interface do antigo dict IMAGES.
+
+    Só o cabeçalho (índice) é lido ao abrir; o arquivo fica mapeado em memória (mmap)
+    e cada imagem é lida sob demanda, quando sua chave é acessada. IMAGES[chave]
+    devolve os bytes do PNG.
+    """
+
+    def __init__(self, caminho=ASSET_PACK_PATH):
+        self.path = Path(caminho)
+        self._lock = threading.Lock()
+        self._mmap = None
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} não é um pacote de imagens válido")
+            tamanho = _TAMANHO.unpack(f.read(_TAMANHO.size))[0]
+            cabecalho = json.loads(f.read(tamanho).decode("utf-8"))
+        self.version = cabecalho["versao"]
+        self._index = {key: tuple(pos) for key, pos in cabecalho["itens"].items()}
+        self._inicio_dados = len(MAGIC) + _TAMANHO.size + tamanho
+
+    def _mapa(self):
+        # O mmap só é aberto no primeiro acesso a uma imagem
+        if self._mmap is None:
+            with self._lock:
+                if self._mmap is None:
+                    with open(self.path, "rb") as f:
+                        self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def __getitem__(self, key):
+        offset, tamanho = self._index[key]
+        inicio = self._inicio_dados + offset
+        return self._mapa()[inicio:inicio + tamanho]
+
+    def open_stream(self, key):
+        """Arquivo em memória (BytesIO) com o PNG da chave, pronto para PIL.Image.open."""
+        return io.BytesIO(self[key])
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def nbytes(self, key):
+        return self._index[key][1]
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    # Em processos filhos (pool de renderização) o pacote é reaberto pelo caminho
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, estado):
+        self.__init__(estado["path"])
+
+def open_pack(caminho=ASSET_PACK_PATH):
+    """Abre o pacote. Retorna um dict vazio se o arquivo não existir (render sem imagens)."""
+    try:
+        return AssetPack(caminho)
+    except FileNotFoundError:
+        telemetry.aviso("pacote_imagens_ausente", arquivo=str(caminho), dica="gere com: python gen_asset_pack.py")
+        return {}
+
+def pack_version(pack):
+    """Versão (hash do conteúdo) do pacote, ou 'vazio' se não houver pacote."""
+    return getattr(pack, "version", "vazio")
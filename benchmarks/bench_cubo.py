@@ -0,0 +1,68 @@
+"""
+Benchmark: construção do cubo de métricas x cálculo sob demanda.
+
+Uso:
+    python benchmarks/bench_cubo.py [--temporadas 3] [--amostras 20]
+
+O cálculo sob demanda com calcular_metricas é medido em uma amostra de
+(rodada, N, filtro) e extrapolado para cobrir o cubo inteiro.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import data_processor
+from benchmarks.sintetico import gerar_temporadas
+
+def metricas_sob_demanda(df, indice, rodada, n_jogos, filtro):
+    """Reproduz o laço antigo do app.py: 4 chamadas de calcular_metricas por confronto (também usado pela suite)."""
+    for confronto in data_processor.get_confrontos_rodada(df, rodada):
+        for time_, em_casa in ((confronto['Mandante'], True), (confronto['Visitante'], False)) * 2:
+            data_processor.calcular_metricas(df, time_, confronto['Data_Jogo'], n_jogos, filtro, em_casa, indice=indice)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--temporadas", type=int, default=3)
+    parser.add_argument("--amostras", type=int, default=20, help="combinações (rodada, N, filtro) medidas sob demanda")
+    args = parser.parse_args()
+
+    df = gerar_temporadas(args.temporadas)
+    rodadas = sorted(df['Rodada'].unique().tolist())
+    combinacoes = len(rodadas) * data_processor.CUBO_N_MAX * len(data_processor.FILTROS_MANDO)
+    print(f"Jogos: {len(df)} | Combinações (rodada x N x filtro): {combinacoes}")
+
+    t0 = time.perf_counter()
+    indice = data_processor.construir_indice_times(df)
+    cubo = data_processor.construir_cubo(df, indice)
+    t_cubo = time.perf_counter() - t0
+    print(f"Cubo: {len(cubo)} linhas em {t_cubo:.3f}s")
+
+    rng = np.random.default_rng(0)
+    amostra = [(int(rng.choice(rodadas)), int(rng.integers(1, data_processor.CUBO_N_MAX + 1)),
+                data_processor.FILTROS_MANDO[int(rng.integers(0, 2))]) for _ in range(args.amostras)]
+
+    t0 = time.perf_counter()
+    for rodada, n_jogos, filtro in amostra:
+        metricas_sob_demanda(df, indice, rodada, n_jogos, filtro)
+    t_calc = (time.perf_counter() - t0) / len(amostra)
+
+    t0 = time.perf_counter()
+    for rodada, n_jogos, filtro in amostra:
+        data_processor.montar_tabelas_rodada(df, rodada, n_jogos, filtro, indice=indice)
+    t_lote = (time.perf_counter() - t0) / len(amostra)
+
+    t0 = time.perf_counter()
+    for rodada, n_jogos, filtro in amostra:
+        data_processor.consultar_cubo(cubo, rodada, n_jogos, filtro)
+    t_cons = (time.perf_counter() - t0) / len(amostra)
+
+    print(f"calcular_metricas (4x por confronto): {t_calc * 1000:8.2f} ms/rodada | cubo inteiro ~ {t_calc * combinacoes:.1f}s")
+    print(f"montar_tabelas_rodada:               {t_lote * 1000:8.2f} ms/rodada | cubo inteiro ~ {t_lote * combinacoes:.1f}s")
+    print(f"consultar_cubo:                      {t_cons * 1000:8.2f} ms/rodada")
+
+if __name__ == "__main__":
+    main()
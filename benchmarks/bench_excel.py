@@ -0,0 +1,62 @@
+"""
+Benchmark: leitura de planilhas Excel (read_excel da pasta inteira x leitor rápido).
+
+Uso:
+    python benchmarks/bench_excel.py [--abas 4] [--temporadas 3] [--colunas-extras 20] [--rodape 200]
+
+Gera uma pasta .xlsx com uma aba por liga (colunas de anotações à direita e
+rodapé no fim) e mede:
+    antigo   pd.read_excel(header=None) da primeira aba, todas as colunas (engine padrão)
+    aba      load_and_clean_data de uma pasta só com a primeira aba
+    pasta    load_and_clean_data da pasta inteira (todas as abas, em paralelo se couber)
+Confere que a primeira aba sai idêntica pelos dois caminhos.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import data_processor
+from benchmarks.sintetico import gerar_ligas, escrever_pasta_excel
+
+def _medir(func):
+    t0 = time.perf_counter()
+    resultado = func()
+    return time.perf_counter() - t0, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abas", type=int, default=4)
+    parser.add_argument("--temporadas", type=int, default=3)
+    parser.add_argument("--colunas-extras", type=int, default=20)
+    parser.add_argument("--rodape", type=int, default=200, help="linhas de anotações depois dos jogos")
+    args = parser.parse_args()
+
+    ligas = gerar_ligas(args.abas, args.temporadas, 20)
+    with tempfile.TemporaryDirectory() as tmp:
+        extras = dict(colunas_extras=args.colunas_extras, linhas_rodape=args.rodape)
+        uma = escrever_pasta_excel(dict(list(ligas.items())[:1]), Path(tmp) / "uma_aba.xlsx", **extras)
+        pasta = escrever_pasta_excel(ligas, Path(tmp) / "pasta.xlsx", **extras)
+        print(f"Abas: {args.abas} | Jogos por aba: {len(next(iter(ligas.values())))} | "
+              f"Motor: {data_processor._motor_excel('x.xlsx') or 'padrao'}")
+
+        t_antigo, _ = _medir(lambda: pd.read_excel(uma, header=None))
+        t_aba, df_aba = _medir(lambda: data_processor.load_and_clean_data(str(uma)))
+        t_pasta, df_pasta = _medir(lambda: data_processor.load_and_clean_data(str(pasta)))
+
+    for nome, df in (("aba", df_aba), ("pasta", df_pasta)):
+        if isinstance(df, str):
+            raise RuntimeError(f"{nome}: {df}")
+    primeira = df_pasta[df_pasta['Liga'] == next(iter(ligas))].drop(columns=['Liga', 'Temporada'])
+    pd.testing.assert_frame_equal(df_aba.reset_index(drop=True), primeira.reset_index(drop=True))
+
+    print(f"antigo (read_excel, 1 aba):     {t_antigo:7.3f}s")
+    print(f"load_and_clean_data (1 aba):    {t_aba:7.3f}s  ({t_antigo / t_aba:.1f}x)")
+    print(f"load_and_clean_data ({args.abas} abas):   {t_pasta:7.3f}s  ({len(df_pasta)} jogos)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: tempo de importação a frio (partida do app).
+
+Uso:
+    python benchmarks/bench_import.py [--repeticoes 5] [--limite 1.5]
+
+Cada medição roda num interpretador novo (sem cache de módulos). Mede o caminho
+até a tela de PIN e as tabelas (sem o renderizador) e o graphic_renderer à parte,
+e confere que o caminho do login não carrega matplotlib/PIL. Com --limite, sai
+com erro se o caminho do login passar desse tempo (mediana, em segundos).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Módulos que o app.py importa antes do login (streamlit entra se estiver instalado)
+CAMINHO_LOGIN = ["pandas", "data_processor", "heatmap", "startup", "telemetry", "cache"]
+PESADOS = ["matplotlib", "PIL", "graphic_renderer"]
+
+_SCRIPT = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+for nome in {modulos!r}:
+    importlib.import_module(nome)
+print(json.dumps({{"segundos": time.perf_counter() - t0, "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+def medir(modulos, repeticoes):
+    """Importa os módulos em interpretadores novos. Returns: (lista de tempos, módulos pesados carregados)."""
+    tempos, pesados = [], set()
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", _SCRIPT.format(modulos=modulos, pesados=PESADOS)],
+                               cwd=RAIZ, capture_output=True, text=True, check=True)
+        resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+        tempos.append(resultado["segundos"])
+        pesados.update(resultado["pesados"])
+    return tempos, sorted(pesados)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=None, help="tempo máximo (s) do caminho do login")
+    args = parser.parse_args()
+
+    login = list(CAMINHO_LOGIN)
+    try:
+        import streamlit # noqa: F401
+        login.insert(0, "streamlit")
+    except ImportError:
+        print("(streamlit não instalado: medindo sem ele)")
+
+    t_login, pesados = medir(login, args.repeticoes)
+    t_render, _ = medir(["graphic_renderer"], args.repeticoes)
+
+    print(f"Até o login ({', '.join(login)}): mediana {statistics.median(t_login):.3f}s | mín {min(t_login):.3f}s")
+    print(f"graphic_renderer (em segundo plano): mediana {statistics.median(t_render):.3f}s | mín {min(t_render):.3f}s")
+
+    erros = []
+    if pesados:
+        erros.append(f"o caminho do login carregou {', '.join(pesados)}")
+    if args.limite is not None and statistics.median(t_login) > args.limite:
+        erros.append(f"caminho do login acima do limite de {args.limite:.2f}s")
+    for erro in erros:
+        print(f"FALHA: {erro}")
+    sys.exit(1 if erros else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: conversão de xG e Placar no carregador (apply por linha x vetorizado).
+
+Uso:
+    python benchmarks/bench_loader.py [--linhas 100000]
+
+Gera uma planilha sintética no layout real, mede a versão antiga (apply com
+clean_float / split_placar + pd.Series por linha) contra a vetorizada e confere
+que os resultados são idênticos.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import data_processor
+from benchmarks.sintetico import gerar_temporadas, escrever_planilha
+
+# --- VERSÃO ANTIGA (referência) ---
+def clean_float(val):
+    try:
+        if pd.isna(val) or val == '': return np.nan
+        if isinstance(val, str):
+            s = val.replace(',', '.').strip()
+            return float(s) if s else np.nan
+        return float(val)
+    except:
+        return np.nan
+
+def split_placar(placar_str):
+    try:
+        if not isinstance(placar_str, str): return np.nan, np.nan
+        if not any(sep in placar_str for sep in ['-', '–']): return np.nan, np.nan
+        p = placar_str.replace('–', '-').replace(' ', '')
+        parts = p.split('-')
+        if len(parts) == 2:
+            return int(parts[0]), int(parts[1])
+        return np.nan, np.nan
+    except:
+        return np.nan, np.nan
+
+def _antigo(bruto):
+    xg_casa = bruto[5].apply(clean_float)
+    xg_vis = bruto[7].apply(clean_float)
+    gols = bruto[6].apply(lambda x: pd.Series(split_placar(x)))
+    return xg_casa, xg_vis, gols[0].astype(float), gols[1].astype(float)
+
+def _novo(bruto):
+    gols_casa, gols_vis = data_processor._separar_placar(bruto[6])
+    return data_processor._converter_decimal(bruto[5]), data_processor._converter_decimal(bruto[7]), gols_casa, gols_vis
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Liga de 40 times (1560 jogos por temporada) para caber no intervalo de datas do pandas
+    temporadas = -(-args.linhas // 1560)
+    df = gerar_temporadas(temporadas, n_times=40)
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = escrever_planilha(df, Path(tmp) / "sintetica.csv")
+        bruto = pd.read_csv(caminho, sep=';', header=None, encoding='latin1', skiprows=2, dtype=object)
+        print(f"Linhas: {len(bruto)}")
+
+        t0 = time.perf_counter()
+        antigo = _antigo(bruto)
+        t_antigo = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        novo = _novo(bruto)
+        t_novo = time.perf_counter() - t0
+
+        for a, b in zip(antigo, novo):
+            np.testing.assert_array_equal(a.to_numpy(), b.to_numpy())
+
+        t0 = time.perf_counter()
+        data_processor.load_and_clean_data(str(caminho))
+        t_total = time.perf_counter() - t0
+
+    print(f"xG + Placar (apply):      {t_antigo:8.3f}s")
+    print(f"xG + Placar (vetorizado): {t_novo:8.3f}s  ({t_antigo / t_novo:.0f}x)")
+    print(f"load_and_clean_data total: {t_total:7.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: serviço de renderização com vários usuários simultâneos.
+
+Uso:
+    python benchmarks/bench_servico.py [--usuarios 8] [--artes 6] [--dpi 100] [--backend pillow]
+
+Cada "usuário" é uma thread que pede as mesmas --artes artes (como várias sessões
+clicando em GERAR ARTE FINAL na mesma rodada). Compara:
+    sequencial  render_png na thread de cada usuário, um de cada vez (sem cache)
+    servico     render_service: fila em processos + pedidos repetidos coalescidos
+O cache de artes em disco vai para um diretório temporário.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=8)
+    parser.add_argument("--artes", type=int, default=6, help="artes diferentes pedidas por cada usuário")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--backend", default="pillow")
+    args = parser.parse_args()
+
+    os.environ["CACHE_ARTES_DIR"] = tempfile.mkdtemp(prefix="bench_servico_")
+    import data_processor
+    import graphic_renderer
+    import render_service
+    from benchmarks.sintetico import gerar_temporadas
+
+    df = gerar_temporadas(1, 20)
+    cubo = data_processor.construir_cubo(df)
+    rodadas = sorted(df['Rodada'].unique().tolist())[-args.artes:]
+    pedidos = [(r, *data_processor.consultar_cubo(cubo, r, 5, 'TODOS')) for r in rodadas]
+
+    def _sequencial(_):
+        for r, m, v in pedidos:
+            graphic_renderer.render_png(m, v, r, 5, 'TODOS', dpi=args.dpi, backend=args.backend, use_cache=False)
+
+    servico = render_service.servico()
+    servico.aquecer()
+    # Primeira arte de cada processo (importação e escudos) fica de fora da medição
+    r, m, v = pedidos[0]
+    servico.submit(m, v, r, 5, 'TODOS', dpi=args.dpi + 1, backend=args.backend).result()
+
+    def _servico(_):
+        futuros = [servico.submit(m, v, r, 5, 'TODOS', dpi=args.dpi, backend=args.backend) for r, m, v in pedidos]
+        for futuro in futuros:
+            futuro.result()
+
+    for nome, func in (("sequencial", _sequencial), ("servico", _servico)):
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.usuarios) as usuarios:
+            list(usuarios.map(func, range(args.usuarios)))
+        segundos = time.perf_counter() - t0
+        total = args.usuarios * len(pedidos)
+        print(f"{nome:<11} {segundos:7.2f}s | {total / segundos:7.1f} artes entregues/s")
+    print(f"Serviço: {servico.stats()}")
+    graphic_renderer.shutdown_render_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Gerador de dados sintéticos para os benchmarks.
+
+Produz temporadas no mesmo formato do DataFrame devolvido por
+data_processor.load_and_clean_data (turno e returno, jogos futuros sem placar),
+de uma liga até dezenas de ligas, e grava as planilhas no layout bruto que o
+carregador espera (lixo no topo, ';' ou ',', decimais 'x,yz', placar com '–').
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Nomes reais primeiro; ligas maiores completam com "Clube NN".
+# (Evite "Time"/"Casa"/"Mandante" nos nomes: o carregador descarta essas linhas como cabeçalho.)
+NOMES_TIMES = ['Palmeiras', 'Flamengo', 'Botafogo', 'São Paulo', 'Grêmio', 'Fluminense', 'Internacional',
+               'Atlético Mineiro', 'Corinthians', 'Bahia', 'Cruzeiro', 'Vasco da Gama', 'Vitória', 'Santos',
+               'RB Bragantino', 'Mirassol', 'Coritiba', 'Chapecoense', 'Remo', 'Athletico Paranaense']
+
+def nomes_times(n_times, liga=0):
+    """Liga 0 usa os nomes reais; as demais, "Clube LL-NN" (não colidem entre ligas)."""
+    if liga:
+        return [f"Clube {liga:02d}-{i:02d}" for i in range(n_times)]
+    return NOMES_TIMES[:n_times] + [f"Clube {i:02d}" for i in range(len(NOMES_TIMES), n_times)]
+
+def gerar_temporadas(n_temporadas=1, n_times=20, seed=0, frac_futuros=0.05, inicio="2020-01-01", liga=0):
+    """
+    Gera o DataFrame limpo de n_temporadas com n_times (todos contra todos, ida e volta).
+
+    Returns:
+        DataFrame com Rodada, Data, Mandante, xG_Casa, Placar, xG_Visitante, Visitante,
+        Gols_Casa, Gols_Visitante, ordenado por Data e Rodada.
+    """
+    rng = np.random.default_rng(seed)
+    times = nomes_times(n_times, liga)
+    data_base = pd.Timestamp(inicio)
+    linhas = []
+
+    for temporada in range(n_temporadas):
+        for rodada in range(1, 2 * (n_times - 1) + 1):
+            ordem = rng.permutation(n_times)
+            for k in range(n_times // 2):
+                mandante, visitante = times[ordem[2 * k]], times[ordem[2 * k + 1]]
+                data = data_base + pd.Timedelta(days=int(temporada * 365 + rodada * 7 + rng.integers(0, 4)),
+                                                hours=int(rng.integers(11, 22)))
+                xg_casa, xg_vis = round(rng.gamma(2, 0.7), 2), round(rng.gamma(2, 0.55), 2)
+                if rng.random() < frac_futuros:
+                    gols_casa = gols_vis = np.nan
+                    placar = "x"
+                else:
+                    gols_casa, gols_vis = float(rng.poisson(1.4)), float(rng.poisson(1.1))
+                    placar = f"{int(gols_casa)}–{int(gols_vis)}"
+                linhas.append((rodada, data, mandante, xg_casa, placar, xg_vis, visitante, gols_casa, gols_vis))
+
+    df = pd.DataFrame(linhas, columns=['Rodada', 'Data', 'Mandante', 'xG_Casa', 'Placar', 'xG_Visitante',
+                                       'Visitante', 'Gols_Casa', 'Gols_Visitante'])
+    return df.sort_values(by=['Data', 'Rodada']).reset_index(drop=True)
+
+def gerar_ligas(n_ligas=1, n_temporadas=1, n_times=20, seed=0, frac_futuros=0.05):
+    """
+    Gera n_ligas independentes (times diferentes em cada uma).
+
+    Returns:
+        dict nome da liga ("LIGA_01", ...) -> DataFrame de gerar_temporadas.
+    """
+    return {f"LIGA_{liga + 1:02d}": gerar_temporadas(n_temporadas, n_times, seed=seed + liga,
+                                                      frac_futuros=frac_futuros, liga=liga)
+            for liga in range(n_ligas)}
+
+# Variações de formato das planilhas reais: (separador, encoding, linhas de lixo no topo)
+FORMATOS = [(';', 'latin1', 1), (',', 'utf-8', 3), (';', 'utf-8-sig', 0), (',', 'latin1', 5)]
+
+def escrever_ligas(ligas, diretorio):
+    """
+    Grava uma planilha CSV por liga, alternando entre os FORMATOS (separador, encoding, lixo).
+
+    Returns:
+        dict nome da liga -> caminho do arquivo.
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    caminhos = {}
+    for i, (nome, df) in enumerate(ligas.items()):
+        sep, encoding, lixo = FORMATOS[i % len(FORMATOS)]
+        caminhos[nome] = escrever_planilha(df, diretorio / f"{nome}.csv", sep=sep, encoding=encoding, lixo=lixo)
+    return caminhos
+
+def escrever_planilha(df, destino, sep=';', encoding='latin1', lixo=1):
+    """
+    Grava o DataFrame no layout bruto da planilha de preenchimento (o que load_and_clean_data lê).
+
+    Layout: linha de título "Head-to-Head", linha de cabeçalho com "Rodada", 9 colunas
+    (Rodada, Dia, Data, Hora, Casa, xG, Placar, xG, Visitante), xG no formato 'x,yz',
+    jogos futuros com placar vazio e uma linha de rodapé no final.
+
+    Args:
+        sep: ';' ou ',' (com ',' os decimais 'x,yz' vão entre aspas, como no Excel)
+        lixo: Linhas no topo antes do cabeçalho (título e anotações; até 8, o carregador
+            procura "Rodada" nas 10 primeiras linhas)
+    """
+    # '–' não existe em latin1: nesse caso o placar usa o hífen comum
+    traco = '–' if encoding.lower().replace('-', '') in ('utf8', 'utf8sig') else '-'
+    placar = df['Placar'].astype(str).str.replace('–', traco, regex=False)
+    placar = placar.where(df['Gols_Casa'].notna(), '')
+
+    def _decimal(serie):
+        return serie.map(lambda v: '' if pd.isna(v) else f"{v:.2f}".replace('.', ','))
+
+    bruto = pd.DataFrame({
+        'Rodada': df['Rodada'],
+        'Dia': df['Data'].dt.strftime('%a'),
+        'Data': df['Data'].dt.strftime('%Y-%m-%d'),
+        'Hora': df['Data'].dt.strftime('%H:%M'),
+        'Casa': df['Mandante'],
+        'xG_Casa': _decimal(df['xG_Casa']),
+        'Placar': placar,
+        'xG_Vis': _decimal(df['xG_Visitante']),
+        'Visitante': df['Visitante'],
+    })
+
+    vazio = sep * 8
+    with open(destino, 'w', encoding=encoding, newline='') as f:
+        if lixo:
+            f.write(f"Head-to-Head{vazio}\n")
+        for i in range(1, lixo):
+            f.write(f"Atualizado em {i:02d}/01{sep}{sep}preencher xG manualmente{sep * 6}\n")
+        f.write(sep.join(['Rodada', 'Dia', 'Data', 'Hora', 'Casa', 'xG', 'Placar', 'xG', 'Visitante']) + "\n")
+        bruto.to_csv(f, sep=sep, header=False, index=False)
+        f.write(f"Fonte: planilha sintética{vazio}\n")
+    return destino
+
+def escrever_pasta_excel(abas, destino, lixo=1, colunas_extras=0, linhas_rodape=0):
+    """
+    Grava uma pasta de trabalho .xlsx com uma aba por item de abas (nome -> DataFrame de
+    gerar_temporadas), no layout da planilha de preenchimento: Data como data, xG como número.
+
+    Args:
+        lixo: Linhas no topo antes do cabeçalho
+        colunas_extras: Colunas de anotações à direita das 9 usadas (o carregador não as lê)
+        linhas_rodape: Linhas de anotações depois dos jogos (somente colunas de texto, sem times)
+    """
+    from openpyxl import Workbook
+    pasta = Workbook(write_only=True)
+    extras = [f"nota {j}" for j in range(colunas_extras)]
+    for nome, df in abas.items():
+        planilha = pasta.create_sheet(nome[:31])
+        if lixo:
+            planilha.append(["Head-to-Head"])
+        for i in range(1, lixo):
+            planilha.append([f"Atualizado em {i:02d}/01", None, "preencher xG manualmente"])
+        planilha.append(['Rodada', 'Dia', 'Data', 'Hora', 'Casa', 'xG', 'Placar', 'xG', 'Visitante'] + extras)
+        for jogo in df.itertuples(index=False):
+            data = jogo.Data.to_pydatetime()
+            placar = jogo.Placar if pd.notna(jogo.Gols_Casa) else None
+            planilha.append([int(jogo.Rodada), data.strftime('%a'), data, data.strftime('%H:%M'), jogo.Mandante,
+                             None if pd.isna(jogo.xG_Casa) else round(float(jogo.xG_Casa), 2), placar,
+                             None if pd.isna(jogo.xG_Visitante) else round(float(jogo.xG_Visitante), 2),
+                             jogo.Visitante] + extras)
+        for i in range(linhas_rodape):
+            planilha.append([f"Fonte: planilha sintética ({i})"])
+    pasta.save(destino)
+    return destino
@@ -0,0 +1,169 @@
+"""
+Suíte de benchmarks do pipeline completo sobre planilhas sintéticas.
+
+Uso:
+    python benchmarks/suite.py [--ligas 1] [--temporadas 1] [--times 20] [--amostras 10]
+                               [--dpi 100] [--backends matplotlib pillow] [--sem-arte]
+                               [--comparar ARQUIVO.json]
+
+Etapas medidas (mediana e mínimo de cada uma):
+    carregar        load_and_clean_data de cada planilha (CSV no layout real)
+    indice          construir_indice_times
+    metricas        calcular_metricas para os 4 lados de cada confronto de uma rodada
+    rodada          montar_tabelas_rodada
+    cubo            construir_cubo
+    arte_<backend>  generate_infographic (sem cache de artes)
+
+O resultado vai para dados/benchmarks/<data>.json e é comparado com a execução
+anterior com os mesmos parâmetros (ou com --comparar).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+import data_processor
+from benchmarks.sintetico import gerar_ligas, escrever_ligas
+from benchmarks.bench_cubo import metricas_sob_demanda
+
+RESULTADOS_DIR = RAIZ / "dados" / "benchmarks"
+
+def _medir(func, repeticoes=1):
+    """Executa func repeticoes vezes. Returns: (tempos em segundos, último resultado)."""
+    tempos, resultado = [], None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - t0)
+    return tempos, resultado
+
+def _resumo(tempos):
+    return {'mediana': statistics.median(tempos), 'min': min(tempos), 'n': len(tempos)}
+
+def _versao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(args):
+    etapas = {}
+    ligas = gerar_ligas(args.ligas, args.temporadas, args.times, seed=args.seed)
+    jogos = sum(len(df) for df in ligas.values())
+    print(f"Ligas: {args.ligas} | Temporadas: {args.temporadas} | Times: {args.times} | Jogos: {jogos}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminhos = escrever_ligas(ligas, tmp)
+        tempos, carregados = [], {}
+        for nome, caminho in caminhos.items():
+            t, df = _medir(lambda: data_processor.load_and_clean_data(str(caminho)))
+            if isinstance(df, str):
+                raise RuntimeError(f"{nome}: {df}")
+            tempos += t
+            carregados[nome] = df
+        etapas['carregar'] = _resumo(tempos)
+
+    rng = np.random.default_rng(args.seed)
+    tempos = {'indice': [], 'metricas': [], 'rodada': [], 'cubo': []}
+    for df in carregados.values():
+        t, indice = _medir(lambda: data_processor.construir_indice_times(df))
+        tempos['indice'] += t
+        rodadas = sorted(df['Rodada'].unique().tolist())
+        amostra = [(int(rng.choice(rodadas)), int(rng.integers(1, data_processor.CUBO_N_MAX + 1)),
+                    data_processor.FILTROS_MANDO[int(rng.integers(0, 2))]) for _ in range(args.amostras)]
+        for rodada, n_jogos, filtro in amostra:
+            tempos['metricas'] += _medir(lambda: metricas_sob_demanda(df, indice, rodada, n_jogos, filtro))[0]
+            tempos['rodada'] += _medir(lambda: data_processor.montar_tabelas_rodada(df, rodada, n_jogos, filtro, indice=indice))[0]
+        tempos['cubo'] += _medir(lambda: data_processor.construir_cubo(df, indice))[0]
+    etapas.update({etapa: _resumo(t) for etapa, t in tempos.items()})
+
+    if not args.sem_arte:
+        import graphic_renderer
+        df = next(iter(carregados.values()))
+        rodada = int(df['Rodada'].max())
+        df_m, df_v = data_processor.montar_tabelas_rodada(df, rodada, 5, 'POR_MANDO')
+        for backend in args.backends:
+            # A primeira arte de cada backend monta figura/camada fixa: fica de fora da mediana
+            t_frio, _ = _medir(lambda: graphic_renderer.generate_infographic(df_m, df_v, rodada, 5, 'POR_MANDO', backend=backend,
+                                                                              out=io.BytesIO(), dpi=args.dpi))
+            t, _ = _medir(lambda: graphic_renderer.generate_infographic(df_m, df_v, rodada, 5, 'POR_MANDO', backend=backend,
+                                                                         out=io.BytesIO(), dpi=args.dpi), args.repeticoes_arte)
+            etapas[f'arte_{backend}'] = {**_resumo(t), 'primeira': t_frio[0]}
+
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'git': _versao_git(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parametros': {'ligas': args.ligas, 'temporadas': args.temporadas, 'times': args.times,
+                       'amostras': args.amostras, 'dpi': args.dpi, 'seed': args.seed},
+        'jogos': jogos,
+        'etapas': etapas,
+    }
+
+def _anterior(parametros):
+    """Resultado mais recente salvo com os mesmos parâmetros."""
+    for caminho in sorted(RESULTADOS_DIR.glob("*.json"), reverse=True):
+        try:
+            salvo = json.loads(caminho.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if salvo.get('parametros') == parametros:
+            return caminho, salvo
+    return None, None
+
+def imprimir(resultado, referencia=None):
+    anteriores = (referencia or {}).get('etapas', {})
+    for etapa, r in resultado['etapas'].items():
+        linha = f"{etapa:<18} mediana {r['mediana'] * 1000:10.2f} ms | mín {r['min'] * 1000:10.2f} ms | n={r['n']}"
+        if etapa in anteriores:
+            linha += f" | {r['mediana'] / anteriores[etapa]['mediana']:5.2f}x o anterior"
+        print(linha)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ligas", type=int, default=1)
+    parser.add_argument("--temporadas", type=int, default=1)
+    parser.add_argument("--times", type=int, default=20)
+    parser.add_argument("--amostras", type=int, default=10, help="combinações (rodada, N, filtro) por liga")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", default=["matplotlib", "pillow"])
+    parser.add_argument("--repeticoes-arte", type=int, default=3)
+    parser.add_argument("--sem-arte", action="store_true", help="não mede a geração da arte")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--comparar", help="resultado (.json) usado como referência")
+    parser.add_argument("--nao-salvar", action="store_true")
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    if args.comparar:
+        ref_caminho = Path(args.comparar)
+        referencia = json.loads(ref_caminho.read_text(encoding="utf-8"))
+    else:
+        ref_caminho, referencia = _anterior(resultado['parametros'])
+    if referencia:
+        print(f"Comparando com {ref_caminho} (git {referencia.get('git')})")
+    imprimir(resultado, referencia)
+
+    if not args.nao_salvar:
+        RESULTADOS_DIR.mkdir(parents=True, exist_ok=True)
+        destino = RESULTADOS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+        destino.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultado salvo em {destino}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import telemetry
+
+def estimate_size(obj):
+    """Estimativa (em bytes) da memória ocupada por DataFrames, arrays, bytes e dicts/listas deles."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(uso, pd.Series) else uso)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(v) for v in obj)
+    return sys.getsizeof(obj)
+
+# --- LIMITE DE MEMÓRIA DO PROCESSO ---
+# Todo LRUCache se registra aqui. Além do limite de cada cache, a soma de todos é limitada por
+# CACHE_TOTAL_MB (0 = sem limite global): passando dele, o maior cache descarta seus itens
+# menos usados até a soma voltar ao limite.
+_CACHES = weakref.WeakSet()
+_LIMITE_LOCK = threading.Lock()
+LIMITE_TOTAL_BYTES = int(os.environ.get("CACHE_TOTAL_MB", "1024")) * 1024 ** 2 or None
+
+def caches_do_processo():
+    """Estatísticas de todos os LRUCache vivos no processo, do que mais ocupa memória ao que menos ocupa."""
+    return sorted((c.stats() for c in list(_CACHES)), key=lambda s: -s['bytes'])
+
+def memoria_caches():
+    """Bytes somados de todos os LRUCache do processo."""
+    return sum(c.nbytes for c in list(_CACHES))
+
+def _aplicar_limite_total():
+    if LIMITE_TOTAL_BYTES is None:
+        return
+    # Chamado fora do lock de qualquer cache: aqui cada cache é travado um de cada vez
+    with _LIMITE_LOCK:
+        caches = list(_CACHES)
+        excesso = sum(c.nbytes for c in caches) - LIMITE_TOTAL_BYTES
+        while excesso > 0:
+            liberado = max(caches, key=lambda c: c.nbytes)._descartar_mais_antigo()
+            if not liberado:
+                break
+            excesso -= liberado
+
+class LRUCache:
+    """
+    Cache LRU thread-safe, limitado por quantidade de itens e/ou bytes.
+
+    Vive no nível do processo: todas as sessões do Streamlit (e todos os reruns)
+    enxergam o mesmo cache. Mantém contadores de hits, misses e evictions.
+    Também entra no limite de memória somado de todos os caches (CACHE_TOTAL_MB).
+    """
+
+    def __init__(self, max_items=None, max_bytes=None, name="cache"):
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data = OrderedDict() # chave -> (valor, tamanho)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0 # Itens maiores que max_bytes (não guardados)
+        _CACHES.add(self)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """Como get(), mas sem contar hit/miss nem mudar a ordem LRU (consultas de controle)."""
+        with self._lock:
+            if key in self._data:
+                return self._data[key][0]
+            return default
+
+    def put(self, key, value, size=None):
+        """Guarda o valor e descarta os menos usados até caber nos limites."""
+        size = estimate_size(value) if size is None else int(size)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            # Um item maior que o limite inteiro não é guardado (e seria recriado a cada pedido)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self.rejected += 1
+                telemetry.contar(f"cache_rejeitados_{self.name}")
+                telemetry.aviso("cache_item_grande", cache=self.name, bytes=size, max_bytes=self.max_bytes)
+                return value
+            self._data[key] = (value, size)
+            self._bytes += size
+            self._evict()
+        _aplicar_limite_total()
+        return value
+
+    def get_or_create(self, key, factory, size=None):
+        """
+        Retorna o valor em cache ou o cria com factory().
+
+        Chamadas simultâneas para a mesma chave esperam a primeira terminar
+        (o trabalho não é duplicado). Se factory() levantar exceção, nada é guardado.
+        """
+        with self._lock:
+            if key in self._data:
+                return self.get(key)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._data:
+                    return self.get(key)
+                self.misses += 1
+            try:
+                value = factory()
+                self.put(key, value, size=size(value) if callable(size) else size)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                value, size = self._data.pop(key)
+                self._bytes -= size
+                return value
+            return default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        while self._data and (
+            (self.max_items is not None and len(self._data) > self.max_items)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def _descartar_mais_antigo(self):
+        """Descarta o item menos usado (limite total do processo). Retorna os bytes liberados."""
+        with self._lock:
+            if not self._data:
+                return 0
+            _, (_, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            return size
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'items': len(self._data),
+                'bytes': self._bytes,
+                'max_items': self.max_items,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejected': self.rejected,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+class DiskCache:
+    """
+    Cache em disco de bytes (um arquivo por chave), limitado em bytes.
+
+    Pode ser compartilhado por vários processos (ex.: pool de renderização): as escritas
+    são atômicas (arquivo temporário + os.replace) e a leitura atualiza o mtime do arquivo,
+    que serve de ordem LRU para descartar os menos usados quando o limite é ultrapassado.
+    """
+
+    def __init__(self, directory, max_bytes, name="disco"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.name = name
+        self._lock = threading.Lock()
+        self._bytes = None # Calculado na primeira escrita
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return self.directory / f"{key}.bin"
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path) # Marca como usado recentemente
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Grava os bytes (se couberem no limite) e descarta os arquivos menos usados até caber."""
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return data
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        try:
+            anterior = path.stat().st_size # Chave regravada: o arquivo antigo sai da conta
+        except OSError:
+            anterior = 0
+        os.replace(tmp, path)
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._bytes += len(data) - anterior
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._evict()
+        return data
+
+    def _scan(self):
+        """(caminho, tamanho, mtime) dos arquivos do cache. Outros processos podem apagar no meio."""
+        arquivos = []
+        for path in self.directory.glob("*.bin"):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            arquivos.append((path, info.st_size, info.st_mtime_ns))
+        return arquivos
+
+    def _evict(self):
+        # Recontagem real (outros processos também escrevem no diretório), do mais antigo ao mais novo
+        arquivos = sorted(self._scan(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in arquivos)
+        for path, size, _ in arquivos:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self.evictions += 1
+            except OSError:
+                pass
+            total -= size
+        self._bytes = total
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._scan():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
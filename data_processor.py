@@ -1,10 +1,275 @@
+import os
+import io
+import re
+import sys
+import csv
+import codecs
+import hashlib
+import weakref
+import json
+import logging
+import importlib.util
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from pathlib import Path
+
+from cache import LRUCache, estimate_size
+import telemetry
+from team_registry import REGISTRY
+
+# Dependência opcional: armazenamento colunar (Parquet) do dataset limpo
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Dependência opcional: leitor rápido de Excel (pip install python-calamine), usado pelo pandas
+# como engine "calamine". Só é procurado aqui (não importado) para não pesar na partida do app.
+EXCEL_RAPIDO = importlib.util.find_spec("python_calamine") is not None
 
 # --- CONFIGURAÇÕES ---
 CSV_PATH = r"d:\cartoon brasil\TCC\GERAÇÃO XG XGA\PLANILHA PREENCHIMENTO DE XG E XGA.csv"
+# Dataset colunar (Parquet particionado por Liga/Temporada) gerado a partir das planilhas
+DATASET_PATH = Path(__file__).resolve().parent / "dados" / "partidas"
+
+# Versão do carregador: incrementar sempre que load_and_clean_data mudar o resultado,
+# para invalidar as planilhas já processadas no cache.
+LOADER_VERSION = 6
+
+# Placar "x-y" ou "x–y" (após remover espaços). Qualquer outro formato = jogo sem placar (NaN).
+_REGEX_PLACAR = r'^\s*([0-9]+)\s*[-–]\s*([0-9]+)\s*$'
+
+def _converter_decimal(serie):
+    """Converte uma coluna de xG ('1,25', '1.25', 1.25, vazio) para float. Inválidos viram NaN."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    texto = serie.astype(str).str.replace(',', '.', regex=False).str.strip()
+    return pd.to_numeric(texto, errors='coerce').astype(float)
+
+def _separar_placar(serie):
+    """Separa a coluna Placar em (Gols_Casa, Gols_Visitante) como float. Sem placar -> NaN."""
+    # Apenas textos são placares: o acessor .str devolve NaN para datas/números que o Excel converteu
+    try:
+        texto = serie.str.replace(' ', '', regex=False)
+    except AttributeError: # Coluna sem nenhum texto (ex.: rodada toda sem placar)
+        vazio = pd.Series(np.nan, index=serie.index)
+        return vazio, vazio.copy()
+    gols = texto.str.extract(_REGEX_PLACAR)
+    return pd.to_numeric(gols[0]).astype(float), pd.to_numeric(gols[1]).astype(float)
+
+# Posições das colunas usadas na planilha (Rodada, Data, Casa, xG, Placar, xG, Visitante)
+COLUNAS_USADAS = [0, 2, 4, 5, 6, 7, 8]
+# Tamanho do prefixo lido para detectar encoding e separador
+TAMANHO_PREFIXO = 64 * 1024
+
+def _detectar_formato_csv(prefixo):
+    """
+    Detecta (encoding, separador, n_colunas) a partir dos primeiros bytes do CSV.
+
+    Encoding: BOM ou texto não-ASCII válido em UTF-8 -> UTF-8; caso contrário latin1
+    (o padrão histórico das planilhas). Separador: o primeiro entre ';', ',' e TAB
+    que produz 9+ colunas (respeitando aspas, ex.: "1,25" em CSV com vírgula).
+    """
+    if prefixo.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        # Descarta a última linha (pode estar cortada no meio de um caractere)
+        completo = prefixo[:prefixo.rfind(b"\n") + 1] or prefixo
+        try:
+            completo.decode('utf-8')
+            encoding = 'utf-8' if any(b > 0x7F for b in completo) else 'latin1'
+        except UnicodeDecodeError:
+            encoding = 'latin1'
+
+    linhas = prefixo.decode(encoding, errors='replace').splitlines()[:50]
+    melhor = (';', 0)
+    for sep in (';', ',', '\t'):
+        n_colunas = max((len(campos) for campos in csv.reader(linhas, delimiter=sep)), default=0)
+        if n_colunas >= 9:
+            return encoding, sep, n_colunas
+        if n_colunas > melhor[1]:
+            melhor = (sep, n_colunas)
+    return (encoding,) + melhor
+
+def _ler_csv(filepath):
+    """Lê o CSV em uma única passada. Retorna o DataFrame bruto (colunas COLUNAS_USADAS) ou mensagem de erro."""
+    arquivo = filepath if hasattr(filepath, 'read') else open(filepath, 'rb')
+    try:
+        # Reseta o ponteiro se for um arquivo aberto (Streamlit)
+        if hasattr(arquivo, 'seek'): arquivo.seek(0)
+        prefixo = arquivo.read(TAMANHO_PREFIXO)
+        if isinstance(prefixo, str):
+            prefixo = prefixo.encode('utf-8')
+        if not prefixo.strip():
+            return "Erro: O arquivo está vazio."
+
+        encoding, sep, n_colunas = _detectar_formato_csv(prefixo)
+        if n_colunas < 9:
+            return f"Erro: A planilha tem apenas {n_colunas} colunas. São necessárias pelo menos 9."
+
+        arquivo.seek(0)
+        # names fixa a largura: linhas curtas (título/rodapé) são completadas com NaN
+        # em vez de definirem o número de colunas. Tudo como texto; a conversão vem depois.
+        return pd.read_csv(arquivo, sep=sep, header=None, names=range(n_colunas), usecols=COLUNAS_USADAS,
+                           dtype=str, encoding=encoding, encoding_errors='replace',
+                           on_bad_lines='skip', engine='c')
+    except Exception as e:
+        return f"Erro: Formato de arquivo não suportado ou colunas insuficientes. Use Excel (.xlsx) ou CSV com 9+ colunas. ({e})"
+    finally:
+        if arquivo is not filepath:
+            arquivo.close()
+
+# --- EXCEL ---
+# Depois do último jogo, esta quantidade de linhas seguidas sem times marca o rodapé: a leitura para aí
+LINHAS_FIM_DADOS = 50
+# Pastas com várias abas acima deste tamanho têm as abas lidas em paralelo (processos)
+EXCEL_PARALELO_BYTES = 1024 ** 2
+_REGEX_ANO = re.compile(r'(?<!\d)((?:19|20)\d{2})(?!\d)')
+
+def _motor_excel(nome):
+    """Engine de leitura: calamine se instalado; senão o leitor em streaming (openpyxl) para .xlsx."""
+    if EXCEL_RAPIDO:
+        return "calamine"
+    return "openpyxl" if nome.lower().endswith('.xlsx') else None
+
+def _abrir_excel(origem):
+    """Caminho ou bytes (upload) -> argumento aceito pelos leitores (um buffer novo a cada leitura)."""
+    return io.BytesIO(origem) if isinstance(origem, bytes) else origem
+
+def _abrir_pasta(origem, motor):
+    """Abre a pasta de trabalho uma vez para ler várias abas (Workbook do openpyxl ou pd.ExcelFile)."""
+    if motor == "openpyxl":
+        import openpyxl
+        return openpyxl.load_workbook(_abrir_excel(origem), read_only=True, data_only=True)
+    return pd.ExcelFile(_abrir_excel(origem), engine=motor)
+
+def _cortar_rodape(df):
+    """Descarta o que vem depois do último jogo (LINHAS_FIM_DADOS linhas seguidas sem times)."""
+    com_times = np.flatnonzero((df[4].notna() & df[8].notna()).to_numpy())
+    if len(com_times) == 0:
+        return df
+    lacunas = np.flatnonzero(np.diff(com_times) > LINHAS_FIM_DADOS)
+    fim = com_times[lacunas[0]] if len(lacunas) else com_times[-1]
+    return df.iloc[:fim + 1]
+
+def _ler_aba_openpyxl(planilha):
+    """Lê a aba em streaming (read_only), só até a coluna 9, e para no rodapé."""
+    planilha.reset_dimensions() # A dimensão gravada no arquivo pode estar errada
+    linhas, largura, ultimo_jogo = [], 0, None
+    for i, linha in enumerate(planilha.iter_rows(max_col=9, values_only=True)):
+        preenchidas = [j for j, valor in enumerate(linha) if valor is not None]
+        if preenchidas:
+            largura = max(largura, preenchidas[-1] + 1)
+        linha = tuple(linha) + (None,) * (9 - len(linha))
+        if linha[4] is not None and linha[8] is not None:
+            ultimo_jogo = i
+        elif ultimo_jogo is not None and i - ultimo_jogo > LINHAS_FIM_DADOS:
+            break
+        linhas.append([linha[j] for j in COLUNAS_USADAS])
+    if not linhas:
+        return "Erro: O arquivo está vazio."
+    if largura < 9:
+        return f"Erro: A planilha tem apenas {largura} colunas. São necessárias pelo menos 9."
+    # Células vazias como NaN, como no read_excel
+    return pd.DataFrame(linhas, columns=COLUNAS_USADAS).fillna(np.nan)
+
+def _ler_aba(origem, aba, motor, pasta=None):
+    """
+    Lê uma aba da pasta de trabalho (executado também nos processos do pool, que abrem a pasta).
+
+    Returns:
+        DataFrame bruto com as COLUNAS_USADAS (rótulos = posição na planilha) ou a mensagem de erro.
+    """
+    propria = pasta is None
+    if propria:
+        pasta = _abrir_pasta(origem, motor)
+    try:
+        if motor == "openpyxl":
+            df = _ler_aba_openpyxl(pasta[aba])
+            return df if isinstance(df, str) else _cortar_rodape(df)
+        try:
+            df = pd.read_excel(pasta, sheet_name=aba, header=None, usecols=COLUNAS_USADAS)
+        except ValueError as e: # usecols além da última coluna da aba
+            return f"Erro: A planilha tem menos de 9 colunas. ({e})"
+        if df.empty:
+            return "Erro: O arquivo está vazio."
+        df.columns = COLUNAS_USADAS
+        return _cortar_rodape(df)
+    finally:
+        if propria:
+            pasta.close()
 
+# Temporada de abas/planilhas sem ano no nome: todos os jogos ficam num recorte só
+TEMPORADA_NAO_INFORMADA = 0
+
+def _rotulo_aba(nome):
+    """(Liga, Temporada) de uma aba: o ano no nome é a temporada (None se não houver), o resto é a liga."""
+    ano = _REGEX_ANO.search(nome)
+    liga = _REGEX_ANO.sub('', nome).strip(" -_/") if ano else nome.strip()
+    return liga or "PADRAO", (int(ano.group(1)) if ano else None)
+
+def _ler_excel(filepath, filename):
+    """
+    Lê a pasta de trabalho: só as 7 colunas usadas de cada aba, parando no rodapé.
+
+    Uma aba: devolve o DataFrame limpo, como antes. Várias abas com jogos (uma por liga
+    ou temporada): são lidas em paralelo e viram um único dataset com as colunas Liga e
+    Temporada (ano no nome da aba; sem ano, a aba inteira é uma temporada só, 0), como o
+    dataset Parquet. Abas sem jogos (instruções, resumo) são ignoradas.
+    """
+    if hasattr(filepath, 'read'):
+        if hasattr(filepath, 'seek'): filepath.seek(0)
+        origem = filepath.read()
+    else:
+        origem = str(filepath)
+    motor = _motor_excel(filename)
+    with telemetry.etapa("excel_abas", motor=motor or "padrao") as campos:
+        pasta = _abrir_pasta(origem, motor)
+        try:
+            abas = pasta.sheetnames if motor == "openpyxl" else pasta.sheet_names
+            tamanho = len(origem) if isinstance(origem, bytes) else os.path.getsize(origem)
+            paralelo = len(abas) > 1 and tamanho >= EXCEL_PARALELO_BYTES and (os.cpu_count() or 1) > 1
+            if paralelo:
+                # spawn: processos limpos, sem herdar threads do servidor (Streamlit)
+                with ProcessPoolExecutor(max_workers=min(len(abas), os.cpu_count()), mp_context=mp.get_context("spawn")) as pool:
+                    brutos = list(pool.map(_ler_aba, [origem] * len(abas), abas, [motor] * len(abas)))
+            else:
+                brutos = [_ler_aba(origem, aba, motor, pasta) for aba in abas]
+        finally:
+            pasta.close()
+        campos.update(abas=len(abas), paralelo=paralelo)
+
+    limpos, erros = {}, []
+    for aba, bruto in zip(abas, brutos):
+        df = bruto if isinstance(bruto, str) else _limpar_planilha(bruto)
+        if isinstance(df, str) or df.empty:
+            erros.append(df if isinstance(df, str) else "Erro: O arquivo está vazio.")
+            if len(abas) > 1:
+                telemetry.log("aba_ignorada", aba=aba, motivo=erros[-1])
+        else:
+            limpos[aba] = df
+    if not limpos:
+        return erros[0]
+    if len(limpos) == 1:
+        return next(iter(limpos.values()))
+
+    partes = []
+    for aba, df in limpos.items():
+        liga, temporada = _rotulo_aba(aba)
+        df['Liga'] = liga
+        # Sem ano no nome, o ano da Data partiria ao meio temporadas que viram o ano
+        df['Temporada'] = np.int16(temporada if temporada is not None else TEMPORADA_NAO_INFORMADA)
+        partes.append(df)
+    df = pd.concat(partes, ignore_index=True)
+    df['Temporada'] = df['Temporada'].astype('int16')
+    df.sort_values(by=['Data', 'Rodada'], ascending=[True, True], inplace=True, kind='stable')
+    return df.reset_index(drop=True)
+
+@telemetry.cronometrado("carregar_planilha")
 def load_and_clean_data(filepath):
     """
     Carrega o arquivo (CSV ou Excel) de forma ultra-robusta.
@@ -16,131 +281,219 @@ def load_and_clean_data(filepath):
         filename = getattr(filepath, 'name', str(filepath))
         is_excel = filename.lower().endswith(('.xlsx', '.xls'))
         
+        # Dataset colunar (Parquet) já está limpo: só precisa ser lido
+        if is_colunar(filepath):
+            if pq is None:
+                return "Erro: Para ler arquivos Parquet instale o pyarrow (pip install pyarrow)."
+            return carregar_colunar(filepath)
+        
         if is_excel:
-            df = pd.read_excel(filepath, header=None)
-        else:
-            # Tenta CSV com os separadores e encodings mais comuns
-            # Reseta o ponteiro se for um arquivo aberto (Streamlit)
-            if hasattr(filepath, 'seek'): filepath.seek(0)
-            
-            for sep in [';', ',']:
-                try:
-                    df = pd.read_csv(filepath, sep=sep, header=None, encoding='latin1', on_bad_lines='skip')
-                    if len(df.columns) >= 9: break # Sucesso se encontrou as colunas necessárias
-                    if hasattr(filepath, 'seek'): filepath.seek(0)
-                except:
-                    if hasattr(filepath, 'seek'): filepath.seek(0)
-                    continue
-            
-            # Se ainda não deu certo, tenta sniffing ou fallback
-            if df is None or len(df.columns) < 9:
-                if hasattr(filepath, 'seek'): filepath.seek(0)
-                try:
-                    df = pd.read_csv(filepath, sep=None, header=None, engine='python', encoding='latin1')
-                except:
-                    return "Erro: Formato de arquivo não suportado ou colunas insuficientes. Use Excel (.xlsx) ou CSV com 9+ colunas."
-
-        if df is None or df.empty:
-            return "Erro: O arquivo está vazio."
+            return _ler_excel(filepath, filename)
+        # CSV: detecta encoding/separador num prefixo e faz UMA única leitura (engine C),
+        # já restrita às 7 colunas usadas.
+        df = _ler_csv(filepath)
+        if isinstance(df, str):
+            return df # Erro
+        return _limpar_planilha(df)
 
-        # LOCALIZAR A LINHA DE CABEÇALHO (Onde está escrito "Rodada")
-        header_idx = -1
-        # Procura nas primeiras 10 linhas
-        for i in range(min(10, len(df))):
-            row_str = " ".join(df.iloc[i].astype(str).tolist())
-            if "Rodada" in row_str:
-                header_idx = i
-                break
-        
-        # Se achou o cabeçalho, corta o "lixo" acima dele
-        if header_idx != -1:
-            df = df.iloc[header_idx + 1:].reset_index(drop=True)
-        else:
-            # Se não achou "Rodada", tenta pular a primeira linha por padrão (comportamento antigo)
-            if "Head-to-Head" in str(df.iloc[0, 0]):
-                df = df.iloc[1:].reset_index(drop=True)
+    except Exception as e:
+        return f"Erro ao processar arquivo: {str(e)}"
 
-        # Selecionar Colunas Relevantes baseadas na posição detectada:
-        # Index 0: Rodada | 2: Data | 4: Time Casa | 5: xG Casa | 6: Placar | 7: xG Visitante | 8: Time Visitante
-        if len(df.columns) < 9:
-             return f"Erro: A planilha tem apenas {len(df.columns)} colunas. São necessárias pelo menos 9."
+def _limpar_planilha(df):
+    """Limpa a planilha bruta (colunas COLUNAS_USADAS, com título/cabeçalho/rodapé). Retorna o DataFrame limpo ou mensagem de erro."""
+    if df is None or df.empty:
+        return "Erro: O arquivo está vazio."
 
-        df = df[[0, 2, 4, 5, 6, 7, 8]].copy()
-        df.columns = ['Rodada', 'Data', 'Mandante', 'xG_Casa', 'Placar', 'xG_Visitante', 'Visitante']
-        
-        # --- LIMPEZA DE DADOS SEGUROS ---
-        # 1. Remover apenas onde Mandante ou Visitante é vazio ou é o próprio cabeçalho
-        df = df.dropna(subset=['Mandante', 'Visitante'])
-        df = df[~df['Mandante'].astype(str).str.contains('Time|Casa|Mandante', na=False)].reset_index(drop=True)
-        
-        # Strip nos nomes dos times para evitar erros de match (ex: "São Paulo ")
-        df['Mandante'] = df['Mandante'].astype(str).str.strip()
-        df['Visitante'] = df['Visitante'].astype(str).str.strip()
-        
-        # 2. Converter Data
-        df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
-        # Remove apenas se nem a Rodada nem a Data existirem (garante que não pegamos o lixo do rodapé)
-        df = df.dropna(subset=['Data', 'Rodada'], how='all').reset_index(drop=True)
-        
-        # 3. Converter Números (xG) - Trocar vírgula por ponto de forma segura
-        def clean_float(val):
-            try:
-                if pd.isna(val) or val == '': return np.nan
-                if isinstance(val, str):
-                    s = val.replace(',', '.').strip()
-                    return float(s) if s else np.nan
-                return float(val)
-            except:
-                return np.nan
-
-        df['xG_Casa'] = df['xG_Casa'].apply(clean_float)
-        df['xG_Visitante'] = df['xG_Visitante'].apply(clean_float)
-        
-        # 4. Processar Placar (Separar Gols) - Mantendo NaNs para jogos futuros
-        def split_placar(placar_str):
-            try:
-                if not isinstance(placar_str, str): return np.nan, np.nan
-                # Verifica se contém o traço separador (comum ou especial)
-                if not any(sep in placar_str for sep in ['-', '–']): return np.nan, np.nan
-                
-                p = placar_str.replace('–', '-').replace(' ', '')
-                parts = p.split('-')
-                if len(parts) == 2:
-                    return int(parts[0]), int(parts[1])
-                return np.nan, np.nan
-            except:
-                return np.nan, np.nan
-
-        df[['Gols_Casa', 'Gols_Visitante']] = df['Placar'].apply(lambda x: pd.Series(split_placar(x)))
-        
-        # Ordenação por DATA (Regra de Ouro) e Rodada
-        df.sort_values(by=['Data', 'Rodada'], ascending=[True, True], inplace=True)
-        
-        # Garantir Rodada como Inteiro
-        df['Rodada'] = pd.to_numeric(df['Rodada'], errors='coerce')
-        df.dropna(subset=['Rodada'], inplace=True)
-        df['Rodada'] = df['Rodada'].astype(int)
-        
-        return df
+    # LOCALIZAR A LINHA DE CABEÇALHO (Onde está escrito "Rodada") nas primeiras 10 linhas
+    topo = df.head(10).fillna('').astype(str)
+    tem_rodada = topo.apply(lambda col: col.str.contains("Rodada", regex=False)).any(axis=1).to_numpy()
+    header_idx = int(np.argmax(tem_rodada)) if tem_rodada.any() else -1
+    
+    # Se achou o cabeçalho, corta o "lixo" acima dele
+    if header_idx != -1:
+        df = df.iloc[header_idx + 1:].reset_index(drop=True)
+    else:
+        # Se não achou "Rodada", tenta pular a primeira linha por padrão (comportamento antigo)
+        if "Head-to-Head" in str(df.iloc[0, 0]):
+            df = df.iloc[1:].reset_index(drop=True)
 
-    except Exception as e:
-        return f"Erro ao processar arquivo: {str(e)}"
+    # Selecionar Colunas Relevantes baseadas na posição detectada:
+    # Index 0: Rodada | 2: Data | 4: Time Casa | 5: xG Casa | 6: Placar | 7: xG Visitante | 8: Time Visitante
+    if not set(COLUNAS_USADAS).issubset(df.columns):
+         return f"Erro: A planilha tem apenas {len(df.columns)} colunas. São necessárias pelo menos 9."
+
+    df = df[COLUNAS_USADAS].copy()
+    df.columns = ['Rodada', 'Data', 'Mandante', 'xG_Casa', 'Placar', 'xG_Visitante', 'Visitante']
+    
+    # --- LIMPEZA DE DADOS SEGUROS ---
+    # 1. Remover apenas onde Mandante ou Visitante é vazio ou é o próprio cabeçalho
+    df = df.dropna(subset=['Mandante', 'Visitante'])
+    df = df[~df['Mandante'].astype(str).str.contains('Time|Casa|Mandante', na=False)].reset_index(drop=True)
+    
+    # Nome canônico de cada time (ex: "Atlético Mineiro" e "Atlético-MG" viram o mesmo time).
+    # Cada grafia distinta é resolvida uma única vez pelo cadastro de times.
+    df['Mandante'] = REGISTRY.canonicalizar(df['Mandante'].astype(str).str.strip())
+    df['Visitante'] = REGISTRY.canonicalizar(df['Visitante'].astype(str).str.strip())
+    
+    # 2. Converter Data
+    df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+    # Remove apenas se nem a Rodada nem a Data existirem (garante que não pegamos o lixo do rodapé)
+    df = df.dropna(subset=['Data', 'Rodada'], how='all').reset_index(drop=True)
+    
+    # 3. Converter Números (xG) - Trocar vírgula por ponto (vetorizado)
+    df['xG_Casa'] = _converter_decimal(df['xG_Casa'])
+    df['xG_Visitante'] = _converter_decimal(df['xG_Visitante'])
+    
+    # 4. Processar Placar (Separar Gols) - Mantendo NaNs para jogos futuros
+    df['Gols_Casa'], df['Gols_Visitante'] = _separar_placar(df['Placar'])
+    
+    # Ordenação por DATA (Regra de Ouro) e Rodada
+    df.sort_values(by=['Data', 'Rodada'], ascending=[True, True], inplace=True)
+    
+    # Garantir Rodada como Inteiro
+    df['Rodada'] = pd.to_numeric(df['Rodada'], errors='coerce')
+    df.dropna(subset=['Rodada'], inplace=True)
+    df['Rodada'] = df['Rodada'].astype(int)
+    
+    return df
 
 def get_confrontos_rodada(df, rodada_alvo):
     """
     Retorna lista de confrontos da rodada alvo.
     """
-    rodada_df = df[df['Rodada'] == int(rodada_alvo)].copy()
-    confrontos = []
-    for _, row in rodada_df.iterrows():
-        confrontos.append({
-            'Mandante': row['Mandante'],
-            'Visitante': row['Visitante'],
-            'Data_Jogo': row['Data']
-        })
-    return confrontos
+    rodada_df = df.loc[df['Rodada'] == int(rodada_alvo), ['Mandante', 'Visitante', 'Data']]
+    rodada_df = rodada_df.assign(Data=_coluna_datas(rodada_df['Data']))
+    return rodada_df.rename(columns={'Data': 'Data_Jogo'}).to_dict('records')
+
+# --- ÍNDICE TIME-JOGO ---
+# Cada jogo com placar entra 2x por time: no grupo "TODOS" e no grupo do mando (CASA/FORA).
+# Código do grupo = codigo_time * 3 + mando, com mando 0 = TODOS, 1 = CASA, 2 = FORA.
+MANDO_TODOS, MANDO_CASA, MANDO_FORA = 0, 1, 2
+
+def _coluna_datas(serie):
+    """Coluna Data como datetime64, aceitando também o esquema compacto (dias desde 1970)."""
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return pd.to_datetime(serie.astype('float64'), unit='D') # Nulo -> NaT
+    return pd.to_datetime(serie, errors='coerce')
+
+def _para_dias(data):
+    """Converte uma data (Timestamp, date, datetime64, string ou dias desde 1970) para dias desde 1970. NaT/inválida -> None."""
+    if isinstance(data, (int, np.integer)) and not isinstance(data, bool):
+        return int(data) # Já é um número de dia (esquema compacto)
+    ts = pd.to_datetime(data, errors='coerce')
+    if pd.isna(ts):
+        return None
+    return int(np.datetime64(ts.to_datetime64(), 'D').astype(np.int64))
+
+def _para_dias_array(datas):
+    """Versão vetorizada de _para_dias. Datas inválidas viram -1 (ver mascara retornada)."""
+    datas = pd.Series(datas)
+    if pd.api.types.is_integer_dtype(datas.dtype): # Esquema compacto: já são dias
+        return datas.to_numpy(dtype=np.int64, na_value=-1), datas.isna().to_numpy()
+    datas = pd.to_datetime(datas, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    invalidas = np.isnat(datas)
+    dias = datas.astype('datetime64[D]').astype(np.int64)
+    dias[invalidas] = -1
+    return dias, invalidas
+
+def _chave_grupo_dia(grupo, dia):
+    return (np.asarray(grupo, dtype=np.int64) << 32) + (np.asarray(dia, dtype=np.int64) + (1 << 31))
+
+@telemetry.cronometrado("indice_times")
+def construir_indice_times(df):
+    """
+    Monta o índice "time-jogo" (formato longo) a partir do DataFrame limpo.
+
+    Uma linha por time por jogo com placar, já orientada para o time (gols pró/contra,
+    xG pró/contra) e ordenada por (grupo, data). Qualquer consulta de histórico
+    vira uma busca binária + um fatiamento, sem varrer a temporada inteira.
+
+    O código de cada time é o ID canônico do cadastro de times (team_registry),
+    então grafias diferentes do mesmo time caem no mesmo histórico.
+
+    Returns:
+        dict com os arrays NumPy do índice e o mapa nome do time -> ID.
+    """
+    datas = _coluna_datas(df['Data']).to_numpy(dtype='datetime64[ns]')
+    gols_casa = pd.to_numeric(df['Gols_Casa'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    gols_vis = pd.to_numeric(df['Gols_Visitante'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    xg_casa = pd.to_numeric(df['xG_Casa'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    xg_vis = pd.to_numeric(df['xG_Visitante'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
 
-def calcular_metricas(df, time, data_limite, n_jogos, filtro_mando, is_mandante_na_analise):
+    # Apenas jogos com DATA e PLACAR preenchidos entram no histórico
+    validos = ~np.isnat(datas) & ~np.isnan(gols_casa) & ~np.isnan(gols_vis)
+    pos = np.flatnonzero(validos)
+
+    # IDs canônicos (no esquema compacto, só as categorias são resolvidas)
+    cod_mand, cod_vis = REGISTRY.ids(df['Mandante'])[pos], REGISTRY.ids(df['Visitante'])[pos]
+    presentes = pd.unique(pd.concat([df['Mandante'], df['Visitante']], ignore_index=True).dropna().astype(str))
+
+    # Formato longo: [mandante/TODOS, visitante/TODOS, mandante/CASA, visitante/FORA]
+    grupo = np.concatenate([cod_mand * 3 + MANDO_TODOS, cod_vis * 3 + MANDO_TODOS,
+                            cod_mand * 3 + MANDO_CASA, cod_vis * 3 + MANDO_FORA])
+    em_casa = np.concatenate([np.ones(len(pos), bool), np.zeros(len(pos), bool)] * 2)
+    gp = np.concatenate([gols_casa[pos], gols_vis[pos]] * 2)
+    gs = np.concatenate([gols_vis[pos], gols_casa[pos]] * 2)
+    xg = np.concatenate([xg_casa[pos], xg_vis[pos]] * 2)
+    xga = np.concatenate([xg_vis[pos], xg_casa[pos]] * 2)
+    linha = np.tile(pos, 4)
+    instante = np.tile(datas[pos].astype(np.int64), 4)
+
+    # Ordenação estável por grupo e instante do jogo (mais antigo primeiro)
+    ordem = np.lexsort((instante, grupo))
+    grupo = grupo[ordem]
+    dia = instante[ordem].astype('datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    n_grupos = len(REGISTRY) * 3 # IDs são contíguos (0..len-1)
+
+    return {
+        'times': {nome: REGISTRY.resolve(nome) for nome in presentes},
+        'inicio': np.searchsorted(grupo, np.arange(n_grupos + 1), side='left'),
+        'grupo': grupo,
+        'dia': dia,
+        # Chave (grupo, dia) em um único int64 para buscas binárias vetorizadas
+        'chave': _chave_grupo_dia(grupo, dia),
+        'em_casa': em_casa[ordem],
+        'gp': gp[ordem], 'gs': gs[ordem], 'xg': xg[ordem], 'xga': xga[ordem],
+        'linha': linha[ordem],
+    }
+
+# Índices montados para chamadas sem 'indice' (ex.: calcular_metricas em scripts), por DataFrame.
+# A chave é o id do df; a weakref confere que o id não foi reaproveitado por outro DataFrame.
+INDICES = LRUCache(max_items=int(os.environ.get("INDICES_MAX", "8")), name="indices")
+
+def indice_do_df(df):
+    """
+    construir_indice_times(df) memorizado por DataFrame: consultas seguidas sobre o mesmo df
+    (sem passar o índice) não remontam o índice a cada chamada. Trate o df como somente leitura.
+    """
+    chave = (id(df), len(df))
+    salvo = INDICES.get(chave)
+    if salvo is not None and salvo[0]() is df:
+        return salvo[1]
+    indice = construir_indice_times(df)
+    INDICES.put(chave, (weakref.ref(df), indice), size=estimate_size(indice))
+    return indice
+
+def _fatia_historico(indice, time, data_limite, n_jogos, filtro_mando, is_mandante_na_analise):
+    """Retorna (inicio, fim) no índice dos últimos N jogos do time antes da data limite."""
+    codigo = indice['times'].get(time)
+    if codigo is None: codigo = REGISTRY.resolve(time) # Outra grafia do mesmo time
+    dia_limite = _para_dias(data_limite)
+    if codigo * 3 + 3 >= len(indice['inicio']) or dia_limite is None or n_jogos <= 0:
+        return 0, 0
+
+    mando = MANDO_TODOS
+    if filtro_mando == 'POR_MANDO':
+        mando = MANDO_CASA if is_mandante_na_analise else MANDO_FORA
+
+    grupo = codigo * 3 + mando
+    lo, hi = indice['inicio'][grupo], indice['inicio'][grupo + 1]
+    # A REGRA DE OURO: apenas jogos com Data < Data_Limite (comparando só o dia)
+    fim = lo + int(np.searchsorted(indice['dia'][lo:hi], dia_limite, side='left'))
+    return max(lo, fim - int(n_jogos)), fim
+
+@telemetry.cronometrado("calcular_metricas", logging.DEBUG)
+def calcular_metricas(df, time, data_limite, n_jogos, filtro_mando, is_mandante_na_analise, indice=None):
     """
     Calcula as métricas para um time, baseando-se no histórico ANTERIOR à data_limite.
     
@@ -151,92 +504,748 @@ def calcular_metricas(df, time, data_limite, n_jogos, filtro_mando, is_mandante_
         n_jogos: Quantidade de jogos para análise
         filtro_mando: 'TODOS' ou 'POR_MANDO'
         is_mandante_na_analise: Se o time é mandante no jogo que estamos analisando agora
+        indice: Índice de construir_indice_times(df). Se omitido, vem de indice_do_df
+            (montado na primeira consulta sobre este df e reaproveitado nas seguintes).
     """
-    
-    # Conversão rigorosa para comparação segura (apenas DATA, sem hora)
-    if isinstance(data_limite, pd.Timestamp):
-        data_limite = data_limite.date()
-    elif isinstance(data_limite, str):
-        try:
-            data_limite = pd.to_datetime(data_limite).date()
-        except:
-            pass # Mantém como está se falhar, mas deve falhar na comp
-            
-    # Garantir que a coluna Data seja datetime.date para comparação
-    # (Isso é feito melhor vetorizado antes, mas aqui garantimos caso-a-caso)
-    df_datas = df['Data'].dt.date
-    
-    # 1. Filtrar jogos DO TIME e ANTERIORES à data limite
-    mask_time = (df['Mandante'] == time) | (df['Visitante'] == time)
-    # A REGRA DE OURO: Apenas a CROLOLOGIA importa.
-    # Se Data_Histórico < Data_Limite, o jogo entra.
-    mask_data = df_datas < data_limite
-    
-    historico = df[mask_time & mask_data].copy()
-    
-    # Apenas jogos com PLACAR preenchido entram no cálculo das estatísticas
-    historico.dropna(subset=['Gols_Casa', 'Gols_Visitante'], inplace=True)
-    
-    # Ordenar: Mais recente primeiro
-    historico.sort_values(by='Data', ascending=False, inplace=True)
-    
-    # 2. Aplicar Filtro de Mando (Se necessário)
-    if filtro_mando == 'POR_MANDO':
-        if is_mandante_na_analise:
-            # Se o time vai jogar em casa, olhamos histórico EM CASA
-            historico = historico[historico['Mandante'] == time]
-        else:
-            # Se o time vai jogar fora, olhamos histórico FORA
-            historico = historico[historico['Visitante'] == time]
-            
-    # 3. Pegar os últimos N jogos
-    recorte = historico.head(n_jogos).copy()
-    
-    if len(recorte) == 0:
+    if indice is None:
+        indice = indice_do_df(df)
+
+    ini, fim = _fatia_historico(indice, time, data_limite, n_jogos, filtro_mando, is_mandante_na_analise)
+    qtd_jogos = fim - ini
+
+    if qtd_jogos == 0:
         return {
             'GP': 0.0, 'GS': 0.0, 'SG_Conq': 0.0, 'SG_Ced': 0.0, 
             'xG': 0.0, 'xGA': 0.0, 'Jogos': 0
         }, pd.DataFrame()
 
-    # 4. Calcular Métricas
-    stats = {'GP': 0, 'GS': 0, 'SG_Conq': 0, 'SG_Ced': 0, 'xG_soma': 0.0, 'xGA_soma': 0.0, 'Jogos': len(recorte)}
-    
-    for _, row in recorte.iterrows():
-        # Definir papéis no histórico
-        if row['Mandante'] == time:
-            gols_pro = row['Gols_Casa']
-            gols_sofridos = row['Gols_Visitante']
-            xg_pro = row['xG_Casa']
-            xg_contra = row['xG_Visitante']
-        else:
-            gols_pro = row['Gols_Visitante']
-            gols_sofridos = row['Gols_Casa']
-            xg_pro = row['xG_Visitante']
-            xg_contra = row['xG_Casa']
-            
-        stats['GP'] += gols_pro
-        stats['GS'] += gols_sofridos
-        stats['xG_soma'] += xg_pro
-        stats['xGA_soma'] += xg_contra
-        
-        # SG Conquistado: Não sofri gols (GS = 0)
-        if gols_sofridos == 0:
-            stats['SG_Conq'] += 1
-            
-        # SG Cedido: Não fiz gols (GP = 0) -> "Cedi" o clean sheet pro adversário
-        if gols_pro == 0:
-            stats['SG_Ced'] += 1
+    # Recorte do mais recente para o mais antigo (mesma ordem de acumulação do cálculo original)
+    recorte_idx = slice(fim - 1, ini - 1 if ini > 0 else None, -1)
+    gp, gs = indice['gp'][recorte_idx], indice['gs'][recorte_idx]
+
+    stats = {
+        'GP': np.add.accumulate(gp)[-1],
+        'GS': np.add.accumulate(gs)[-1],
+        # SG Conquistado: Não sofri gols (GS = 0) | SG Cedido: Não fiz gols (GP = 0)
+        'SG_Conq': int(np.count_nonzero(gs == 0)),
+        'SG_Ced': int(np.count_nonzero(gp == 0)),
+        'xG_soma': np.add.accumulate(indice['xg'][recorte_idx])[-1],
+        'xGA_soma': np.add.accumulate(indice['xga'][recorte_idx])[-1],
+        'Jogos': qtd_jogos,
+    }
 
     # Normalizar médias
-    qtd_jogos = len(recorte)
-    stats['xG'] = stats['xG_soma'] / qtd_jogos if qtd_jogos > 0 else 0.0
-    stats['xGA'] = stats['xGA_soma'] / qtd_jogos if qtd_jogos > 0 else 0.0
-    
+    stats['xG'] = stats['xG_soma'] / qtd_jogos
+    stats['xGA'] = stats['xGA_soma'] / qtd_jogos
+
+    recorte = df.iloc[indice['linha'][recorte_idx]].copy()
     return stats, recorte
 
+def _fim_historico(indice, times, datas_limite, filtro_mando, is_mandante_na_analise):
+    """
+    Resolve em lote onde termina o histórico de cada consulta no índice.
+
+    Returns:
+        (lo, fim): início do grupo (time, mando) e posição exclusiva do último jogo
+        anterior à data limite. O histórico disponível é indice[lo:fim].
+    """
+    codigos = REGISTRY.ids(times)
+    # Time ainda não cadastrado quando o índice foi montado: sem histórico
+    desconhecidos = (codigos < 0) | (codigos * 3 + 3 >= len(indice['inicio']))
+    codigos = np.where(desconhecidos, 0, codigos)
+    dias, datas_invalidas = _para_dias_array(datas_limite)
+
+    if filtro_mando == 'POR_MANDO':
+        mandos = np.where(np.broadcast_to(np.asarray(is_mandante_na_analise, dtype=bool), codigos.shape),
+                          MANDO_CASA, MANDO_FORA)
+    else:
+        mandos = np.full(codigos.shape, MANDO_TODOS)
+
+    grupos = codigos * 3 + mandos
+    lo = indice['inicio'][grupos]
+    # A REGRA DE OURO: apenas jogos com Data < Data_Limite (comparando só o dia)
+    fim = np.searchsorted(indice['chave'], _chave_grupo_dia(grupos, dias), side='left')
+    fim = np.where(desconhecidos | datas_invalidas, lo, fim)
+    return lo, fim
+
+def _acumular_recortes(indice, lo, fim, n_max):
+    """
+    Gera (n, métricas) para n = 1..n_max, somando do jogo mais recente para o mais antigo.
+
+    Cada passo acrescenta um jogo ao recorte de todas as consultas ao mesmo tempo
+    (laço em N, não nas linhas), na mesma ordem de soma de calcular_metricas.
+    """
+    disponiveis = fim - lo
+    somas = {col: np.zeros(len(lo)) for col in ('gp', 'gs', 'xg', 'xga')}
+    sg_conq = np.zeros(len(lo), dtype=np.int64)
+    sg_ced = np.zeros(len(lo), dtype=np.int64)
+
+    for k in range(n_max):
+        ativo = k < disponiveis
+        pos = np.where(ativo, fim - 1 - k, 0)
+        for col in somas:
+            somas[col] = np.where(ativo, somas[col] + indice[col][pos], somas[col])
+        sg_conq = sg_conq + (ativo & (indice['gs'][pos] == 0))
+        sg_ced = sg_ced + (ativo & (indice['gp'][pos] == 0))
+
+        jogos = np.minimum(disponiveis, k + 1)
+        com_jogos = jogos > 0
+        divisor = np.where(com_jogos, jogos, 1)
+        yield k + 1, {
+            'GP': somas['gp'],
+            'GS': somas['gs'],
+            'SG_Conq': sg_conq,
+            'SG_Ced': sg_ced,
+            'xG': np.where(com_jogos, somas['xg'] / divisor, 0.0),
+            'xGA': np.where(com_jogos, somas['xga'] / divisor, 0.0),
+            'Jogos': jogos,
+        }
+
+COLUNAS_METRICAS = ['GP', 'GS', 'SG_Conq', 'SG_Ced', 'xG', 'xGA', 'Jogos']
+
+def consultar_metricas(indice, times, datas_limite, n_jogos, filtro_mando, is_mandante_na_analise):
+    """
+    Versão vetorizada de calcular_metricas: responde várias consultas de uma vez.
+
+    Args:
+        indice: Índice de construir_indice_times(df)
+        times: Sequência de nomes de times (uma consulta por elemento)
+        datas_limite: Sequência de datas limite (mesmo tamanho de times)
+        n_jogos: Quantidade de jogos para análise
+        filtro_mando: 'TODOS' ou 'POR_MANDO'
+        is_mandante_na_analise: bool ou sequência de bools (mesmo tamanho de times)
+
+    Returns:
+        DataFrame com GP, GS, SG_Conq, SG_Ced, xG, xGA, Jogos (uma linha por consulta).
+    """
+    lo, fim = _fim_historico(indice, times, datas_limite, filtro_mando, is_mandante_na_analise)
+    n_jogos = max(int(n_jogos), 0)
+    # Só é preciso acumular até o maior histórico disponível
+    passos = min(n_jogos, int((fim - lo).max()) if len(lo) else 0)
+
+    metricas = {'GP': np.zeros(len(lo)), 'GS': np.zeros(len(lo)),
+                'SG_Conq': np.zeros(len(lo), dtype=np.int64), 'SG_Ced': np.zeros(len(lo), dtype=np.int64),
+                'xG': np.zeros(len(lo)), 'xGA': np.zeros(len(lo)), 'Jogos': np.zeros(len(lo), dtype=np.int64)}
+    for _, metricas in _acumular_recortes(indice, lo, fim, passos):
+        pass
+    return pd.DataFrame(metricas, columns=COLUNAS_METRICAS)
+
+COLUNAS_TABELA_MANDANTE = ["MANDANTE", "GP", "SG ced", "xG casa", "xGA fora", "SG conq", "GS", "VISITANTE"]
+COLUNAS_TABELA_VISITANTE = ["VISITANTE", "GP", "SG ced", "xG fora", "xGA casa", "SG conq", "GS", "MANDANTE"]
+
+def _tabelas_confrontos(mandantes, visitantes, mand, vis):
+    """Monta as tabelas Mandante/Visitante a partir das métricas de cada lado do confronto."""
+    mand = {col: np.asarray(mand[col]) for col in COLUNAS_METRICAS}
+    vis = {col: np.asarray(vis[col]) for col in COLUNAS_METRICAS}
+
+    tabela_mandante = pd.DataFrame({
+        "MANDANTE": mandantes,
+        "GP": mand['GP'],
+        "SG ced": mand['SG_Ced'],
+        "xG casa": mand['xG'],
+        "xGA fora": vis['xGA'],
+        "SG conq": vis['SG_Conq'],
+        "GS": vis['GS'],
+        "VISITANTE": visitantes,
+    }, columns=COLUNAS_TABELA_MANDANTE)
+
+    tabela_visitante = pd.DataFrame({
+        "VISITANTE": visitantes,
+        "GP": vis['GP'],
+        "SG ced": vis['SG_Ced'],
+        "xG fora": vis['xG'],
+        "xGA casa": mand['xGA'],
+        "SG conq": mand['SG_Conq'],
+        "GS": mand['GS'],
+        "MANDANTE": mandantes,
+    }, columns=COLUNAS_TABELA_VISITANTE)
+
+    return tabela_mandante, tabela_visitante
+
+@telemetry.cronometrado("montar_rodada")
+def montar_tabelas_rodada(df, rodada_alvo, n_jogos, filtro_mando, indice=None):
+    """
+    Monta as tabelas finais (Mandante e Visitante) de uma rodada inteira de uma vez.
+
+    Substitui o laço por confronto: todas as consultas da rodada são resolvidas
+    em lote por consultar_metricas.
+
+    Returns:
+        (df_tabela_mandante, df_tabela_visitante), vazios se a rodada não tiver jogos.
+    """
+    if indice is None:
+        indice = indice_do_df(df)
+
+    rodada_df = df.loc[df['Rodada'] == int(rodada_alvo), ['Mandante', 'Visitante', 'Data']]
+    mandantes = rodada_df['Mandante'].astype(str).to_numpy()
+    visitantes = rodada_df['Visitante'].astype(str).to_numpy()
+    datas = _coluna_datas(rodada_df['Data']).to_numpy()
+    n = len(rodada_df)
+
+    # Mandante sempre analisado "em casa" e visitante "fora" (ataque e defesa usam o mesmo recorte)
+    stats = consultar_metricas(indice, np.concatenate([mandantes, visitantes]), np.concatenate([datas, datas]),
+                               n_jogos, filtro_mando, np.r_[np.ones(n, bool), np.zeros(n, bool)])
+    return _tabelas_confrontos(mandantes, visitantes, stats.iloc[:n], stats.iloc[n:])
+
+# --- CUBO DE MÉTRICAS (rodada x time x N x filtro) ---
+CUBO_VERSAO = 4
+CUBO_N_MAX = 20
+FILTROS_MANDO = ('POR_MANDO', 'TODOS')
+
+@telemetry.cronometrado("construir_cubo")
+def construir_cubo(df, indice=None, n_max=CUBO_N_MAX, linhas=None):
+    """
+    Pré-calcula as métricas de TODOS os confrontos para N = 1..n_max e os dois filtros.
+
+    Uma única passada por filtro: as somas de cada time são acumuladas a partir do
+    jogo mais recente antes da data do confronto (somas prefixadas sobre o histórico
+    do time), e cada passo do acúmulo já é a resposta para o N seguinte.
+
+    Args:
+        linhas: Posições (no df) dos confrontos a calcular. Padrão: todos.
+
+    Returns:
+        DataFrame longo indexado por (Filtro, N, Rodada), com Ordem (posição do
+        confronto no df), Em_Casa, Time (categoria) e as métricas de calcular_metricas
+        nos tipos estreitos de TIPOS_CUBO (consultar_cubo devolve os tipos originais).
+    """
+    if indice is None:
+        indice = indice_do_df(df)
+
+    linhas = np.arange(len(df)) if linhas is None else np.asarray(linhas, dtype=np.int64)
+    confrontos = df[['Rodada', 'Mandante', 'Visitante', 'Data']].iloc[linhas]
+    q = len(confrontos)
+    times = np.concatenate([confrontos['Mandante'].astype(str).to_numpy(), confrontos['Visitante'].astype(str).to_numpy()])
+    datas = np.concatenate([_coluna_datas(confrontos['Data']).to_numpy()] * 2)
+    em_casa = np.r_[np.ones(q, bool), np.zeros(q, bool)]
+    base = {
+        'Rodada': np.tile(confrontos['Rodada'].to_numpy(dtype=np.int64), 2),
+        'Ordem': np.tile(linhas, 2),
+        'Em_Casa': em_casa,
+        'Time': times,
+    }
+
+    partes = []
+    for filtro in FILTROS_MANDO:
+        lo, fim = _fim_historico(indice, times, datas, filtro, em_casa)
+        for n, metricas in _acumular_recortes(indice, lo, fim, n_max):
+            partes.append(pd.DataFrame({'Filtro': filtro, 'N': n, **base, **metricas}))
+
+    if not partes:
+        vazio = pd.DataFrame(columns=['Filtro', 'N', 'Rodada', 'Ordem', 'Em_Casa', 'Time'] + COLUNAS_METRICAS)
+        return vazio.astype({**TIPOS_CUBO, 'Time': 'category'}).set_index(['Filtro', 'N', 'Rodada'])
+
+    return _ordenar_cubo(pd.concat(partes, ignore_index=True))
+
+# Tipos das colunas do cubo em memória: o nome do time é uma categoria (um código por linha em vez
+# de uma string) e as contagens/somas de gols são inteiros estreitos (valores exatos). xG/xGA seguem
+# float64 para as tabelas saírem idênticas. Filtro, N e Rodada ficam no índice (já guardados como códigos).
+TIPOS_CUBO = {'Ordem': np.int32, 'GP': np.int16, 'GS': np.int16, 'SG_Conq': np.int16, 'SG_Ced': np.int16, 'Jogos': np.int16}
+# Tipos devolvidos por consultar_cubo (os mesmos de calcular_metricas)
+TIPOS_METRICAS = {'GP': np.float64, 'GS': np.float64, 'SG_Conq': np.int64, 'SG_Ced': np.int64,
+                  'xG': np.float64, 'xGA': np.float64, 'Jogos': np.int64}
+
+def _ordenar_cubo(cubo):
+    """
+    Ordena o cubo (formato longo, sem índice) por (Filtro, N, Rodada, Ordem, mandante antes)
+    e indexa por (Filtro, N, Rodada) para buscas binárias. Converte as colunas para TIPOS_CUBO.
+    """
+    cubo = cubo.astype({**TIPOS_CUBO, 'Time': 'category'})
+    if isinstance(cubo['Filtro'].dtype, pd.CategoricalDtype):
+        cubo['Filtro'] = cubo['Filtro'].astype(object)
+    rodada = cubo['Rodada'].to_numpy(dtype=np.int64)
+    ordem = cubo['Ordem'].to_numpy(dtype=np.int64)
+    n = cubo['N'].to_numpy(dtype=np.int64)
+    if len(cubo) and (rodada.max() - rodada.min() < (1 << 16)) and ordem.max() < (1 << 31) and n.max() < (1 << 7):
+        # Chave única int64 (ordenar um array só é bem mais barato que o sort multi-coluna do pandas)
+        filtro = (cubo['Filtro'].to_numpy() != FILTROS_MANDO[0]).astype(np.int64) # 'POR_MANDO' < 'TODOS'
+        chave = filtro << 7 | n
+        chave = chave << 16 | (rodada - rodada.min())
+        chave = chave << 31 | ordem
+        chave = chave << 1 | ~cubo['Em_Casa'].to_numpy(dtype=bool)
+        cubo = cubo.iloc[np.argsort(chave, kind='stable')]
+    else:
+        cubo = cubo.sort_values(['Filtro', 'N', 'Rodada', 'Ordem', 'Em_Casa'], ascending=[True, True, True, True, False], kind='mergesort')
+    return cubo.set_index(['Filtro', 'N', 'Rodada'])
+
+@telemetry.cronometrado("consultar_cubo")
+def consultar_cubo(cubo, rodada_alvo, n_jogos, filtro_mando):
+    """
+    Lê do cubo as mesmas tabelas que montar_tabelas_rodada calcularia.
+
+    Returns:
+        (df_tabela_mandante, df_tabela_visitante), vazios se a rodada não tiver jogos.
+    """
+    n_max = int(cubo.index.levels[1].max()) if len(cubo) else 0
+    if not 1 <= int(n_jogos) <= n_max:
+        raise ValueError(f"N={n_jogos} fora do cubo (1..{n_max}). Use montar_tabelas_rodada.")
+    filtro = filtro_mando if filtro_mando == 'POR_MANDO' else 'TODOS'
+
+    chave = (filtro, int(n_jogos), int(rodada_alvo))
+    # Índice ordenado: busca binária pela faixa da chave
+    ini, fim = cubo.index.slice_locs(chave, chave)
+    fatia = cubo.iloc[ini:fim]
+    em_casa = fatia['Em_Casa'].to_numpy(dtype=bool)
+    colunas = {'Time': fatia['Time'].to_numpy(dtype=object),
+               **{col: fatia[col].to_numpy(dtype=TIPOS_METRICAS[col]) for col in COLUNAS_METRICAS}}
+    mand = {col: valores[em_casa] for col, valores in colunas.items()}
+    vis = {col: valores[~em_casa] for col, valores in colunas.items()}
+    return _tabelas_confrontos(mand['Time'], vis['Time'], mand, vis)
+
+def caminho_cubo(caminho_fonte):
+    """Arquivo do cubo persistido ao lado da planilha de origem."""
+    fonte = Path(caminho_fonte)
+    return fonte.with_name(fonte.name + ".cubo.parquet")
+
+def _assinatura_fonte(caminho_fonte):
+    info = os.stat(caminho_fonte)
+    return [CUBO_VERSAO, LOADER_VERSION, info.st_size, info.st_mtime_ns]
+
+# Chave da assinatura da fonte nos metadados do Parquet do cubo
+_META_ASSINATURA = b"cubo_assinatura"
+
+def salvar_cubo(cubo, caminho_fonte):
+    """
+    Persiste o cubo ao lado da planilha em Parquet (tipos preservados), com a assinatura
+    (versões, tamanho e mtime) da fonte nos metadados do arquivo.
+    """
+    if pq is None:
+        raise ImportError("pyarrow não instalado: pip install pyarrow")
+    destino = caminho_cubo(caminho_fonte)
+    tabela = pa.Table.from_pandas(cubo.reset_index(), preserve_index=False)
+    metadados = {**(tabela.schema.metadata or {}), _META_ASSINATURA: json.dumps(_assinatura_fonte(caminho_fonte)).encode()}
+    pq.write_table(tabela.replace_schema_metadata(metadados), destino)
+    return destino
+
+def carregar_cubo(caminho_fonte):
+    """Carrega o cubo persistido. Retorna None se não existir ou se a planilha mudou desde então."""
+    if pq is None:
+        return None
+    destino = caminho_cubo(caminho_fonte)
+    try:
+        # Só o esquema primeiro: cubo desatualizado não chega a ser lido
+        metadados = pq.read_schema(destino).metadata or {}
+        if json.loads(metadados.get(_META_ASSINATURA, b"null")) != _assinatura_fonte(caminho_fonte):
+            return None
+        return pq.read_table(destino).to_pandas().set_index(['Filtro', 'N', 'Rodada'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def obter_cubo(caminho_fonte, df=None):
+    """Carrega o cubo da planilha ou o constrói (e persiste) se estiver ausente/desatualizado."""
+    cubo = carregar_cubo(caminho_fonte)
+    if cubo is None:
+        if df is None:
+            df = load_and_clean_data(caminho_fonte)
+            if isinstance(df, str):
+                return df # Erro
+        cubo = construir_cubo(df)
+        try:
+            if pq is not None:
+                salvar_cubo(cubo, caminho_fonte)
+        except OSError as e:
+            telemetry.aviso("cubo_nao_salvo", arquivo=str(caminho_fonte), erro=str(e))
+    return cubo
+
+# --- INGESTÃO INCREMENTAL (nova versão da planilha) ---
+CHAVE_JOGO = ['Rodada', 'Dia', 'Mandante', 'Visitante']
+COLUNAS_VALORES = ['xG_Casa', 'xG_Visitante', 'Gols_Casa', 'Gols_Visitante']
+
+def _chaves_jogos(df):
+    """MultiIndex (Rodada, Dia, Mandante, Visitante) que identifica cada jogo do df."""
+    dias, _ = _para_dias_array(df['Data'])
+    return pd.MultiIndex.from_arrays([df['Rodada'].to_numpy(dtype=np.int64), dias,
+                                      df['Mandante'].astype(str).to_numpy(), df['Visitante'].astype(str).to_numpy()],
+                                     names=CHAVE_JOGO)
+
+def comparar_versoes(df_antigo, df_novo):
+    """
+    Compara duas versões da planilha limpa pela chave (Rodada, Data, Mandante, Visitante).
+
+    Returns:
+        dict com 'inseridos', 'alterados' e 'removidos' (DataFrames das linhas na versão
+        nova/antiga) e 'times_afetados' (times com algum jogo inserido, alterado ou removido).
+    """
+    chaves_antigas, chaves_novas = _chaves_jogos(df_antigo), _chaves_jogos(df_novo)
+    pos_antiga = chaves_antigas.get_indexer_for(chaves_novas) if chaves_antigas.is_unique else None
+    if pos_antiga is None or not chaves_novas.is_unique:
+        # Jogos repetidos na planilha: não dá para casar linha a linha, tudo conta como alterado
+        inseridos, alterados, removidos = df_novo, df_novo.iloc[0:0], df_antigo
+    else:
+        existe = pos_antiga >= 0
+        inseridos = df_novo[~existe]
+        removidos = df_antigo[~chaves_antigas.isin(chaves_novas)]
+
+        # Alterado: algum valor (xG/gols) diferente, considerando NaN == NaN
+        antigos = df_antigo[COLUNAS_VALORES].to_numpy(dtype=float)[pos_antiga[existe]]
+        novos = df_novo[COLUNAS_VALORES].to_numpy(dtype=float)[existe]
+        mudou = ~((antigos == novos) | (np.isnan(antigos) & np.isnan(novos))).all(axis=1)
+        alterados = df_novo[existe][mudou]
+
+    afetados = set()
+    for parte in (inseridos, alterados, removidos):
+        afetados.update(parte['Mandante'].astype(str))
+        afetados.update(parte['Visitante'].astype(str))
+
+    return {'inseridos': inseridos, 'alterados': alterados, 'removidos': removidos,
+            'times_afetados': sorted(afetados)}
+
+def atualizar_cubo(cubo, df_antigo, df_novo, relatorio, indice_novo=None):
+    """
+    Atualiza o cubo para a nova versão do df recalculando só o que a mudança afeta.
+
+    As métricas de um time num confronto só dependem dos jogos dele ANTERIORES à data
+    do confronto. Então só são recalculados: confrontos novos e, para cada time afetado,
+    os confrontos depois do jogo mais antigo que mudou. O resto é reaproveitado (apenas a
+    posição Ordem é remapeada para o df novo).
+
+    Args:
+        relatorio: Resultado de comparar_versoes(df_antigo, df_novo)
+
+    Returns:
+        (cubo_atualizado, n_confrontos_recalculados)
+    """
+    if indice_novo is None:
+        indice_novo = construir_indice_times(df_novo)
+    n_max = int(cubo.index.levels[1].max()) if len(cubo) else CUBO_N_MAX
+    chaves_antigas, chaves_novas = _chaves_jogos(df_antigo), _chaves_jogos(df_novo)
+    if not (chaves_antigas.is_unique and chaves_novas.is_unique):
+        return construir_cubo(df_novo, indice_novo, n_max=n_max), len(df_novo)
+
+    # Dia do jogo mais antigo que mudou, por time
+    mudancas = pd.concat([relatorio[parte][['Mandante', 'Visitante', 'Data']] for parte in ('inseridos', 'alterados', 'removidos')])
+    dias_mudanca, _ = _para_dias_array(mudancas['Data'])
+    primeira_mudanca = pd.Series(np.r_[dias_mudanca, dias_mudanca],
+                                 index=np.r_[mudancas['Mandante'].astype(str), mudancas['Visitante'].astype(str)])
+    primeira_mudanca = primeira_mudanca[primeira_mudanca >= 0].groupby(level=0).min()
+
+    # Lados (mandante/visitante) de cada confronto novo que precisam ser recalculados
+    q = len(df_novo)
+    dias_novos, _ = _para_dias_array(df_novo['Data'])
+    times_lado = np.r_[df_novo['Mandante'].astype(str).to_numpy(), df_novo['Visitante'].astype(str).to_numpy()]
+    limite = pd.Series(times_lado).map(primeira_mudanca).to_numpy(dtype=float)
+    confronto_novo = chaves_antigas.get_indexer_for(chaves_novas) < 0
+    recalcular_lado = np.r_[confronto_novo, confronto_novo] | (np.r_[dias_novos, dias_novos] > limite)
+    recalcular_lado = recalcular_lado.reshape(2, q) # [0] = mandante, [1] = visitante
+    linhas = np.flatnonzero(recalcular_lado.any(axis=0))
+
+    if len(linhas) > q // 2:
+        # Mudança grande: reconstruir tudo sai mais barato
+        return construir_cubo(df_novo, indice_novo, n_max=n_max), q
+
+    mapa_ordem = chaves_novas.get_indexer_for(chaves_antigas) # posição antiga -> nova (-1 = removido)
+    if len(linhas) == 0 and (mapa_ordem >= 0).all() and (np.diff(mapa_ordem) > 0).all():
+        # Nada a recalcular e a ordem relativa dos confrontos não mudou: só remapeia Ordem
+        cubo = cubo.copy()
+        cubo['Ordem'] = mapa_ordem[cubo['Ordem'].to_numpy()].astype(TIPOS_CUBO['Ordem'])
+        return cubo, 0
+
+    # Reaproveita as linhas antigas cujo confronto continua existindo e não foi marcado
+    antigo = cubo.reset_index()
+    nova_pos = mapa_ordem[antigo['Ordem'].to_numpy()]
+    lado = np.where(antigo['Em_Casa'].to_numpy(dtype=bool), 0, 1)
+    manter = (nova_pos >= 0) & ~recalcular_lado[lado, np.maximum(nova_pos, 0)]
+    mantidas = antigo[manter].copy()
+    mantidas['Ordem'] = nova_pos[manter]
+
+    novas = construir_cubo(df_novo, indice_novo, n_max=n_max, linhas=linhas).reset_index()
+    lado_novo = np.where(novas['Em_Casa'].to_numpy(dtype=bool), 0, 1)
+    novas = novas[recalcular_lado[lado_novo, novas['Ordem'].to_numpy()]]
+
+    return _ordenar_cubo(pd.concat([mantidas, novas], ignore_index=True)), len(linhas)
+
+def aplicar_incremental(anterior, df_novo):
+    """
+    Ingestão incremental: monta os dados derivados da nova versão a partir da anterior.
+
+    Args:
+        anterior: Entrada já processada (dict com 'df', 'indice', 'cubo'), ex.: do cache
+        df_novo: DataFrame limpo da nova versão da planilha
+
+    Returns:
+        dict com 'df', 'indice', 'cubo' e 'relatorio' (comparar_versoes + 'confrontos_recalculados').
+    """
+    relatorio = comparar_versoes(anterior['df'], df_novo)
+    indice = construir_indice_times(df_novo)
+    if not relatorio['times_afetados'] and len(df_novo) == len(anterior['df']):
+        cubo, recalculados = anterior['cubo'], 0
+    else:
+        cubo, recalculados = atualizar_cubo(anterior['cubo'], anterior['df'], df_novo, relatorio, indice)
+    relatorio['confrontos_recalculados'] = recalculados
+    return {'df': df_novo, 'indice': indice, 'cubo': cubo, 'relatorio': relatorio}
+
+# --- ARMAZENAMENTO COLUNAR (Parquet particionado por Liga/Temporada) ---
+COLUNAS_DATASET = ['Rodada', 'Data', 'Mandante', 'xG_Casa', 'Placar', 'xG_Visitante', 'Visitante',
+                   'Gols_Casa', 'Gols_Visitante']
+COLUNAS_PARTICAO = ['Liga', 'Temporada']
+
+def is_colunar(fonte):
+    """True se a fonte for um dataset Parquet (arquivo .parquet/.pq ou diretório particionado)."""
+    nome = getattr(fonte, 'name', str(fonte))
+    if nome.lower().endswith(('.parquet', '.pq')):
+        return True
+    return not hasattr(fonte, 'read') and os.path.isdir(str(fonte))
+
+def exportar_colunar(df, destino, liga="PADRAO", temporada=None):
+    """
+    Grava o DataFrame limpo (de load_and_clean_data) como Parquet tipado, particionado
+    por Liga e Temporada: destino/Liga=.../Temporada=.../*.parquet.
+
+    Sem coluna Temporada no df, usa a temporada informada ou, sem ela, uma partição só
+    (TEMPORADA_NAO_INFORMADA): o ano da Data partiria temporadas que viram o ano, e o
+    Parquet perderia histórico que a mesma planilha mantém.
+
+    Partições existentes da mesma Liga/Temporada são substituídas; as demais são mantidas.
+    """
+    if pq is None:
+        raise ImportError("pyarrow não instalado: pip install pyarrow")
+
+    dados = df.copy()
+    dados['Data'] = _coluna_datas(dados['Data'])
+    if 'Liga' not in dados.columns:
+        dados['Liga'] = liga
+    if 'Temporada' not in dados.columns:
+        dados['Temporada'] = np.int16(temporada if temporada is not None else TEMPORADA_NAO_INFORMADA)
+    for col in ('Mandante', 'Visitante'):
+        dados[col] = dados[col].astype('category') # Dicionário no Parquet
+
+    tabela = pa.Table.from_pandas(dados[COLUNAS_DATASET + COLUNAS_PARTICAO], preserve_index=False)
+    pq.write_to_dataset(tabela, root_path=str(destino), partition_cols=COLUNAS_PARTICAO,
+                        existing_data_behavior='delete_matching')
+    return destino
+
+@telemetry.cronometrado("carregar_colunar")
+def carregar_colunar(origem, ligas=None, temporadas=None):
+    """
+    Lê o dataset Parquet (memory-mapped) no mesmo formato de load_and_clean_data,
+    com as colunas extras Liga e Temporada.
+
+    Args:
+        origem: Diretório particionado, arquivo .parquet ou upload do Streamlit
+        ligas / temporadas: Listas opcionais para ler apenas essas partições
+    """
+    filtros = []
+    if ligas:
+        filtros.append(('Liga', 'in', list(ligas)))
+    if temporadas:
+        filtros.append(('Temporada', 'in', [int(t) for t in temporadas]))
+
+    em_disco = not hasattr(origem, 'read')
+    if not em_disco and hasattr(origem, 'seek'): origem.seek(0)
+    tabela = pq.read_table(str(origem) if em_disco else origem, memory_map=em_disco,
+                           filters=filtros or None, partitioning='hive')
+    df = tabela.to_pandas()
+
+    # Colunas de dicionário voltam como category: devolve texto comum, como na planilha
+    for col in ('Mandante', 'Visitante', 'Liga'):
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    # Datasets exportados antes do cadastro de times podem ter outras grafias
+    df['Mandante'] = REGISTRY.canonicalizar(df['Mandante'])
+    df['Visitante'] = REGISTRY.canonicalizar(df['Visitante'])
+    if 'Temporada' in df.columns:
+        df['Temporada'] = df['Temporada'].astype('int16')
+    if not pd.api.types.is_datetime64_any_dtype(df['Data']):
+        df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+    df['Rodada'] = df['Rodada'].astype(int)
+
+    # Ordenação por DATA (Regra de Ouro) e Rodada, como no carregamento da planilha
+    df.sort_values(by=['Data', 'Rodada'], ascending=[True, True], inplace=True, kind='mergesort')
+    return df.reset_index(drop=True)
+
+# --- ESQUEMA COMPACTO (opcional, para manter várias ligas/temporadas em memória) ---
+def compactar_dataframe(df, times=None):
+    """
+    Converte o DataFrame limpo para o esquema compacto.
+
+    Mandante/Visitante viram category sobre um único dicionário de times (mesmos códigos
+    nas duas colunas), gols viram Int8 (nulo = jogo sem placar), xG float32, Rodada Int16
+    e Data o número de dias desde 1970 (Int32, nulo = sem data). Placar e Liga viram category.
+    As funções deste módulo (calcular_metricas, índice, cubo, incremental) aceitam os dois esquemas.
+
+    Args:
+        times: Dicionário de times já existente (sequência de nomes), para compartilhar os
+            códigos entre vários DataFrames. Times que não estiverem nele entram no fim.
+    """
+    dados = df.copy()
+    presentes = pd.unique(pd.concat([dados['Mandante'], dados['Visitante']], ignore_index=True).astype(str))
+    if times is None:
+        nomes = sorted(presentes)
+    else:
+        conhecidos = set(times)
+        nomes = list(times) + sorted(t for t in presentes if t not in conhecidos)
+    dicionario = pd.CategoricalDtype(nomes)
+    for col in ('Mandante', 'Visitante'):
+        dados[col] = dados[col].astype(str).astype(dicionario)
+
+    for col in ('Gols_Casa', 'Gols_Visitante'):
+        dados[col] = dados[col].astype('Int8')
+    for col in ('xG_Casa', 'xG_Visitante'):
+        dados[col] = dados[col].astype('float32')
+    dados['Rodada'] = dados['Rodada'].astype('Int16')
+
+    dias, invalidas = _para_dias_array(dados['Data'])
+    dados['Data'] = pd.arrays.IntegerArray(np.where(invalidas, 0, dias).astype(np.int32), invalidas)
+
+    for col in ('Placar', 'Liga'):
+        if col in dados.columns and dados[col].dtype == object:
+            dados[col] = dados[col].astype('category')
+    return dados
+
+def relatorio_memoria(df):
+    """
+    Memória ocupada por coluna (bytes reais, incluindo o conteúdo dos textos).
+
+    Returns:
+        DataFrame indexado pela coluna, com 'Tipo' e 'Bytes' e uma linha 'TOTAL' no fim.
+    """
+    uso = df.memory_usage(deep=True, index=True)
+    relatorio = pd.DataFrame({'Tipo': [str(df[col].dtype) if col in df.columns else '' for col in uso.index],
+                              'Bytes': uso.to_numpy()}, index=uso.index)
+    relatorio.loc['TOTAL'] = ['', int(uso.sum())]
+    return relatorio
+
+# --- CACHE DE PLANILHAS (compartilhado entre reruns e sessões do processo) ---
+CACHE_PLANILHAS = LRUCache(max_bytes=int(os.environ.get("CACHE_PLANILHAS_MB", "512")) * 1024 ** 2, name="planilhas")
+
+class _ErroCarga(Exception):
+    """Erro de carga (mensagem de load_and_clean_data): não deve ser guardado no cache."""
+
+def _ler_bytes(arquivo):
+    """Retorna (conteúdo, nome) de um upload do Streamlit, arquivo aberto ou caminho local."""
+    nome = getattr(arquivo, 'name', str(arquivo))
+    if hasattr(arquivo, 'getvalue'):
+        return arquivo.getvalue(), nome
+    if hasattr(arquivo, 'read'):
+        if hasattr(arquivo, 'seek'): arquivo.seek(0)
+        return arquivo.read(), nome
+    with open(arquivo, 'rb') as f:
+        return f.read(), nome
+
+# Hash de cada upload do Streamlit (pelo file_id): os reruns não copiam nem hasheiam o arquivo de novo
+HASH_UPLOADS = LRUCache(max_items=256, name="hash_uploads")
+
+def _hash_arquivo(arquivo):
+    """
+    Returns:
+        (sha256 do conteúdo, conteúdo): o conteúdo é None quando o hash veio de HASH_UPLOADS.
+    """
+    def _ler_e_hashear():
+        conteudo, _ = _ler_bytes(arquivo)
+        return hashlib.sha256(conteudo).hexdigest(), conteudo
+
+    file_id = getattr(arquivo, 'file_id', None)
+    if file_id is None:
+        return _ler_e_hashear()
+    lido = []
+    def _hash_upload():
+        lido[:] = _ler_e_hashear()
+        return lido[0]
+    hash_conteudo = HASH_UPLOADS.get_or_create(file_id, _hash_upload, size=0)
+    return hash_conteudo, (lido[1] if lido else None)
+
+def varios_recortes(df):
+    """True se o df tiver mais de uma Liga ou Temporada (analisado um recorte por vez, carregar_recorte)."""
+    return 'Liga' in df.columns and (df['Liga'].nunique() > 1 or df['Temporada'].nunique() > 1)
+
+def carregar_planilha_cache(arquivo, anterior=None, compacto=False):
+    """
+    Carrega a planilha pelo cache de conteúdo (hash dos bytes + LOADER_VERSION).
+
+    Reenviar o mesmo arquivo, ou abri-lo em outra aba/sessão, não paga o parse de novo.
+
+    Args:
+        arquivo: Upload do Streamlit, arquivo aberto ou caminho
+        anterior: Entrada da versão anterior da mesma planilha (opcional). Se o arquivo
+            ainda não estiver no cache, os dados derivados são atualizados de forma
+            incremental (aplicar_incremental). O resultado ganha um 'relatorio' das mudanças
+            desde a anterior, só para quem chamou (não entra na entrada compartilhada).
+        compacto: Guarda o df no esquema compacto (compactar_dataframe).
+
+    Returns:
+        dict com 'chave', 'hash', 'nome', 'df' (DataFrame limpo), 'indice' (construir_indice_times)
+        e 'cubo' (construir_cubo), ou a mensagem de erro (str) de load_and_clean_data.
+        Com várias ligas/temporadas (varios_recortes), 'indice' e 'cubo' são None: cada
+        recorte monta os seus em carregar_recorte.
+        O conteúdo é compartilhado entre sessões: trate-o como somente leitura.
+    """
+    nome = getattr(arquivo, 'name', str(arquivo))
+    hash_conteudo, conteudo = _hash_arquivo(arquivo)
+    chave = (hash_conteudo, LOADER_VERSION, Path(nome).suffix.lower(), bool(compacto))
+    relatorio = None
+
+    def _processar():
+        nonlocal relatorio
+        buffer = io.BytesIO(conteudo if conteudo is not None else _ler_bytes(arquivo)[0])
+        buffer.name = nome
+        df = load_and_clean_data(buffer)
+        if isinstance(df, str):
+            telemetry.aviso("planilha_invalida", arquivo=nome, erro=df)
+            raise _ErroCarga(df)
+        telemetry.log("planilha_carregada", arquivo=nome, jogos=len(df), compacto=bool(compacto))
+        if compacto:
+            df = compactar_dataframe(df)
+        base = {'chave': chave, 'hash': hash_conteudo, 'nome': nome}
+        if varios_recortes(df):
+            # Índice/cubo globais misturariam rodadas de ligas e temporadas diferentes
+            return {**base, 'df': df, 'indice': None, 'cubo': None}
+        if _incremental_possivel(anterior, df, hash_conteudo):
+            entrada = aplicar_incremental(anterior, df)
+            relatorio = entrada.pop('relatorio')
+            return {**base, **entrada}
+        indice = construir_indice_times(df)
+        return {**base, 'df': df, 'indice': indice, 'cubo': construir_cubo(df, indice)}
+
+    try:
+        dados = CACHE_PLANILHAS.get_or_create(chave, _processar)
+    except _ErroCarga as e:
+        return str(e)
+    if anterior is None or anterior['chave'] == chave:
+        return dados
+    if relatorio is None and _incremental_possivel(anterior, dados['df'], hash_conteudo):
+        # Nova versão já estava no cache (outra sessão): só compara, nada foi recalculado aqui
+        relatorio = {**comparar_versoes(anterior['df'], dados['df']), 'confrontos_recalculados': 0}
+    return dados if relatorio is None else {**dados, 'relatorio': relatorio}
+
+def _incremental_possivel(anterior, df, hash_conteudo):
+    """
+    A versão anterior serve de base para a nova: conteúdo diferente, mesmo esquema (colunas
+    e tipos), cubo global nas duas e ao menos metade dos jogos da anterior ainda presentes
+    (mesma Rodada, Dia, Mandante e Visitante). O mesmo arquivo só trocando o modo
+    compacto não conta (xG float32 x float64 faria todos os jogos parecerem alterados), nem
+    uma planilha de outra liga/temporada (todos os jogos inseridos e removidos).
+    """
+    return (anterior is not None and anterior['cubo'] is not None and not varios_recortes(df)
+            and anterior['hash'] != hash_conteudo and anterior['df'].dtypes.equals(df.dtypes)
+            and _chaves_jogos(anterior['df']).isin(_chaves_jogos(df)).mean() >= 0.5)
+
+def carregar_recorte(dados, liga, temporada):
+    """
+    Recorte de uma Liga/Temporada de um dataset multi-liga (Parquet ou Excel com várias abas),
+    com índice e cubo próprios.
+
+    As rodadas se repetem entre ligas e temporadas, então cada recorte é analisado
+    separadamente. Índice e cubo são montados só quando o recorte é pedido, e ficam no
+    cache presos ao hash do arquivo de origem.
+    """
+    def _processar():
+        df = dados['df']
+        df = df[(df['Liga'] == liga) & (df['Temporada'] == temporada)].reset_index(drop=True)
+        indice = construir_indice_times(df)
+        return {'chave': chave, 'hash': dados['hash'], 'nome': f"{dados['nome']} [{liga} {temporada}]", 'df': df,
+                'indice': indice, 'cubo': construir_cubo(df, indice)}
+
+    chave = (dados['hash'], LOADER_VERSION, 'recorte', liga, temporada)
+    return CACHE_PLANILHAS.get_or_create(chave, _processar)
+
 # --- BLOCO DE LEITURA E VALIDAÇÃO ---
 if __name__ == "__main__":
-    df = load_and_clean_data(CSV_PATH)
+    # Fonte: planilha (CSV/Excel) ou dataset Parquet. Ex.: python data_processor.py dados/partidas
+    # --exportar: grava também a planilha limpa no dataset colunar (DATASET_PATH)
+    argumentos = [a for a in sys.argv[1:] if a != '--exportar']
+    exportar = len(argumentos) < len(sys.argv) - 1
+    fonte = argumentos[0] if argumentos else CSV_PATH
+    df = load_and_clean_data(fonte)
     
     if isinstance(df, str):
         print(df) # Erro
@@ -247,6 +1256,7 @@ if __name__ == "__main__":
         # Teste Rápido: Rodada 2
         rodada_test = 2
         confrontos = get_confrontos_rodada(df, rodada_test)
+        indice = construir_indice_times(df)
         
         if len(confrontos) > 0:
             jogo_teste = confrontos[0]
@@ -254,13 +1264,36 @@ if __name__ == "__main__":
             print(f"Jogo: {jogo_teste['Mandante']} x {jogo_teste['Visitante']} (Data: {jogo_teste['Data_Jogo']})")
             
             # Recorte Últimos 3 (Exemplo)
-            stats_mand = calcular_metricas(df, jogo_teste['Mandante'], jogo_teste['Data_Jogo'], 3, 'POR_MANDO', True)
-            stats_vis = calcular_metricas(df, jogo_teste['Visitante'], jogo_teste['Data_Jogo'], 3, 'POR_MANDO', False)
+            stats_mand = calcular_metricas(df, jogo_teste['Mandante'], jogo_teste['Data_Jogo'], 3, 'POR_MANDO', True, indice=indice)
+            stats_vis = calcular_metricas(df, jogo_teste['Visitante'], jogo_teste['Data_Jogo'], 3, 'POR_MANDO', False, indice=indice)
             
             print(f"\nStats {jogo_teste['Mandante']} (Casa):")
             print(stats_mand)
             
             print(f"\nStats {jogo_teste['Visitante']} (Fora):")
             print(stats_vis)
+
+            # Cubo persistido ao lado da planilha (reconstruído só se ela mudar)
+            cubo = obter_cubo(fonte, df)
+            tabela_mand, _ = consultar_cubo(cubo, rodada_test, 3, 'POR_MANDO')
+            print(f"\n=== TABELA MANDANTES (cubo: {caminho_cubo(fonte)}) ===")
+            print(tabela_mand)
         else:
             print(f"Nenhum confronto encontrado para rodada {rodada_test}")
+
+        # Exporta a planilha limpa para o dataset colunar (próximas cargas em milissegundos)
+        if exportar and pq is not None and not is_colunar(fonte):
+            exportar_colunar(df, DATASET_PATH, *_rotulo_aba(Path(fonte).stem))
+            print(f"\nDataset Parquet atualizado em: {DATASET_PATH}")
+
+        # Memória: esquema original x compacto
+        memoria = relatorio_memoria(df).join(relatorio_memoria(compactar_dataframe(df)), rsuffix=' compacto')
+        print("\n=== MEMÓRIA (bytes por coluna) ===")
+        print(memoria)
+
+        # Mesmo arquivo, só trocando o modo compacto: não é uma nova versão (sem relatório de mudanças)
+        if not is_colunar(fonte):
+            normal = carregar_planilha_cache(fonte)
+            compacta = carregar_planilha_cache(fonte, anterior=normal, compacto=True)
+            assert 'relatorio' not in compacta, "modo compacto gerou relatório de mudanças"
+            print("\nModo compacto x normal: sem relatório de mudanças (ok)")
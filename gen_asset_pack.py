@@ -0,0 +1,53 @@
+import sys
+import base64
+import argparse
+import unicodedata
+from pathlib import Path
+
+from asset_pack import ASSET_PACK_PATH, write_pack
+
+# Gera o pacote binário de imagens (assets/assets.pack) a partir de assets/logos e assets/teams.
+# Substitui o antigo gen_base64.py / image_data.py. Ex.:
+#   python gen_asset_pack.py
+#   python gen_asset_pack.py --image-data caminho/para/image_data.py   (converte o banco Base64 antigo)
+
+base_dir = Path(__file__).resolve().parent
+assets_dir = base_dir / "assets"
+
+def sanitize_name(name):
+    """Remove acentos e espaços para compatibilidade com arquivos."""
+    if not name: return ""
+    n = unicodedata.normalize('NFKD', str(name)).encode('ASCII', 'ignore').decode('ASCII')
+    # Lowercase, troca espaços e hífens por underscore, remove duplos
+    return n.lower().replace(" ", "_").replace("-", "_").strip("_")
+
+def coletar_assets():
+    """Chaves no mesmo padrão do banco antigo: logo_<nome> e team_<nome>."""
+    items = {}
+    for pasta, prefixo in (("logos", "logo"), ("teams", "team")):
+        for img in sorted((assets_dir / pasta).glob("*.png")):
+            items[f"{prefixo}_{sanitize_name(img.stem)}"] = img.read_bytes()
+    return items
+
+def converter_image_data(caminho):
+    """Lê o IMAGES (Base64) de um image_data.py antigo sem importá-lo como módulo."""
+    escopo = {}
+    exec(compile(Path(caminho).read_text(encoding="utf-8"), str(caminho), "exec"), escopo)
+    return {key: base64.b64decode(valor) for key, valor in escopo["IMAGES"].items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o pacote binário de imagens (logos e escudos).")
+    parser.add_argument("--image-data", help="Converte um image_data.py (Base64) existente")
+    parser.add_argument("--saida", default=str(ASSET_PACK_PATH), help=f"Arquivo de saída (padrão: {ASSET_PACK_PATH})")
+    args = parser.parse_args()
+
+    print("Gerando pacote de imagens...")
+    items = converter_image_data(args.image_data) if args.image_data else {}
+    items.update(coletar_assets()) # Arquivos em assets/ têm prioridade
+    if not items:
+        print(f"Nenhuma imagem encontrada em {assets_dir / 'logos'} ou {assets_dir / 'teams'}.")
+        sys.exit(1)
+
+    versao = write_pack(items, args.saida)
+    total = sum(len(v) for v in items.values())
+    print(f"Sucesso! {len(items)} imagens ({total / 1024 ** 2:.1f} MB) em {args.saida} (versão {versao})")
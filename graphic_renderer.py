@@ -1,38 +1,97 @@
-import matplotlib.pyplot as plt
+import matplotlib
+from matplotlib.patches import Rectangle
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import matplotlib.font_manager as fm
-import matplotlib.image as mpimg
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
-import matplotlib.colors as mcolors
 import pandas as pd
 import os
 import io
-import base64
+import time
+import zipfile
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import unicodedata
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
+import hashlib
+import logging
+
+import telemetry
+import cache
+from cache import LRUCache, DiskCache
+from asset_pack import open_pack, pack_version
+from team_registry import REGISTRY
+# Motor de cores das tabelas (sem matplotlib: também usado pelas tabelas do app)
+from heatmap import COLOR_RULES_MANDANTE, COLOR_RULES_VISITANTE, COLOR_NEUTRAL, column_colors
+
+# Pacote binário de imagens (assets/assets.pack): só o índice é lido aqui, cada imagem sob demanda
 try:
-    from image_data import IMAGES
-    print(f"[INIT] Banco de imagens IMAGES carregado com {len(IMAGES)} chaves.")
-except ImportError:
-    print("[INIT] AVISO: image_data.py não encontrado. Usando banco vazio.")
-    IMAGES = {}
+    IMAGES = open_pack()
 except Exception as e:
-    print(f"[INIT] ERRO ao carregar image_data.py: {e}")
+    telemetry.erro("pacote_imagens_invalido", erro=str(e))
     IMAGES = {}
 
-def get_image_from_base64(key):
-    """Converte string Base64 do banco de dados para objeto de imagem do Matplotlib/PIL."""
+def get_image(key):
+    """Abre a imagem da chave (PNG do pacote) como objeto PIL."""
     if key not in IMAGES: return None
     try:
-        img_data = base64.b64decode(IMAGES[key])
-        return Image.open(io.BytesIO(img_data))
-    except:
+        return Image.open(io.BytesIO(IMAGES[key]))
+    except Exception:
         return None
 
+# Compatibilidade com o nome antigo (banco em Base64)
+get_image_from_base64 = get_image
+
+def assets_version():
+    """Versão do pacote de imagens em uso (muda quando gen_asset_pack.py gera um pacote novo)."""
+    return pack_version(IMAGES)
+
+# --- CACHE DE IMAGENS DECODIFICADAS ---
+# Compartilhado pelo processo inteiro (todas as sessões/renderizações): cada escudo/logo é
+# decodificado (PNG do pacote -> RGBA) uma única vez e reaproveitado como array pronto para desenhar.
+CACHE_IMAGENS = LRUCache(max_bytes=int(os.environ.get("CACHE_IMAGENS_MB", "128")) * 1024 ** 2, name="imagens")
+
+class _ImagemAusente(Exception):
+    """Chave inexistente ou imagem corrompida: não é guardada no cache."""
+
+def get_image_array(key):
+    """Retorna a imagem da chave como array RGBA (somente leitura), decodificando só na primeira vez."""
+    def _decodificar():
+        with telemetry.etapa("decodificar_imagem", logging.DEBUG, chave=key):
+            img = get_image(key)
+            if img is None:
+                raise _ImagemAusente(key)
+            arr = np.array(img.convert('RGBA'))
+            arr.setflags(write=False) # Compartilhado entre renderizações
+        telemetry.contar("imagens_decodificadas")
+        return arr
+
+    try:
+        return CACHE_IMAGENS.get_or_create(key, _decodificar)
+    except _ImagemAusente:
+        return None
+
+def warm_image_cache(keys=None):
+    """
+    Pré-decodifica as imagens (todas do banco se keys=None) para a primeira arte não pagar a decodificação.
+    Chaves já em cache são puladas (sem contar hits). Retorna quantas imagens estão prontas.
+    """
+    prontas = 0
+    for key in (IMAGES.keys() if keys is None else keys):
+        if key in CACHE_IMAGENS or get_image_array(key) is not None:
+            prontas += 1
+    return prontas
+
+def image_cache_stats():
+    """Contadores do cache de imagens (itens, bytes, hits, misses, evictions, hit_rate)."""
+    return CACHE_IMAGENS.stats()
+
 # --- CONFIGURAÇÕES DE DIRETÓRIOS ---
-# (Mantidos apenas para compatibilidade, o foco agora é Base64)
+# (Mantidos apenas para compatibilidade, as imagens vêm do pacote assets/assets.pack)
 BASE_DIR = Path(__file__).resolve().parent
 
 # --- CARREGAR FONTE ---
@@ -45,7 +104,7 @@ try:
         # Tenta fallback para sans-serif se arquivo não existir
         prop = fm.FontProperties(family='sans-serif', weight='bold')
 except Exception as e:
-    print(f"[INIT] Erro ao carregar fonte {font_path}: {e}")
+    telemetry.erro("fonte_invalida", arquivo=str(font_path), erro=str(e))
     prop = fm.FontProperties(family='sans-serif', weight='normal')
 
 # --- CONFIGURAÇÕES DE ESTILO ---
@@ -54,73 +113,45 @@ COLOR_HEADER_BG = "#1A4D2E"
 COLOR_HEADER_TEXT = "#FFFFFF"
 COLOR_TABLE_HEADER_BG = "#000000"
 COLOR_TABLE_HEADER_TEXT = "#FFFFFF"
-CMAP_RYG = mcolors.LinearSegmentedColormap.from_list("RYG", ["#ff6666", "#ffff99", "#66cc66"])
-
-COLOR_RULES_MANDANTE = {
-    'GP': True, 'SG ced': True, 'XG casa': True, 'XGA fora': True, 'SG conq': True, 'GS': True
-}
-COLOR_RULES_VISITANTE = {
-    'GP': False, 'SG ced': True, 'XG fora': False, 'XGA casa': False, 'SG conq': True, 'GS': False
-}
-
-def get_conditional_color(value, column_values, higher_is_better=True):
-    try:
-        valid_values = [float(v) for v in column_values if pd.notna(v) and str(v).replace('.','',1).isdigit()]
-        if not valid_values: return "#FFFFFF"
-        val = float(value)
-        min_v, max_v = min(valid_values), max(valid_values)
-        if max_v == min_v: return "#FFFF99"
-        norm = (val - min_v) / (max_v - min_v)
-        if not higher_is_better: norm = 1 - norm
-        return mcolors.rgb2hex(CMAP_RYG(norm))
-    except (ValueError, TypeError):
-        return "#FFFFFF"
 
 def sanitize_name(name):
     """UNIFICADO: Remove acentos e espaços para compatibilidade com arquivos."""
     if not name: return ""
-    import unicodedata
     n = unicodedata.normalize('NFKD', str(name)).encode('ASCII', 'ignore').decode('ASCII')
     # Lowercase, troca espaços e hífens por underscore, remove duplos
     return n.lower().replace(" ", "_").replace("-", "_").strip("_")
 
+# Chave do escudo por ID canônico do time (cada time é procurado no pacote uma única vez)
+_LOGO_POR_TIME = {}
+
 def get_team_logo_path(team_name):
-    """Busca o escudo do time no banco de dados Base64."""
+    """Busca o escudo do time no pacote de imagens pelo ID do cadastro de times."""
     if not team_name: return None
-    
-    # Mapa de nomes curtos para chaves do banco de dados (Apenas underscore agora)
-    MAPA_SIMPLIFICADO = {
-        "atletico_m": "atletico_mg", "atletico": "atletico_mg", 
-        "botafogo": "botafogo", "chapeco": "chapecoense",
-        "bragant": "red_bull_bragantino", "red_bull": "red_bull_bragantino",
-        "vasco": "vasco", "vitoria": "vitoria", "gremio": "gremio", "palmeiras": "palmeiras",
-        "flamengo": "flamengo", "fluminense": "fluminense", "sao_paulo": "sao_paulo",
-        "santos": "santos", "cruzeiro": "cruzeiro", "bahia": "bahia", "inter": "internacional",
-        "corinth": "corinthians", "coritiba": "coritiba", "mirassol": "mirassol",
-        "remo": "remo", "athletico": "athletico_pr"
-    }
-    
-    sanitized = sanitize_name(team_name)
-    for key, filename in MAPA_SIMPLIFICADO.items():
-        if key in sanitized:
-            return f"team_{filename}"
+    id_time = REGISTRY.resolve(team_name)
+    if id_time in _LOGO_POR_TIME:
+        return _LOGO_POR_TIME[id_time]
 
-    target = f"team_{sanitized}"
-    if target in IMAGES: return target
-    
+    target = f"team_{REGISTRY.chave(id_time)}"
+    sanitized = sanitize_name(team_name)
+    parecido = REGISTRY.chave_escudo(team_name)
+    logo = None
+    if target in IMAGES: logo = target
     # Tenta tbm sem o prefixo team_ se o sanitized já for o alvo
-    if sanitized in IMAGES: return sanitized
-    
-    print(f"[LOG] Escudo não encontrado no DB para: '{team_name}' (Tentativa: {target})")
-    return None
+    elif sanitized in IMAGES: logo = sanitized
+    # Regras antigas por trecho do nome: só o escudo, o time continua sendo outro
+    elif parecido and f"team_{parecido}" in IMAGES: logo = f"team_{parecido}"
+    else:
+        telemetry.aviso("escudo_ausente", time=str(team_name), chave=target)
+    _LOGO_POR_TIME[id_time] = logo
+    return logo
 
 def add_image(ax, key_or_img, x, y, zoom=0.1, zorder=10):
-    """Adiciona imagem ao gráfico usando a chave do banco Base64."""
+    """Adiciona imagem ao gráfico usando a chave do pacote de imagens."""
     img = None
     if isinstance(key_or_img, str):
-        img = get_image_from_base64(key_or_img)
+        img = get_image_array(key_or_img)
         if img is None:
-            print(f"[LOG] Falha total ao carregar chave: {key_or_img}")
+            telemetry.aviso("imagem_ausente", chave=key_or_img)
             return
     else:
         img = key_or_img # Já é um objeto de imagem
@@ -136,121 +167,623 @@ def add_image(ax, key_or_img, x, y, zoom=0.1, zorder=10):
         ab = AnnotationBbox(OffsetImage(img, zoom=zoom, resample=True), (x, y), frameon=False, xycoords='axes fraction', zorder=zorder)
         ax.add_artist(ab)
     except Exception as e:
-        print(f"[LOG] Erro ao renderizar objeto de imagem {key_or_img}: {e}")
+        telemetry.aviso("imagem_invalida", chave=str(key_or_img), erro=str(e))
+
+# --- LAYOUT DA ARTE ---
+FIGSIZE = (12, 19)
+OUTPUT_DPI = 400 # DPI aumentado para 400 (arte final / download)
+PREVIEW_DPI = 100 # Pré-visualização na tela: ~16x menos pixels
+HEADER_Y = 0.94
+FOOTER_H = 0.035
+TABLE_ROW_H = 0.033
+TABLE_COL_W = [0.1, 0.08, 0.08, 0.12, 0.12, 0.12, 0.08, 0.1]
+TABLE_X_START = 0.09
+# Ajuste fino de zoom: Global 0.035, com exceção para times com logos "altos"
+TEAM_ZOOM, TEAM_ZOOM_TALL = 0.035, 0.032
+TALL_LOGO_TEAMS = ["São Paulo", "Fluminense"]
+_TALL_LOGO_IDS = {REGISTRY.resolve(nome) for nome in TALL_LOGO_TEAMS}
+# Logos fixos: (chave, x, y, zoom, zorder), em fração dos eixos
+HEADER_LOGOS = [("logo_logo_tcc", 0.1, HEADER_Y, 0.07, 15), ("logo_logo_tcc", 0.9, HEADER_Y, 0.07, 15)]
+FOOTER_LOGOS = [("logo_logo_tcc_branco", 0.1, FOOTER_H/2, 0.045, 25), ("logo_logo_tcc_branco", 0.9, FOOTER_H/2, 0.045, 25)]
 
-def generate_infographic(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro):
+def _table_headers(is_mandante):
+    cols = ["TIME", "GP", "SG ced", "XG", "XGA", "SG conq", "GS", "ADV"]
+    if is_mandante:
+        cols[0], cols[3], cols[4], cols[7] = "CASA", "XG casa", "XGA fora", "FORA"
+    else:
+        cols[0], cols[3], cols[4], cols[7] = "FORA", "XG fora", "XGA casa", "CASA"
+    return cols
+
+def _table_layout(n_mandante, n_visitante):
+    """
+    Posições (fração dos eixos) das duas tabelas, comuns a todos os backends.
+
+    Returns:
+        (xs, tabelas): xs = início de cada coluna; tabelas = [(is_mandante, y do cabeçalho, [y de cada linha])].
+    """
+    xs, curr_x = [], TABLE_X_START
+    for w in TABLE_COL_W:
+        xs.append(curr_x)
+        curr_x += w
+
+    tables, start_y = [], 0.88
+    for is_mandante, n_rows in ((True, n_mandante), (False, n_visitante)):
+        curr_y = start_y - 0.03
+        header_y, rows_y = curr_y, []
+        for _ in range(n_rows):
+            curr_y -= TABLE_ROW_H
+            rows_y.append(curr_y)
+        tables.append((is_mandante, header_y, rows_y))
+        # Layout Vertical Ajustado (Subi tudo para dar espaço na base)
+        start_y = curr_y - 0.06
+    return xs, tables
+
+def _prepare_tables(df_mandante, df_visitante):
+    """Ordena as tabelas (mandantes por xG casa, visitantes por xGA casa) e seleciona as 8 colunas na ordem da arte."""
     m_col = 'XG casa' if 'XG casa' in df_mandante.columns else 'xG casa'
     v_col = 'XGA casa' if 'XGA casa' in df_visitante.columns else 'xGA casa'
-    
+
     df_mandante = df_mandante.sort_values(m_col, ascending=False).reset_index(drop=True)
     df_visitante = df_visitante.sort_values(v_col, ascending=True).reset_index(drop=True)
-    
-    # Aumentei a altura para 20 e DPI para 400 para nitidez máxima
-    fig, ax = plt.subplots(figsize=(12, 19))
-    # Fundo (Background) via Base64
-    bg_img = get_image_from_base64("logo_background")
-    if bg_img:
-        try:
-            ax.imshow(bg_img, extent=[0, 1, 0, 1], aspect='auto', zorder=-1)
-        except Exception as e:
-            print(f"[LOG] Erro ao carregar fundo: {e}")
-            fig.patch.set_facecolor(COLOR_BG)
-    else:
-        fig.patch.set_facecolor(COLOR_BG)
-    ax.set_axis_off()
-
-    header_y = 0.94
-    # Ajustado largura para 0.6 e mantido altura para Decalotype
-    ax.add_patch(plt.Rectangle((0.2, header_y - 0.027), 0.6, 0.055, color=COLOR_HEADER_BG, transform=ax.transAxes))
-    ax.text(0.5, header_y, f"ANÁLISE XG E XGA – RODADA {rodada_num}", ha="center", va="center", color="white", fontproperties=prop, fontsize=24, transform=ax.transAxes)
-
-    # Logos do Cabeçalho - Usando DB Base64
-    add_image(ax, "logo_logo_tcc", 0.1, header_y, zoom=0.07, zorder=15)
-    add_image(ax, "logo_logo_tcc", 0.9, header_y, zoom=0.07, zorder=15)
-
-    def draw_table(df, start_y, is_mandante):
-        cols = ["TIME", "GP", "SG ced", "XG", "XGA", "SG conq", "GS", "ADV"]
-        if is_mandante:
-            cols[0], cols[3], cols[4], cols[7] = "CASA", "XG casa", "XGA fora", "FORA"
-            inner_cols = ["MANDANTE", "GP", "SG ced", m_col, 'xGA fora' if 'xGA fora' in df.columns else 'XGA fora', "SG conq", "GS", "VISITANTE"]
-            df_v = df[inner_cols].copy()
+
+    inner_m = ["MANDANTE", "GP", "SG ced", m_col, 'xGA fora' if 'xGA fora' in df_mandante.columns else 'XGA fora', "SG conq", "GS", "VISITANTE"]
+    inner_v = ["VISITANTE", "GP", "SG ced", 'xG fora' if 'xG fora' in df_visitante.columns else 'XG fora', v_col, "SG conq", "GS", "MANDANTE"]
+    return df_mandante[inner_m].copy(), df_visitante[inner_v].copy()
+
+def _format_cell(i, val):
+    # Formatação final:
+    # GP (1) e GS (6) -> Números INTEIROS (sem vírgula/ponto)
+    # xG (3) e xGA (4) -> 2 casas decimais
+    if isinstance(val, (float, int)):
+        if i in [1, 6]:
+            return str(int(val))
+        elif i in [3, 4]:
+            return f"{val:.2f}"
+    return str(val)
+
+def _cell_contents(df_v, is_mandante):
+    """
+    Conteúdo de cada célula da tabela, independente do backend.
+
+    Returns:
+        Lista de linhas; cada linha é uma lista de (cor de fundo, texto, chave do escudo, zoom).
+        Colunas de time têm chave do escudo (texto vazio) ou, sem escudo no banco, o nome abreviado.
+    """
+    cols = _table_headers(is_mandante)
+    rules = COLOR_RULES_MANDANTE if is_mandante else COLOR_RULES_VISITANTE
+    # Cores das colunas de métricas calculadas de uma vez por coluna
+    colors = {i: column_colors(df_v.iloc[:, i], rules.get(cols[i], True)) for i in range(1, 7)}
+
+    rows = []
+    for r, items in enumerate(df_v.itertuples(index=False)):
+        cells = []
+        for i, val in enumerate(items):
+            bg = colors[i][r] if 1 <= i <= 6 else COLOR_NEUTRAL
+            if i == 0 or i == 7:
+                logo = get_team_logo_path(val)
+                # Sem escudo no banco: nome abreviado no lugar
+                zoom = TEAM_ZOOM_TALL if REGISTRY.resolve(val) in _TALL_LOGO_IDS else TEAM_ZOOM
+                cells.append((bg, "" if logo else str(val)[:10], logo, zoom))
+            else:
+                cells.append((bg, _format_cell(i, val), None, None))
+        rows.append(cells)
+    return rows
+
+def _legend_text(n_jogos, tipo_filtro):
+    # Legenda Centralizada Dinâmica em Única Linha (sem a palavra "últimos", conforme pedido)
+    filtro_desc = "por mando" if tipo_filtro == 'POR_MANDO' else "gerais"
+    return f"{n_jogos} rodadas {filtro_desc}  |  GP - gols pró  |  sg cedido  |  sg conquistado  |  gols sofridos"
+
+# Imagem vazia para os escudos ainda não preenchidos
+_EMPTY_IMAGE = np.zeros((1, 1, 4), dtype=np.uint8)
+
+class InfographicRenderer:
+    """
+    Renderizador da arte em "modo retido".
+
+    A figura (fundo, cabeçalho, tabelas com todas as células, escudos e rodapé) é montada
+    uma única vez para um número de linhas (mandantes, visitantes). Cada render() só troca
+    textos, cores de fundo das células e imagens dos escudos antes de salvar, em vez de
+    recriar centenas de patches, textos e AnnotationBbox.
+    """
+
+    def __init__(self, n_mandante, n_visitante):
+        self.shape = (n_mandante, n_visitante)
+        self._bbox = {} # dpi -> área de recorte (bbox_inches='tight' já calculado)
+        self.lock = threading.Lock() # Uma figura só pode ser desenhada por vez
+        # Figure sem pyplot: não entra no gerenciador global de figuras (nada a fechar)
+        self.fig = Figure(figsize=FIGSIZE)
+        FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot()
+
+        # Fundo (Background) via pacote de imagens
+        bg_img = get_image_array("logo_background")
+        if bg_img is not None:
+            try:
+                ax.imshow(bg_img, extent=[0, 1, 0, 1], aspect='auto', zorder=-1)
+            except Exception as e:
+                telemetry.aviso("fundo_invalido", erro=str(e))
+                self.fig.patch.set_facecolor(COLOR_BG)
         else:
-            cols[0], cols[3], cols[4], cols[7] = "FORA", "XG fora", "XGA casa", "CASA"
-            inner_cols = ["VISITANTE", "GP", "SG ced", 'xG fora' if 'xG fora' in df.columns else 'XG fora', v_col, "SG conq", "GS", "MANDANTE"]
-            df_v = df[inner_cols].copy()
+            self.fig.patch.set_facecolor(COLOR_BG)
+        ax.set_axis_off()
 
-        # Spacing e proporções
-        row_h, col_w, x_s = 0.033, [0.1, 0.08, 0.08, 0.12, 0.12, 0.12, 0.08, 0.1], 0.09
-        curr_y = start_y - 0.03
-        
-        # Legenda Centralizada Dinâmica em Única Linha
-        filtro_desc = "por mando" if tipo_filtro == 'POR_MANDO' else "gerais"
-        legenda_txt = f"{n_jogos} rodadas {filtro_desc}  |  GP - gols pró  |  sg cedido  |  sg conquistado  |  gols sofridos"
-        # Tabela Mandante (GP... GS) | Tabela Visitantes (GP... GS)
-        # Removido a palavra "últimos" conforme pedido
-        
-        ax.text(0.5, curr_y + row_h + 0.008, legenda_txt, ha="center", va="bottom", color="#444444", fontproperties=prop, fontsize=10, transform=ax.transAxes)
+        # Ajustado largura para 0.6 e mantido altura para Decalotype
+        ax.add_patch(Rectangle((0.2, HEADER_Y - 0.027), 0.6, 0.055, color=COLOR_HEADER_BG, transform=ax.transAxes))
+        self.title = ax.text(0.5, HEADER_Y, "", ha="center", va="center", color="white", fontproperties=prop, fontsize=24, transform=ax.transAxes)
+
+        # Logos do Cabeçalho - Usando o pacote de imagens
+        for key, x, y, zoom, zorder in HEADER_LOGOS:
+            add_image(ax, key, x, y, zoom=zoom, zorder=zorder)
+
+        self.tables = []
+        xs, tables = _table_layout(n_mandante, n_visitante)
+        for is_mandante, header_y, rows_y in tables:
+            self._build_table(xs, header_y, rows_y, is_mandante)
+
+        # Rodapé
+        ax.add_patch(Rectangle((0, 0), 1, FOOTER_H, color=COLOR_HEADER_BG, transform=ax.transAxes, zorder=20))
+        ax.text(0.5, FOOTER_H/2, "MATERIAL EXCLUSIVO DO TCC", ha="center", va="center", color="white", fontproperties=prop, fontsize=14, transform=ax.transAxes, zorder=21)
+
+        # Rodapé via pacote de imagens
+        for key, x, y, zoom, zorder in FOOTER_LOGOS:
+            add_image(ax, key, x, y, zoom=zoom, zorder=zorder)
+
+    def _build_table(self, xs, header_y, rows_y, is_mandante):
+        """Cria os artistas de uma tabela (legenda, cabeçalho e as linhas ainda vazias)."""
+        ax = self.ax
+        cols = _table_headers(is_mandante)
+        row_h, col_w = TABLE_ROW_H, TABLE_COL_W
+
+        legend = ax.text(0.5, header_y + row_h + 0.008, "", ha="center", va="bottom", color="#444444", fontproperties=prop, fontsize=10, transform=ax.transAxes)
 
         # Header com bordas mais grossas
-        curr_x = x_s
         for i, col in enumerate(cols):
-            ax.add_patch(plt.Rectangle((curr_x, curr_y), col_w[i], row_h, color=COLOR_TABLE_HEADER_BG, ec="white", lw=2.5, transform=ax.transAxes, zorder=3))
-            ax.text(curr_x + col_w[i]/2, curr_y + row_h/2, col, ha="center", va="center", color="white", fontproperties=prop, fontsize=14, weight=500, transform=ax.transAxes, zorder=4)
-            curr_x += col_w[i]
-
-        column_data = {i: df_v.iloc[:, i].tolist() for i in range(1, 7)}
-        rules = COLOR_RULES_MANDANTE if is_mandante else COLOR_RULES_VISITANTE
-
-        for _, row in df_v.iterrows():
-            curr_y -= row_h
-            curr_x = x_s
-            items = list(row.values)
-            for i, val in enumerate(items):
-                bg = "#FFFFFF"
-                if 1 <= i <= 6:
-                    bg = get_conditional_color(val, column_data[i], rules.get(cols[i], True))
-                
-                ax.add_patch(plt.Rectangle((curr_x, curr_y), col_w[i], row_h, color=bg, ec="black", lw=0.5, transform=ax.transAxes))
-                
+            ax.add_patch(Rectangle((xs[i], header_y), col_w[i], row_h, color=COLOR_TABLE_HEADER_BG, ec="white", lw=2.5, transform=ax.transAxes, zorder=3))
+            ax.text(xs[i] + col_w[i]/2, header_y + row_h/2, col, ha="center", va="center", color="white", fontproperties=prop, fontsize=14, weight=500, transform=ax.transAxes, zorder=4)
+
+        rows = []
+        for curr_y in rows_y:
+            cells = []
+            for i in range(len(cols)):
+                center = (xs[i] + col_w[i]/2, curr_y + row_h/2)
+                rect = ax.add_patch(Rectangle((xs[i], curr_y), col_w[i], row_h, color="#FFFFFF", ec="black", lw=0.5, transform=ax.transAxes))
                 if i == 0 or i == 7:
-                    logo = get_team_logo_path(val)
-                    if logo:
-                        # Ajuste fino de zoom: Global 0.035, com exceção para times com logos "altos"
-                        team_zoom = 0.032 if val in ["São Paulo", "Fluminense"] else 0.035
-                        add_image(ax, logo, curr_x + col_w[i]/2, curr_y + row_h/2, zoom=team_zoom, zorder=3)
-                    else:
-                        ax.text(curr_x + col_w[i]/2, curr_y + row_h/2, str(val)[:10], ha="center", va="center", fontproperties=prop, fontsize=12, transform=ax.transAxes)
+                    # Escudo (imagem trocada a cada render) + texto de reserva se não houver escudo
+                    image = OffsetImage(_EMPTY_IMAGE, zoom=TEAM_ZOOM, resample=True)
+                    box = AnnotationBbox(image, center, frameon=False, xycoords='axes fraction', zorder=3)
+                    ax.add_artist(box)
+                    text = ax.text(*center, "", ha="center", va="center", fontproperties=prop, fontsize=12, transform=ax.transAxes)
+                    cells.append((rect, text, image, box))
                 else:
-                    # Formatação final:
-                    # GP (1) e GS (6) -> Números INTEIROS (sem vírgula/ponto)
-                    # xG (3) e xGA (4) -> 2 casas decimais
-                    if isinstance(val, (float, int)):
-                        if i in [1, 6]:
-                            txt = str(int(val))
-                        elif i in [3, 4]:
-                            txt = f"{val:.2f}"
-                        else:
-                            txt = str(val)
-                    else:
-                        txt = str(val)
-                    ax.text(curr_x + col_w[i]/2, curr_y + row_h/2, txt, ha="center", va="center", fontproperties=prop, fontsize=14, weight=500, transform=ax.transAxes)
-                curr_x += col_w[i]
-        return curr_y
-
-    # Layout Vertical Ajustado (Subi tudo para dar espaço na base)
-    y_pos = draw_table(df_mandante, 0.88, True) 
-    draw_table(df_visitante, y_pos - 0.06, False) 
-
-    # Rodapé
-    footer_h = 0.035
-    ax.add_patch(plt.Rectangle((0, 0), 1, footer_h, color=COLOR_HEADER_BG, transform=ax.transAxes, zorder=20))
-    ax.text(0.5, footer_h/2, "MATERIAL EXCLUSIVO DO TCC", ha="center", va="center", color="white", fontproperties=prop, fontsize=14, transform=ax.transAxes, zorder=21)
-    
-    # Rodapé via Base64
-    add_image(ax, "logo_logo_tcc_branco", 0.1, footer_h/2, zoom=0.045, zorder=25)
-    add_image(ax, "logo_logo_tcc_branco", 0.9, footer_h/2, zoom=0.045, zorder=25)
-    
-    out = str(BASE_DIR / f"Analise_R{rodada_num}.png")
-    plt.savefig(out, dpi=400, bbox_inches='tight') # DPI aumentado para 400
-    plt.close()
+                    text = ax.text(*center, "", ha="center", va="center", fontproperties=prop, fontsize=14, weight=500, transform=ax.transAxes)
+                    cells.append((rect, text, None, None))
+            rows.append(cells)
+
+        self.tables.append({'legend': legend, 'rows': rows})
+
+    def _fill_table(self, table, df_v, is_mandante, legend):
+        table['legend'].set_text(legend)
+        for cells, contents in zip(table['rows'], _cell_contents(df_v, is_mandante)):
+            for (rect, text, image, box), (bg, txt, logo, zoom) in zip(cells, contents):
+                rect.set_facecolor(bg)
+                text.set_text(txt)
+                if image is None:
+                    continue
+
+                img = get_image_array(logo) if logo else None
+                if logo and img is None:
+                    telemetry.aviso("imagem_ausente", chave=logo)
+                if img is not None:
+                    image.set_data(img)
+                    image.set_zoom(zoom)
+                box.set_visible(img is not None)
+                text.set_visible(not logo)
+
+    def render(self, df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, out=None, dpi=OUTPUT_DPI):
+        """Preenche a figura com as tabelas da rodada e salva o PNG. Retorna o caminho do arquivo."""
+        df_m, df_v = _prepare_tables(df_mandante, df_visitante)
+        if (len(df_m), len(df_v)) != self.shape:
+            raise ValueError(f"Renderizador montado para {self.shape} linhas, recebeu {(len(df_m), len(df_v))}.")
+
+        legend = _legend_text(n_jogos, tipo_filtro)
+        out = out or str(BASE_DIR / f"Analise_R{rodada_num}.png")
+        with self.lock:
+            with telemetry.etapa("arte_tabelas", backend="matplotlib"):
+                self.title.set_text(f"ANÁLISE XG E XGA – RODADA {rodada_num}")
+                self._fill_table(self.tables[0], df_m, True, legend)
+                self._fill_table(self.tables[1], df_v, False, legend)
+            with telemetry.etapa("arte_salvar_png", backend="matplotlib", dpi=dpi):
+                self.fig.savefig(out, dpi=dpi, bbox_inches=self._tight_bbox(dpi))
+        return out
+
+    def _tight_bbox(self, dpi):
+        """
+        Recorte equivalente a bbox_inches='tight', calculado uma vez por dpi.
+
+        Tudo o que encosta nas bordas (fundo, logos, rodapé) é fixo e os textos variáveis
+        ficam dentro dos eixos, então o recorte não muda entre renders. Calcular aqui
+        (só medidas, sem desenhar) evita o desenho extra que o 'tight' faz a cada savefig.
+        """
+        if dpi not in self._bbox:
+            dpi_original = self.fig.dpi
+            self.fig.set_dpi(dpi)
+            try:
+                bbox = self.fig.get_tightbbox(self.fig.canvas.get_renderer())
+            finally:
+                self.fig.set_dpi(dpi_original)
+            self._bbox[dpi] = bbox.padded(matplotlib.rcParams['savefig.pad_inches'])
+        return self._bbox[dpi]
+
+# Renderizadores já montados, por número de linhas (mandantes, visitantes), compartilhados pelo processo
+RENDERERS = LRUCache(max_items=int(os.environ.get("RENDERERS_MAX", "4")), name="renderizadores")
+
+def get_renderer(n_mandante, n_visitante):
+    """Renderizador montado para o número de linhas (cria na primeira vez)."""
+    def _montar():
+        with telemetry.etapa("arte_montar_figura", backend="matplotlib", linhas=[n_mandante, n_visitante]):
+            return InfographicRenderer(n_mandante, n_visitante)
+    return RENDERERS.get_or_create((n_mandante, n_visitante), _montar, size=_tamanho_renderizador)
+
+def _tamanho_renderizador(renderer):
+    """Estimativa da memória de um renderizador: o buffer RGBA do canvas Agg na arte final (OUTPUT_DPI, recortada)."""
+    bbox = renderer._tight_bbox(OUTPUT_DPI)
+    return int(bbox.width * bbox.height * OUTPUT_DPI ** 2 * 4)
+
+# --- BACKEND PILLOW (camada estática em cache, só tabelas/textos/escudos por arte) ---
+# Fonte (arquivo) usada pelo matplotlib, para o Pillow desenhar com a mesma
+FONT_FILE = fm.findfont(prop)
+# Pad padrão do AnnotationBbox (0.4 x fonte de 10 pt): entra no recorte 'tight' do matplotlib
+_ANNOTATION_PAD_PT = 4.0
+
+# Camadas estáticas por (linhas, dpi, pacote): ~70 MB cada a 400 dpi
+STATIC_LAYERS = LRUCache(max_bytes=int(os.environ.get("CACHE_CAMADAS_MB", "256")) * 1024 ** 2, name="camadas_estaticas")
+# Escudos/logos já redimensionados para o tamanho final
+SCALED_IMAGES = LRUCache(max_bytes=int(os.environ.get("CACHE_ESCUDOS_MB", "64")) * 1024 ** 2, name="escudos_escalados")
+# Fontes do Pillow por (tamanho, dpi): poucas combinações, mas limitadas como os outros recursos
+FONTES = LRUCache(max_items=int(os.environ.get("FONTES_MAX", "32")), name="fontes")
+
+def _font(size_pt, dpi):
+    return FONTES.get_or_create((size_pt, dpi), lambda: ImageFont.truetype(FONT_FILE, size_pt * dpi / 72), size=0)
+
+def _scaled_image(key, zoom, dpi):
+    """Imagem da chave redimensionada como o OffsetImage faria (pixels x zoom x dpi/72), em cache."""
+    def _escalar():
+        arr = get_image_array(key)
+        if arr is None:
+            raise _ImagemAusente(key)
+        size = (max(1, round(arr.shape[1] * zoom * dpi / 72)), max(1, round(arr.shape[0] * zoom * dpi / 72)))
+        return Image.fromarray(arr).resize(size, Image.LANCZOS)
+
+    try:
+        return SCALED_IMAGES.get_or_create((key, zoom, dpi, assets_version()), _escalar,
+                                           size=lambda img: img.width * img.height * 4)
+    except _ImagemAusente:
+        return None
+
+class _PillowCanvas:
+    """
+    Geometria da arte em pixels: mesmo recorte que o savefig(bbox_inches='tight') do matplotlib
+    (eixos + caixas dos logos fixos + savefig.pad_inches) e a conversão fração dos eixos -> pixel.
+    """
+
+    def __init__(self, dpi):
+        self.dpi = dpi
+        fig_w, fig_h = FIGSIZE
+        rc = matplotlib.rcParams
+        ax_x0, ax_x1 = rc['figure.subplot.left'] * fig_w, rc['figure.subplot.right'] * fig_w
+        ax_y0, ax_y1 = rc['figure.subplot.bottom'] * fig_h, rc['figure.subplot.top'] * fig_h
+
+        x0, y0, x1, y1 = ax_x0, ax_y0, ax_x1, ax_y1
+        for key, x, y, zoom, _ in HEADER_LOGOS + FOOTER_LOGOS:
+            arr = get_image_array(key)
+            if arr is None:
+                continue
+            half_w = (arr.shape[1] * zoom + 2 * _ANNOTATION_PAD_PT) / 72 / 2
+            half_h = (arr.shape[0] * zoom + 2 * _ANNOTATION_PAD_PT) / 72 / 2
+            cx, cy = ax_x0 + x * (ax_x1 - ax_x0), ax_y0 + y * (ax_y1 - ax_y0)
+            x0, x1 = min(x0, cx - half_w), max(x1, cx + half_w)
+            y0, y1 = min(y0, cy - half_h), max(y1, cy + half_h)
+        pad = rc['savefig.pad_inches']
+        x0, y0, x1, y1 = x0 - pad, y0 - pad, x1 + pad, y1 + pad
+
+        self.size = (int((x1 - x0) * dpi), int((y1 - y0) * dpi))
+        self.origin = ((ax_x0 - x0) * dpi, (y1 - ax_y1) * dpi) # canto superior esquerdo dos eixos
+        self.axes_size = ((ax_x1 - ax_x0) * dpi, (ax_y1 - ax_y0) * dpi)
+
+    def point(self, x, y):
+        return (self.origin[0] + x * self.axes_size[0], self.origin[1] + (1 - y) * self.axes_size[1])
+
+    def box(self, x, y, w, h, grow=0):
+        """Caixa (esq, topo, dir, base) em pixels inteiros de um retângulo em fração dos eixos."""
+        left, top = self.point(x, y + h)
+        right, bottom = self.point(x + w, y)
+        return (round(left - grow), round(top - grow), round(right + grow) - 1, round(bottom + grow) - 1)
+
+    def lw(self, points):
+        return max(1, round(points * self.dpi / 72))
+
+    def paste_image(self, img, key, x, y, zoom):
+        logo = _scaled_image(key, zoom, self.dpi)
+        if logo is None:
+            telemetry.aviso("imagem_ausente", chave=key)
+            return
+        cx, cy = self.point(x, y)
+        img.paste(logo, (round(cx - logo.width / 2), round(cy - logo.height / 2)), logo)
+
+def _pillow_static_layer(n_mandante, n_visitante, dpi):
+    """
+    Camada fixa da arte (fundo, faixa do título, logos, cabeçalhos das tabelas e rodapé), em cache.
+
+    Returns:
+        dict com 'canvas' (_PillowCanvas), 'image' (PIL RGB) e 'headers' (caixas dos cabeçalhos
+        das tabelas, que ficam por cima das células e são restauradas depois de desenhá-las).
+    """
+    @telemetry.cronometrado("arte_montar_figura")
+    def _montar():
+        canvas = _PillowCanvas(dpi)
+        bg_img = get_image_array("logo_background")
+        img = Image.new("RGB", canvas.size, "#FFFFFF" if bg_img is not None else COLOR_BG)
+        if bg_img is not None:
+            fundo = Image.fromarray(bg_img).convert("RGB").resize(tuple(round(v) for v in canvas.axes_size), Image.LANCZOS)
+            img.paste(fundo, tuple(round(v) for v in canvas.origin))
+        draw = ImageDraw.Draw(img)
+
+        draw.rectangle(canvas.box(0.2, HEADER_Y - 0.027, 0.6, 0.055), fill=COLOR_HEADER_BG)
+        for key, x, y, zoom, _ in HEADER_LOGOS:
+            canvas.paste_image(img, key, x, y, zoom)
+
+        headers = []
+        xs, tables = _table_layout(n_mandante, n_visitante)
+        border = canvas.lw(2.5) # Header com bordas mais grossas (brancas, centradas na borda da célula)
+        for is_mandante, header_y, _ in tables:
+            for i, col in enumerate(_table_headers(is_mandante)):
+                box = canvas.box(xs[i], header_y, TABLE_COL_W[i], TABLE_ROW_H, grow=border / 2)
+                draw.rectangle(box, fill=COLOR_TABLE_HEADER_BG, outline="white", width=border)
+                draw.text(canvas.point(xs[i] + TABLE_COL_W[i]/2, header_y + TABLE_ROW_H/2), col, fill="white",
+                          font=_font(14, dpi), anchor="mm")
+                headers.append(box)
+
+        draw.rectangle(canvas.box(0, 0, 1, FOOTER_H), fill=COLOR_HEADER_BG)
+        draw.text(canvas.point(0.5, FOOTER_H/2), "MATERIAL EXCLUSIVO DO TCC", fill="white", font=_font(14, dpi), anchor="mm")
+        for key, x, y, zoom, _ in FOOTER_LOGOS:
+            canvas.paste_image(img, key, x, y, zoom)
+        return {'canvas': canvas, 'image': img, 'headers': headers}
+
+    return STATIC_LAYERS.get_or_create((n_mandante, n_visitante, dpi, assets_version()), _montar,
+                                       size=lambda layer: layer['image'].width * layer['image'].height * 3)
+
+def render_infographic_pillow(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, out=None, dpi=OUTPUT_DPI):
+    """
+    Backend Pillow: mesma arte do matplotlib, desenhada direto em pixels.
+
+    A camada estática é rasterizada uma vez por (linhas, dpi) e reaproveitada; por arte só
+    são desenhados título, legendas, células, textos e escudos (já redimensionados, em cache).
+    """
+    df_m, df_v = _prepare_tables(df_mandante, df_visitante)
+    layer = _pillow_static_layer(len(df_m), len(df_v), dpi)
+    canvas, base = layer['canvas'], layer['image']
+    img = base.copy()
+    draw = ImageDraw.Draw(img)
+
+    with telemetry.etapa("arte_tabelas", backend="pillow"):
+        draw.text(canvas.point(0.5, HEADER_Y), f"ANÁLISE XG E XGA – RODADA {rodada_num}", fill="white", font=_font(24, dpi), anchor="mm")
+        legend = _legend_text(n_jogos, tipo_filtro)
+
+        xs, tables = _table_layout(len(df_m), len(df_v))
+        edge = canvas.lw(0.5)
+        for (is_mandante, header_y, rows_y), df_t in zip(tables, (df_m, df_v)):
+            draw.text(canvas.point(0.5, header_y + TABLE_ROW_H + 0.008), legend, fill="#444444", font=_font(10, dpi), anchor="md")
+            for curr_y, cells in zip(rows_y, _cell_contents(df_t, is_mandante)):
+                for i, (bg, txt, logo, zoom) in enumerate(cells):
+                    draw.rectangle(canvas.box(xs[i], curr_y, TABLE_COL_W[i], TABLE_ROW_H, grow=edge / 2), fill=bg, outline="black", width=edge)
+                    center = (xs[i] + TABLE_COL_W[i]/2, curr_y + TABLE_ROW_H/2)
+                    if logo:
+                        canvas.paste_image(img, logo, *center, zoom)
+                    elif txt:
+                        draw.text(canvas.point(*center), txt, fill="black", font=_font(12 if i in (0, 7) else 14, dpi), anchor="mm")
+
+        # Cabeçalhos das tabelas ficam por cima das células (borda grossa)
+        for box in layer['headers']:
+            area = (box[0], box[1], box[2] + 1, box[3] + 1)
+            img.paste(base.crop(area), area[:2])
+
+    out = out or str(BASE_DIR / f"Analise_R{rodada_num}.png")
+    with telemetry.etapa("arte_salvar_png", backend="pillow", dpi=dpi):
+        img.save(out, "PNG")
     return out
+
+# Backend padrão de generate_infographic ('matplotlib' ou 'pillow')
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "matplotlib")
+
+def generate_infographic(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, backend=None, out=None, dpi=OUTPUT_DPI):
+    """
+    Gera a arte da rodada. Retorna out: por padrão o caminho BASE_DIR/Analise_R{rodada}.png,
+    mas out também pode ser outro caminho ou um arquivo em memória (BytesIO).
+    Para uso no app prefira render_png (sem disco).
+    """
+    backend = backend or RENDER_BACKEND
+    if backend not in ("matplotlib", "pillow"):
+        raise ValueError(f"Backend de renderização desconhecido: {backend}")
+    with telemetry.etapa("gerar_arte", backend=backend, dpi=dpi, rodada=str(rodada_num)):
+        if backend == "pillow":
+            return render_infographic_pillow(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, out=out, dpi=dpi)
+        renderer = get_renderer(len(df_mandante), len(df_visitante))
+        return renderer.render(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, out=out, dpi=dpi)
+
+# --- CACHE DE ARTES (endereçado pelo conteúdo) ---
+# Incrementar sempre que o desenho da arte mudar, para invalidar as artes já em cache
+RENDERER_VERSION = 2
+# Dois níveis: memória do processo (rápido, pequeno) e disco (compartilhado entre processos/reinícios)
+RENDER_CACHE = LRUCache(max_bytes=int(os.environ.get("CACHE_ARTES_MB", "64")) * 1024 ** 2, name="artes")
+RENDER_CACHE_DISK = DiskCache(os.environ.get("CACHE_ARTES_DIR", str(BASE_DIR / "dados" / "cache_artes")),
+                              max_bytes=int(os.environ.get("CACHE_ARTES_DISCO_MB", "512")) * 1024 ** 2, name="artes_disco")
+
+def render_cache_key(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, dpi, backend):
+    """Hash do conteúdo das duas tabelas + parâmetros da arte + versões do pacote de imagens e do renderizador."""
+    h = hashlib.sha256()
+    for df in (df_mandante, df_visitante):
+        h.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(repr((str(rodada_num), int(n_jogos), tipo_filtro, int(dpi), backend, assets_version(), RENDERER_VERSION)).encode("utf-8"))
+    return h.hexdigest()
+
+def render_png(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, dpi=OUTPUT_DPI, backend=None, use_cache=True):
+    """
+    Gera a arte em memória e devolve os bytes do PNG (nada é gravado em disco, então
+    duas sessões gerando a mesma rodada não disputam o mesmo arquivo).
+
+    Use PREVIEW_DPI para a pré-visualização na tela e OUTPUT_DPI para o download.
+    Artes idênticas (mesmas tabelas e parâmetros) saem do cache de memória ou de disco;
+    pedidos simultâneos da mesma arte esperam a primeira renderização.
+    """
+    def _render():
+        telemetry.contar("artes_renderizadas")
+        buffer = io.BytesIO()
+        generate_infographic(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, backend=backend, out=buffer, dpi=dpi)
+        return buffer.getvalue()
+
+    if not use_cache:
+        return _render()
+
+    backend = backend or RENDER_BACKEND
+    key = render_cache_key(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, dpi, backend)
+
+    def _do_disco_ou_render():
+        png = RENDER_CACHE_DISK.get(key)
+        if png is None:
+            png = _render()
+            try:
+                RENDER_CACHE_DISK.put(key, png)
+            except OSError as e: # Disco cheio/somente leitura: segue só com o cache em memória
+                telemetry.aviso("cache_disco_falhou", erro=str(e))
+        return png
+
+    return RENDER_CACHE.get_or_create(key, _do_disco_ou_render)
+
+def render_cache_stats():
+    """Contadores dos dois níveis do cache de artes."""
+    return {'memoria': RENDER_CACHE.stats(), 'disco': RENDER_CACHE_DISK.stats()}
+
+# --- GERAÇÃO EM LOTE (várias artes em paralelo, em processos) ---
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Cada processo do pool tem cópias próprias de todos os caches: o limite somado de cada um
+# (RENDER_PROCESSO_CACHE_MB) fica bem abaixo do CACHE_TOTAL_MB do servidor
+LIMITE_PROCESSO_RENDER_MB = int(os.environ.get("RENDER_PROCESSO_CACHE_MB", "256"))
+
+def _iniciar_processo_render(limite_mb=LIMITE_PROCESSO_RENDER_MB):
+    """Inicializador dos processos do pool: reduz o limite total e o de cada cache do processo."""
+    limite = limite_mb * 1024 ** 2
+    cache.LIMITE_TOTAL_BYTES = limite
+    for lru in (CACHE_IMAGENS, STATIC_LAYERS, SCALED_IMAGES, RENDER_CACHE):
+        lru.max_bytes = min(lru.max_bytes, limite)
+
+def get_render_pool(max_workers=None):
+    """
+    Pool de processos compartilhado (criado no primeiro lote e reaproveitado, com os
+    caches de imagens/camadas de cada processo já aquecidos). Usa todos os núcleos por padrão.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: processos limpos, sem herdar threads do servidor (Streamlit)
+            _POOL = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=mp.get_context("spawn"),
+                                        initializer=_iniciar_processo_render, initargs=(LIMITE_PROCESSO_RENDER_MB,))
+        return _POOL
+
+def shutdown_render_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(cancel_futures=True)
+            _POOL = None
+
+def batch_filename(rodada_num, n_jogos, tipo_filtro):
+    return f"Analise_R{rodada_num}_N{n_jogos}_{tipo_filtro}.png"
+
+def _render_job(job, df_mandante, df_visitante, backend, dpi=OUTPUT_DPI, use_cache=True):
+    """Executado no processo do pool: renderiza uma arte em memória. Retorna (job, png, segundos)."""
+    rodada_num, n_jogos, tipo_filtro = job
+    inicio = time.perf_counter()
+    png = render_png(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, dpi=dpi, backend=backend, use_cache=use_cache)
+    return job, png, time.perf_counter() - inicio
+
+def iter_batch(jobs, get_tables, backend=None, max_workers=None, dpi=OUTPUT_DPI, use_cache=True):
+    """
+    Gera várias artes em paralelo, entregando cada uma assim que fica pronta (ordem de conclusão).
+
+    Só as artes ainda não consumidas ficam em memória: quem itera pode gravar cada PNG
+    e descartá-lo (ex.: lote de linha de comando). Os argumentos são os de generate_batch.
+
+    Yields:
+        (resultado, png): resultado com 'rodada', 'n_jogos', 'tipo_filtro', 'arquivo', 'segundos'
+        e 'erro' (None se gerou); png são os bytes da arte ou None em caso de erro.
+    """
+    jobs = list(dict.fromkeys((int(r), int(n), f) for r, n, f in jobs))
+
+    def _resultado(job, segundos=0.0, erro=None):
+        return {'rodada': job[0], 'n_jogos': job[1], 'tipo_filtro': job[2], 'arquivo': batch_filename(*job),
+                'segundos': segundos, 'erro': erro}
+
+    tarefas = []
+    for job in jobs:
+        df_m, df_v = get_tables(*job)
+        if df_m.empty:
+            yield _resultado(job, erro="Sem jogos na rodada"), None
+        else:
+            tarefas.append((job, df_m, df_v))
+
+    if max_workers == 1 or len(tarefas) <= 1:
+        for job, df_m, df_v in tarefas:
+            try:
+                job, png, segundos = _render_job(job, df_m, df_v, backend, dpi, use_cache)
+                yield _resultado(job, segundos), png
+            except Exception as e:
+                yield _resultado(job, erro=f"{type(e).__name__}: {e}"), None
+        return
+
+    pool = get_render_pool(max_workers)
+    futuros = {pool.submit(_render_job, job, df_m, df_v, backend, dpi, use_cache): job for job, df_m, df_v in tarefas}
+    del tarefas
+    for futuro in as_completed(futuros):
+        job = futuros.pop(futuro) # Solta a referência: o PNG sai da memória quando o consumidor descartá-lo
+        try:
+            job, png, segundos = futuro.result()
+            yield _resultado(job, segundos), png
+        except Exception as e:
+            yield _resultado(job, erro=f"{type(e).__name__}: {e}"), None
+
+def generate_batch(jobs, get_tables, backend=None, max_workers=None, on_progress=None):
+    """
+    Gera várias artes em paralelo e devolve um único ZIP.
+
+    Args:
+        jobs: Lista de (rodada, n_jogos, tipo_filtro). Jobs repetidos são gerados uma vez.
+        get_tables: Função (rodada, n_jogos, tipo_filtro) -> (df_mandante, df_visitante),
+            chamada no processo atual (ex.: data_processor.consultar_cubo sobre o cubo da planilha)
+        backend: 'matplotlib' ou 'pillow' (padrão: RENDER_BACKEND)
+        max_workers: Processos do pool (padrão: todos os núcleos). 1 = sem pool, no processo atual.
+        on_progress: Função chamada a cada arte concluída com (resultado, concluídas, total)
+
+    Returns:
+        (zip_bytes, resultados): um resultado por job, na ordem de jobs, com 'rodada', 'n_jogos',
+        'tipo_filtro', 'arquivo', 'segundos' (tempo de renderização) e 'erro' (None se gerou).
+    """
+    ordem = list(dict.fromkeys((int(r), int(n), f) for r, n, f in jobs))
+    resultados, pngs = {}, {}
+    for resultado, png in iter_batch(ordem, get_tables, backend=backend, max_workers=max_workers):
+        job = (resultado['rodada'], resultado['n_jogos'], resultado['tipo_filtro'])
+        resultados[job] = resultado
+        if png is not None:
+            pngs[job] = png
+        if on_progress:
+            on_progress(resultado, len(resultados), len(ordem))
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf: # PNG já é comprimido
+        for job in ordem:
+            if job in pngs:
+                zf.writestr(resultados[job]['arquivo'], pngs[job])
+    return buffer.getvalue(), [resultados[job] for job in ordem]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Motor de cores (heatmap por coluna) das tabelas de análise.
+# Só depende de NumPy/pandas: as tabelas do app são coloridas sem carregar o matplotlib.
+# graphic_renderer usa as mesmas funções na arte, então tabela e arte têm sempre as mesmas cores.
+
+# Escala vermelho -> amarelo -> verde (a do antigo colormap "RYG" do matplotlib)
+CORES_RYG = ["#ff6666", "#ffff99", "#66cc66"]
+COLOR_NEUTRAL = "#FFFFFF" # Célula sem número
+COLOR_FLAT = "#FFFF99" # Coluna com todos os valores iguais
+
+COLOR_RULES_MANDANTE = {
+    'GP': True, 'SG ced': True, 'XG casa': True, 'XGA fora': True, 'SG conq': True, 'GS': True
+}
+COLOR_RULES_VISITANTE = {
+    'GP': False, 'SG ced': True, 'XG fora': False, 'XGA casa': False, 'SG conq': True, 'GS': False
+}
+
+def _tabela_cores(cores, n=256):
+    """
+    Tabela de n cores (RGB 0..1) interpolando linearmente entre cores igualmente espaçadas:
+    a mesma tabela que LinearSegmentedColormap.from_list(cores) monta no matplotlib.
+    """
+    ancoras = np.array([[int(c[i:i + 2], 16) / 255 for i in (1, 3, 5)] for c in cores])
+    x = np.linspace(0, 1, len(cores))
+    pontos = np.linspace(0, 1, n)
+    return np.stack([np.interp(pontos, x, ancoras[:, canal]) for canal in range(3)], axis=1)
+
+TABELA_RYG = _tabela_cores(CORES_RYG)
+
+def _rgb_to_hex(rgb):
+    """Mesma conversão de mcolors.rgb2hex (arredondamento de cada canal), para um array Nx3."""
+    canais = np.round(np.asarray(rgb)[:, :3] * 255).astype(int)
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in canais]
+
+def column_colors(values, higher_is_better=True):
+    """
+    Cores de uma coluna inteira de uma vez: normaliza pelo mínimo/máximo da coluna
+    (NumPy) e busca todas as células na tabela de cores numa única indexação.
+
+    Qualquer número é aceito (negativos, notação científica, numéricos do NumPy);
+    textos/vazios ficam brancos e não entram no mínimo/máximo.
+    """
+    arr = pd.to_numeric(pd.Series(list(values), dtype=object), errors='coerce').to_numpy(dtype=float)
+    validos = np.isfinite(arr)
+    cores = np.full(len(arr), COLOR_NEUTRAL, dtype=object)
+    if not validos.any():
+        return cores.tolist()
+
+    min_v, max_v = arr[validos].min(), arr[validos].max()
+    if max_v == min_v:
+        cores[validos] = COLOR_FLAT
+        return cores.tolist()
+    norm = (arr[validos] - min_v) / (max_v - min_v)
+    if not higher_is_better: norm = 1 - norm
+    # Índice na tabela como no Colormap do matplotlib (1.0 cai na última cor)
+    n = len(TABELA_RYG)
+    cores[validos] = _rgb_to_hex(TABELA_RYG[np.minimum((norm * n).astype(int), n - 1)])
+    return cores.tolist()
+
+def rule_for_column(col, is_mandante):
+    """Regra (maior é melhor?) de COLOR_RULES_* para uma coluna, aceitando 'xG casa' ou 'XG casa'."""
+    rules = COLOR_RULES_MANDANTE if is_mandante else COLOR_RULES_VISITANTE
+    key = 'X' + col[1:] if col.startswith('x') else col
+    return rules.get(key)
+
+def table_colors(df, is_mandante):
+    """
+    Cores de fundo de todas as células da tabela (DataFrame do mesmo formato, colunas na mesma ordem).
+    Colunas sem regra (times) ficam brancas.
+    """
+    cores = {}
+    for col in df.columns:
+        regra = rule_for_column(col, is_mandante)
+        cores[col] = column_colors(df[col], regra) if regra is not None else [COLOR_NEUTRAL] * len(df)
+    return pd.DataFrame(cores, index=df.index, columns=df.columns)
+
+def get_conditional_color(value, column_values, higher_is_better=True):
+    """Cor de uma única célula em relação à coluna. Para tabelas inteiras use column_colors/table_colors."""
+    return column_colors(list(column_values) + [value], higher_is_better)[-1]
+
+def style_table(df, is_mandante):
+    """
+    Styler para st.dataframe com as mesmas cores e formatação numérica da arte
+    (GP/GS inteiros, xG/xGA com 2 casas).
+    """
+    cores = table_colors(df, is_mandante)
+    def numero(fmt):
+        return lambda v: fmt.format(v) if isinstance(v, (int, float, np.number)) and pd.notna(v) else ("-" if pd.isna(v) else str(v))
+    formatos = {col: numero("{:.0f}") for col in ("GP", "GS") if col in df.columns}
+    formatos.update({col: numero("{:.2f}") for col in df.columns if col.lower().startswith("xg")})
+    return (df.style
+            .apply(lambda _: "background-color: " + cores + "; color: black", axis=None)
+            .format(formatos))
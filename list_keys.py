@@ -1,2 +1,3 @@
-from image_data import IMAGES
+from asset_pack import open_pack
+IMAGES = open_pack()
 print(list(IMAGES.keys()))
@@ -0,0 +1,145 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import telemetry
+import graphic_renderer
+
+# Serviço local de renderização: as artes pedidas pelo app entram numa fila e são geradas
+# no pool de processos (graphic_renderer.get_render_pool, um processo por núcleo), fora
+# da thread do rerun. Vários usuários pedindo a mesma arte ao mesmo tempo recebem o mesmo
+# Future (uma única renderização). Acima de RENDER_FILA_MAX pedidos pendentes, novos pedidos
+# são recusados com FilaCheia em vez de acumular trabalho sem limite.
+
+class FilaCheia(RuntimeError):
+    """Muitos pedidos pendentes: o serviço recusou o novo pedido (tente de novo em instantes)."""
+
+def _concluido(png):
+    futuro = Future()
+    futuro.set_result(png)
+    return futuro
+
+class RenderService:
+    """
+    Fila de artes com deduplicação dos pedidos em andamento.
+
+    submit() devolve um concurrent.futures.Future com os bytes do PNG (para acompanhar
+    com done()/result()); render() é a versão async (await). Artes já prontas saem dos
+    caches de artes (memória e disco) sem passar pelo pool.
+    """
+
+    def __init__(self, max_workers=None, max_pendentes=None):
+        self.max_workers = max_workers or int(os.environ.get("RENDER_PROCESSOS", "0")) or os.cpu_count()
+        self.max_pendentes = max_pendentes or int(os.environ.get("RENDER_FILA_MAX", "32"))
+        self._lock = threading.Lock()
+        self._em_andamento = {} # chave da arte -> Future
+        self.pedidos = 0
+        self.coalescidos = 0
+        self.do_cache = 0
+        self.recusados = 0
+
+    def _enviar(self, *args):
+        try:
+            return graphic_renderer.get_render_pool(self.max_workers).submit(graphic_renderer._render_job, *args)
+        except BrokenProcessPool:
+            # Um processo do pool morreu (ex.: falta de memória): recria o pool uma vez
+            telemetry.aviso("pool_render_recriado")
+            graphic_renderer.shutdown_render_pool()
+            return graphic_renderer.get_render_pool(self.max_workers).submit(graphic_renderer._render_job, *args)
+
+    def submit(self, df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro,
+               dpi=graphic_renderer.OUTPUT_DPI, backend=None):
+        """
+        Enfileira uma arte. Pedidos idênticos em andamento compartilham o mesmo Future.
+
+        Returns:
+            Future cujo result() são os bytes do PNG (ou a exceção da renderização).
+
+        Raises:
+            FilaCheia: se já houver max_pendentes artes diferentes na fila.
+        """
+        backend = backend or graphic_renderer.RENDER_BACKEND
+        chave = graphic_renderer.render_cache_key(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro, dpi, backend)
+        with self._lock:
+            self.pedidos += 1
+            futuro = self._em_andamento.get(chave)
+            if futuro is not None:
+                self.coalescidos += 1
+                telemetry.contar("artes_coalescidas")
+                return futuro
+            png = graphic_renderer.RENDER_CACHE.get(chave)
+            if png is None:
+                png = graphic_renderer.RENDER_CACHE_DISK.get(chave)
+                if png is not None:
+                    graphic_renderer.RENDER_CACHE.put(chave, png)
+            if png is not None:
+                self.do_cache += 1
+                return _concluido(png)
+            if len(self._em_andamento) >= self.max_pendentes:
+                self.recusados += 1
+                telemetry.aviso("fila_render_cheia", pendentes=len(self._em_andamento))
+                raise FilaCheia(f"{len(self._em_andamento)} artes na fila; tente de novo em instantes.")
+
+            futuro = self._em_andamento[chave] = Future()
+            futuro.set_running_or_notify_cancel() # Compartilhado entre sessões: ninguém cancela
+            try:
+                # use_cache=False: os caches de artes são os deste processo (o processo do pool só renderiza)
+                tarefa = self._enviar((rodada_num, n_jogos, tipo_filtro), df_mandante, df_visitante, backend, dpi, False)
+            except Exception:
+                del self._em_andamento[chave]
+                raise
+
+        def _entregar(tarefa):
+            try:
+                _, png, segundos = tarefa.result()
+            except BaseException as e:
+                with self._lock:
+                    self._em_andamento.pop(chave, None)
+                telemetry.erro("arte_falhou", erro=f"{type(e).__name__}: {e}", dpi=dpi, backend=backend)
+                futuro.set_exception(e)
+                return
+            # No cache antes de sair da fila: um novo pedido sempre acha a arte num dos dois
+            graphic_renderer.RENDER_CACHE.put(chave, png)
+            try:
+                graphic_renderer.RENDER_CACHE_DISK.put(chave, png)
+            except OSError as e: # Disco cheio/somente leitura: segue só com o cache em memória
+                telemetry.aviso("cache_disco_falhou", erro=str(e))
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+            telemetry.log("arte_servico", logging.DEBUG, segundos=round(segundos, 3), dpi=dpi, backend=backend)
+            futuro.set_result(png)
+
+        tarefa.add_done_callback(_entregar)
+        return futuro
+
+    async def render(self, df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro,
+                     dpi=graphic_renderer.OUTPUT_DPI, backend=None):
+        """Versão async de submit(): aguarda e devolve os bytes do PNG."""
+        return await asyncio.wrap_future(self.submit(df_mandante, df_visitante, rodada_num, n_jogos, tipo_filtro,
+                                                     dpi=dpi, backend=backend))
+
+    def aquecer(self):
+        """Sobe os processos do pool e aquece os escudos de cada um (sem esperar)."""
+        pool = graphic_renderer.get_render_pool(self.max_workers)
+        for _ in range(self.max_workers):
+            pool.submit(graphic_renderer.warm_image_cache)
+
+    def stats(self):
+        with self._lock:
+            return {'processos': self.max_workers, 'pendentes': len(self._em_andamento),
+                    'max_pendentes': self.max_pendentes, 'pedidos': self.pedidos,
+                    'coalescidos': self.coalescidos, 'do_cache': self.do_cache, 'recusados': self.recusados}
+
+_SERVICO = None
+_SERVICO_LOCK = threading.Lock()
+
+def servico():
+    """Serviço de renderização do processo (compartilhado por todas as sessões)."""
+    global _SERVICO
+    with _SERVICO_LOCK:
+        if _SERVICO is None:
+            _SERVICO = RenderService()
+        return _SERVICO
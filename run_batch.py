@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+import data_processor
+import telemetry
+
+# Lote de linha de comando (sem Streamlit): planilhas x rodadas x N x filtros -> tabelas e artes.
+# Ex. (job semanal no cron):
+#   python run_batch.py planilha.csv --rodadas ultima --n 3 5 --saida saida/
+#   python run_batch.py a.csv b.xlsx dados/partidas --rodadas 1-10,15 --formatos csv parquet --backend pillow
+#
+# As planilhas são processadas uma de cada vez (só o cubo da planilha atual fica em memória) e
+# cada arte é gravada assim que fica pronta. As artes são geradas no pool de processos (todos os núcleos).
+
+FORMATOS = ("csv", "parquet", "json")
+
+def _rodadas(texto, disponiveis):
+    """'todas', 'ultima' ou lista/intervalos ('1-5,8'). Só as rodadas com jogos na planilha."""
+    texto = texto.strip().lower()
+    if texto == "todas":
+        return list(disponiveis)
+    if texto == "ultima":
+        return list(disponiveis[-1:])
+    escolhidas = set()
+    for parte in texto.split(","):
+        ini, _, fim = parte.strip().partition("-")
+        escolhidas.update(range(int(ini), int(fim or ini) + 1))
+    return [r for r in disponiveis if r in escolhidas]
+
+def _fontes(caminho):
+    """
+    (rótulo, cubo) de cada análise da entrada. Planilhas usam o cubo persistido ao lado
+    do arquivo (obter_cubo); datasets Parquet e pastas Excel com uma aba por liga/temporada
+    geram um cubo por Liga/Temporada.
+    """
+    caminho = Path(caminho)
+    colunar = data_processor.is_colunar(caminho)
+    if not colunar:
+        cubo = data_processor.carregar_cubo(caminho)
+        if cubo is not None:
+            yield caminho.stem, cubo
+            return
+
+    df = data_processor.load_and_clean_data(caminho)
+    if isinstance(df, str):
+        raise ValueError(df)
+    if not colunar and 'Liga' not in df.columns:
+        yield caminho.stem, data_processor.obter_cubo(caminho, df)
+        return
+    for (liga, temporada), parte in df.groupby(['Liga', 'Temporada'], sort=True, observed=True):
+        yield f"{caminho.stem}_{liga}_{temporada}", data_processor.construir_cubo(parte.reset_index(drop=True))
+
+def _gravar_tabela(df, destino_base, formatos):
+    for formato in formatos:
+        destino = destino_base.with_suffix(f".{formato}")
+        if formato == "csv":
+            df.to_csv(destino, index=False, encoding="utf-8-sig")
+        elif formato == "parquet":
+            df.to_parquet(destino, index=False)
+        else:
+            df.to_json(destino, orient="records", lines=True, force_ascii=False)
+
+def processar(rotulo, cubo, args):
+    """Tabelas e artes de uma análise. Retorna (artes geradas, erros)."""
+    destino = Path(args.saida) / rotulo
+    destino.mkdir(parents=True, exist_ok=True)
+    disponiveis = sorted(int(r) for r in cubo.index.get_level_values('Rodada').unique())
+    jobs = [(r, n, f) for r in _rodadas(args.rodadas, disponiveis) for n in args.n for f in args.filtros]
+    if not jobs:
+        print(f"[{rotulo}] Nenhuma rodada selecionada (disponíveis: {disponiveis[:1]}..{disponiveis[-1:]})")
+        return 0, 0
+
+    with telemetry.etapa("lote_tabelas", logging.INFO, planilha=rotulo, jobs=len(jobs)):
+        partes = {True: [], False: []}
+        for rodada, n, filtro in jobs:
+            for is_mandante, tabela in zip((True, False), data_processor.consultar_cubo(cubo, rodada, n, filtro)):
+                if not tabela.empty:
+                    partes[is_mandante].append(tabela.assign(Rodada=rodada, N=n, Filtro=filtro))
+        for is_mandante, nome in ((True, "tabelas_mandantes"), (False, "tabelas_visitantes")):
+            if partes[is_mandante]:
+                tabela = pd.concat(partes[is_mandante], ignore_index=True)
+                tabela = tabela[['Rodada', 'N', 'Filtro'] + [c for c in tabela.columns if c not in ('Rodada', 'N', 'Filtro')]]
+                _gravar_tabela(tabela, destino / nome, args.formatos)
+        del partes
+
+    if args.sem_arte:
+        print(f"[{rotulo}] {len(jobs)} tabelas em {destino}")
+        return 0, 0
+
+    import graphic_renderer # Só carrega matplotlib/imagens se houver artes a gerar
+    pasta_artes = destino / "artes"
+    pasta_artes.mkdir(exist_ok=True)
+    geradas = erros = 0
+    for resultado, png in graphic_renderer.iter_batch(
+            jobs, lambda r, n, f: data_processor.consultar_cubo(cubo, r, n, f),
+            backend=args.backend, max_workers=args.workers, dpi=args.dpi, use_cache=not args.sem_cache):
+        if png is None:
+            if resultado['erro'] != "Sem jogos na rodada": # Rodada sem jogos não é falha
+                erros += 1
+                print(f"[{rotulo}] ERRO {resultado['arquivo']}: {resultado['erro']}")
+            continue
+        (pasta_artes / resultado['arquivo']).write_bytes(png)
+        geradas += 1
+    print(f"[{rotulo}] {len(jobs)} tabelas e {geradas} artes em {destino}")
+    return geradas, erros
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera tabelas e artes de várias planilhas, rodadas, N e filtros (sem Streamlit).")
+    parser.add_argument("entradas", nargs="+", help="Planilhas (CSV/Excel) ou datasets Parquet")
+    parser.add_argument("--rodadas", default="ultima", help="'todas', 'ultima' (padrão) ou lista/intervalos: 1-5,8")
+    parser.add_argument("--n", type=int, nargs="+", default=[3], help="Recortes N (1..%d)" % data_processor.CUBO_N_MAX)
+    parser.add_argument("--filtros", nargs="+", choices=data_processor.FILTROS_MANDO, default=list(data_processor.FILTROS_MANDO))
+    parser.add_argument("--saida", default="saida", help="Diretório de saída (uma pasta por planilha)")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["csv"], help="Formatos das tabelas")
+    parser.add_argument("--sem-arte", action="store_true", help="Só as tabelas")
+    parser.add_argument("--backend", choices=("matplotlib", "pillow"), default=None)
+    parser.add_argument("--dpi", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=None, help="Processos de renderização (padrão: todos os núcleos)")
+    parser.add_argument("--sem-cache", action="store_true", help="Não usa/grava o cache de artes")
+    args = parser.parse_args()
+
+    fora = [n for n in args.n if not 1 <= n <= data_processor.CUBO_N_MAX]
+    if fora:
+        parser.error(f"N fora de 1..{data_processor.CUBO_N_MAX}: {fora}")
+    if "parquet" in args.formatos and data_processor.pq is None:
+        parser.error("Para gravar Parquet instale o pyarrow (pip install pyarrow).")
+
+    inicio = time.perf_counter()
+    total_artes = total_erros = 0
+    for entrada in args.entradas:
+        try:
+            for rotulo, cubo in _fontes(entrada):
+                geradas, erros = processar(rotulo, cubo, args)
+                total_artes += geradas
+                total_erros += erros
+        except (OSError, ValueError) as e:
+            total_erros += 1
+            print(f"[{entrada}] ERRO: {e}")
+            telemetry.erro("lote_falhou", arquivo=str(entrada), erro=str(e))
+
+    if "graphic_renderer" in sys.modules:
+        sys.modules["graphic_renderer"].shutdown_render_pool()
+    print(f"Concluído em {time.perf_counter() - inicio:.1f}s: {total_artes} artes, {total_erros} erro(s), {os.cpu_count()} núcleos.")
+    sys.exit(1 if total_erros else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import sys
+import time
+import importlib
+import threading
+
+import telemetry
+
+# Partida rápida do app: a tela de PIN e as tabelas não dependem do matplotlib nem do pacote
+# de imagens. O graphic_renderer (matplotlib, fonte, PIL, escudos) é importado e aquecido
+# em segundo plano depois do login, uma única vez por processo, junto com os processos do
+# serviço de renderização (render_service).
+
+# Tempos (segundos) medidos neste processo: importações e aquecimento do renderer
+TEMPOS = {}
+_lock = threading.Lock()
+_thread = None
+
+def medir_importacao(nome):
+    """Importa o módulo e registra quanto a primeira importação levou."""
+    ja_importado = nome in sys.modules
+    t0 = time.perf_counter()
+    modulo = importlib.import_module(nome)
+    if not ja_importado:
+        TEMPOS.setdefault(f"import {nome}", time.perf_counter() - t0)
+    return modulo
+
+def deploy_check():
+    """Confere o pacote de imagens no servidor (evento pacote_imagens nos logs)."""
+    try:
+        from asset_pack import ASSET_PACK_PATH, AssetPack
+        IMAGES = AssetPack(ASSET_PACK_PATH) # Lê só o índice
+        count = len(IMAGES)
+        # Amostra das primeiras 5 chaves para confirmar o padrão
+        telemetry.log("pacote_imagens", chaves=count, versao=IMAGES.version, amostra=list(IMAGES.keys())[:5])
+        if count == 0:
+            telemetry.aviso("pacote_imagens_vazio", arquivo=str(ASSET_PACK_PATH))
+    except FileNotFoundError:
+        telemetry.erro("pacote_imagens_ausente", dica="gere com: python gen_asset_pack.py")
+    except Exception as e:
+        telemetry.erro("pacote_imagens_invalido", erro=str(e))
+
+def _aquecer():
+    try:
+        t0 = time.perf_counter()
+        graphic_renderer = medir_importacao("graphic_renderer")
+        deploy_check()
+        # Escudos e logos decodificados uma vez por processo (reruns e outras sessões pulam as chaves prontas)
+        graphic_renderer.warm_image_cache()
+        # Sobe os processos do serviço de renderização (cada um importa e aquece o renderer)
+        servico_render().aquecer()
+        TEMPOS["renderer pronto"] = time.perf_counter() - t0
+        telemetry.log("renderer_pronto", segundos=round(TEMPOS["renderer pronto"], 3),
+                      importacao=round(TEMPOS.get("import graphic_renderer", 0.0), 3))
+    except Exception as e:
+        # O erro reaparece (com traceback) quando o app pedir o renderer
+        telemetry.erro("renderer_falhou", erro=f"{type(e).__name__}: {e}")
+
+def aquecer_renderer():
+    """Dispara (só na primeira chamada do processo) a importação e o aquecimento do renderer em segundo plano."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_aquecer, name="aquecer-renderer", daemon=True)
+            _thread.start()
+    return _thread
+
+def renderer():
+    """Módulo graphic_renderer pronto para uso (espera o aquecimento, se ainda estiver em andamento)."""
+    aquecer_renderer().join()
+    return medir_importacao("graphic_renderer")
+
+def renderer_pronto():
+    return "renderer pronto" in TEMPOS
+
+def servico_render():
+    """Serviço de renderização do processo (fila de artes em processos, ver render_service)."""
+    return medir_importacao("render_service").servico()
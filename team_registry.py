@@ -0,0 +1,140 @@
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Cadastro de times: cada time tem um ID inteiro canônico, uma chave (usada nos escudos do
+# pacote de imagens: team_<chave>), o nome exibido nas tabelas e os apelidos conhecidos.
+# Os IDs são fixos: times novos entram sempre no FIM da lista.
+#   (id, chave, nome, apelidos)
+TIMES_CANONICOS = [
+    (0, "athletico_pr", "Athletico-PR", ["athletico", "athletico_paranaense", "atletico_pr", "atletico_paranaense", "cap"]),
+    (1, "atletico_mg", "Atlético-MG", ["atletico", "atletico_mineiro", "atletico_m", "cam"]),
+    (2, "bahia", "Bahia", ["ec_bahia"]),
+    (3, "botafogo", "Botafogo", ["botafogo_rj", "botafogo_fr"]),
+    (4, "chapecoense", "Chapecoense", ["chapeco", "chape"]),
+    (5, "corinthians", "Corinthians", ["corinth", "sc_corinthians"]),
+    (6, "coritiba", "Coritiba", ["coxa"]),
+    (7, "cruzeiro", "Cruzeiro", ["cruzeiro_ec"]),
+    (8, "flamengo", "Flamengo", ["cr_flamengo"]),
+    (9, "fluminense", "Fluminense", ["fluminense_fc"]),
+    (10, "gremio", "Grêmio", ["gremio_fbpa"]),
+    (11, "internacional", "Internacional", ["inter", "sc_internacional"]),
+    (12, "mirassol", "Mirassol", []),
+    (13, "palmeiras", "Palmeiras", ["se_palmeiras"]),
+    (14, "red_bull_bragantino", "Bragantino", ["bragantino", "red_bull", "rb_bragantino", "bragantino_sp"]),
+    (15, "remo", "Remo", ["clube_do_remo"]),
+    (16, "santos", "Santos", ["santos_fc"]),
+    (17, "sao_paulo", "São Paulo", ["spfc", "sao_paulo_fc"]),
+    (18, "vasco", "Vasco", ["vasco_da_gama", "cr_vasco_da_gama"]),
+    (19, "vitoria", "Vitória", ["ec_vitoria"]),
+    (20, "ceara", "Ceará", []),
+    (21, "fortaleza", "Fortaleza", []),
+    (22, "juventude", "Juventude", []),
+    (23, "sport", "Sport", ["sport_recife"]),
+    (24, "atletico_go", "Atlético-GO", ["atletico_goianiense", "atletico_go"]),
+    (25, "america_mg", "América-MG", ["america_mineiro"]),
+    (26, "cuiaba", "Cuiabá", []),
+    (27, "goias", "Goiás", []),
+]
+
+# Regras antigas do renderer (trecho contido no nome -> chave), na ordem original.
+# Servem SÓ para achar um escudo parecido (chave_escudo): nunca decidem a identidade do time,
+# senão clubes diferentes (Botafogo-SP, Grêmio Novorizontino...) teriam os jogos fundidos.
+REGRAS_TRECHO = [
+    ("atletico_m", "atletico_mg"), ("atletico", "atletico_mg"),
+    ("botafogo", "botafogo"), ("chapeco", "chapecoense"),
+    ("bragant", "red_bull_bragantino"), ("red_bull", "red_bull_bragantino"),
+    ("vasco", "vasco"), ("vitoria", "vitoria"), ("gremio", "gremio"), ("palmeiras", "palmeiras"),
+    ("flamengo", "flamengo"), ("fluminense", "fluminense"), ("sao_paulo", "sao_paulo"),
+    ("santos", "santos"), ("cruzeiro", "cruzeiro"), ("bahia", "bahia"), ("inter", "internacional"),
+    ("corinth", "corinthians"), ("coritiba", "coritiba"), ("mirassol", "mirassol"),
+    ("remo", "remo"), ("athletico", "athletico_pr"),
+]
+
+def normalizar_nome(nome):
+    """Remove acentos, troca espaços/hífens/pontos por underscore e deixa em minúsculas."""
+    if nome is None or (isinstance(nome, float) and np.isnan(nome)): return ""
+    n = unicodedata.normalize('NFKD', str(nome)).encode('ASCII', 'ignore').decode('ASCII')
+    return re.sub(r"[\s\-./]+", "_", n.lower()).strip("_")
+
+class TeamRegistry:
+    """
+    Resolve nomes de times (com grafias diferentes) para o ID canônico.
+
+    Cada nome distinto é normalizado e procurado só uma vez: o resultado fica memorizado.
+    Só apelidos exatos (após normalizar) contam como o mesmo time. Nomes sem cadastro
+    ganham um ID novo (após os canônicos), compartilhado por todas as grafias que
+    normalizam igual ("São Paulo " e "Sao Paulo"). Esses IDs extras valem apenas
+    dentro do processo; para persistir, guarde o nome, não o ID.
+    """
+
+    def __init__(self, canonicos=TIMES_CANONICOS, regras_trecho=REGRAS_TRECHO):
+        self._lock = threading.Lock()
+        self._chaves, self._nomes = {}, {}
+        self._apelidos = {} # nome normalizado -> id
+        for id_time, chave, nome, apelidos in canonicos:
+            self._chaves[id_time], self._nomes[id_time] = chave, nome
+            for apelido in [chave, normalizar_nome(nome)] + list(apelidos):
+                self._apelidos.setdefault(apelido, id_time)
+        por_chave = {chave: id_time for id_time, chave in self._chaves.items()}
+        self._trechos = [(trecho, por_chave[chave]) for trecho, chave in regras_trecho]
+        self._proximo = max(self._chaves, default=-1) + 1
+        self._memo = {} # nome original -> id
+
+    def resolve(self, nome):
+        """ID canônico do time (registra um ID novo se o nome for desconhecido)."""
+        id_time = self._memo.get(nome)
+        if id_time is not None:
+            return id_time
+        with self._lock:
+            id_time = self._memo.get(nome)
+            if id_time is None:
+                id_time = self._memo[nome] = self._resolver(nome)
+        return id_time
+
+    def _resolver(self, nome):
+        normalizado = normalizar_nome(nome)
+        id_time = self._apelidos.get(normalizado)
+        if id_time is None:
+            # Time sem cadastro: a primeira grafia vista vira o nome exibido
+            id_time = self._proximo
+            self._proximo += 1
+            self._chaves[id_time], self._nomes[id_time] = normalizado, str(nome).strip()
+        self._apelidos.setdefault(normalizado, id_time)
+        return id_time
+
+    def ids(self, nomes):
+        """IDs de uma sequência de nomes (Series, array ou lista), resolvendo cada nome distinto uma única vez."""
+        serie = nomes if isinstance(nomes, pd.Series) else pd.Series(list(nomes), dtype=object)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos, distintos = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            codigos, distintos = pd.factorize(serie)
+        mapa = np.array([self.resolve(nome) for nome in distintos] + [-1], dtype=np.int64)
+        return mapa[codigos] # Código -1 (nulo) vira o ID -1
+
+    def nome(self, id_time):
+        return self._nomes[id_time]
+
+    def chave(self, id_time):
+        return self._chaves[id_time]
+
+    def chave_escudo(self, nome):
+        """Chave de um time cadastrado cujo trecho aparece no nome (REGRAS_TRECHO), ou None. Só para escudos."""
+        normalizado = normalizar_nome(nome)
+        return next((self._chaves[i] for trecho, i in self._trechos if trecho in normalizado), None)
+
+    def canonicalizar(self, nomes):
+        """Series com o nome canônico de cada time (mesmo índice da entrada)."""
+        serie = nomes if isinstance(nomes, pd.Series) else pd.Series(list(nomes), dtype=object)
+        distintos = pd.unique(serie.dropna())
+        return serie.astype(object).map({nome: self._nomes[self.resolve(nome)] for nome in distintos})
+
+    def __len__(self):
+        return len(self._nomes)
+
+# Cadastro único do processo (todas as sessões e módulos usam o mesmo)
+REGISTRY = TeamRegistry()
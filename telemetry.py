@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# Instrumentação leve do pipeline: tempos por etapa, contadores e logs estruturados.
+#
+# Cada evento é uma linha JSON no stderr: {"ts", "nivel", "evento", ...campos}.
+# O nível vem de LOG_NIVEL (padrão INFO). Os tempos por etapa (a cada rerun, consulta ou
+# arte) registram em DEBUG para não inundar o log do servidor; INFO fica para avisos, o
+# tempo de partida e os totais de lote. As estatísticas abaixo contam todas as etapas.
+# As estatísticas por etapa e os contadores são do processo; a "última execução" é por
+# thread (cada rerun do Streamlit roda numa thread), para o painel do app.
+
+logger = logging.getLogger("tcc")
+
+class _FormatoJSON(logging.Formatter):
+    def format(self, record):
+        evento = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "evento": record.getMessage(),
+            "pid": record.process,
+            **getattr(record, "campos", {}),
+        }
+        if record.exc_info:
+            evento["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(_FormatoJSON())
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("LOG_NIVEL", "INFO").upper())
+    logger.propagate = False
+
+def log(evento, nivel=logging.INFO, **campos):
+    """Registra um evento estruturado (linha JSON)."""
+    if logger.isEnabledFor(nivel):
+        logger.log(nivel, evento, extra={"campos": campos})
+
+def aviso(evento, **campos):
+    log(evento, logging.WARNING, **campos)
+
+def erro(evento, **campos):
+    log(evento, logging.ERROR, **campos)
+
+# --- ESTATÍSTICAS DO PROCESSO ---
+_lock = threading.Lock()
+_etapas = {} # nome -> [chamadas, total, máximo, última] (segundos)
+_contadores = {}
+_local = threading.local()
+
+def contar(nome, n=1):
+    """Incrementa um contador do processo."""
+    with _lock:
+        _contadores[nome] = _contadores.get(nome, 0) + n
+
+def registrar(nome, segundos, nivel=logging.DEBUG, **campos):
+    """Registra a duração de uma etapa (estatísticas do processo, execução atual e log)."""
+    with _lock:
+        est = _etapas.setdefault(nome, [0, 0.0, 0.0, 0.0])
+        est[0] += 1
+        est[1] += segundos
+        est[2] = max(est[2], segundos)
+        est[3] = segundos
+    execucao = getattr(_local, "execucao", None)
+    if execucao is not None:
+        execucao.append((nome, segundos))
+    log("etapa", nivel, etapa=nome, ms=round(segundos * 1000, 3), **campos)
+
+@contextmanager
+def etapa(nome, nivel=logging.DEBUG, **campos):
+    """
+    Mede o bloco como uma etapa. O dict devolvido aceita campos extras para o log
+    (ex.: linhas processadas). Exceções são registradas no campo 'erro' e propagadas.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield campos
+    except BaseException as e:
+        campos['erro'] = type(e).__name__
+        raise
+    finally:
+        registrar(nome, time.perf_counter() - t0, nivel, **campos)
+
+def cronometrado(nome, nivel=logging.DEBUG):
+    """Decorador: cada chamada da função é registrada como a etapa nome."""
+    def decorador(func):
+        @wraps(func)
+        def medido(*args, **kwargs):
+            with etapa(nome, nivel):
+                return func(*args, **kwargs)
+        return medido
+    return decorador
+
+def iniciar_execucao():
+    """Começa uma nova execução nesta thread (ex.: um rerun do app): as etapas seguintes entram nela."""
+    _local.execucao = []
+
+def execucao_atual():
+    """
+    Etapas da execução atual desta thread, agregadas por nome na ordem em que apareceram.
+
+    Returns:
+        Lista de dicts {'etapa', 'chamadas', 'total_ms', 'max_ms'}.
+    """
+    agregado = {}
+    for nome, segundos in getattr(_local, "execucao", None) or []:
+        item = agregado.setdefault(nome, {'etapa': nome, 'chamadas': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        item['chamadas'] += 1
+        item['total_ms'] += segundos * 1000
+        item['max_ms'] = max(item['max_ms'], segundos * 1000)
+    return list(agregado.values())
+
+def resumo():
+    """Estatísticas do processo: tempo por etapa (chamadas, total, média, máximo, última) e contadores."""
+    with _lock:
+        etapas = {
+            nome: {'chamadas': n, 'total_ms': total * 1000, 'media_ms': total * 1000 / n,
+                   'max_ms': maximo * 1000, 'ultima_ms': ultima * 1000}
+            for nome, (n, total, maximo, ultima) in _etapas.items()
+        }
+        return {'etapas': etapas, 'contadores': dict(_contadores)}
+
+def zerar():
+    with _lock:
+        _etapas.clear()
+        _contadores.clear()